@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+scripts/load_test.py
+
+Measure concurrent-session throughput of the HTTP API (server.py) on one box.
+Each simulated session sends its requests sequentially; sessions run concurrently.
+
+Example:
+    python Scripts/load_test.py --sessions 20 --requests 5 --stream
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import aiohttp
+
+DEFAULT_QUERIES = [
+    "Summarize ticker AAPL",
+    "What is the current price of MSFT?",
+    "Fetch news about Apple's AI strategy",
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def run_query(http, url, session_id, query, stream):
+    """Return (latency_s, time_to_first_token_s | None, ok)."""
+    body = {"query": query, "session_id": session_id}
+    start = time.perf_counter()
+    first_token = None
+
+    if not stream:
+        async with http.post(f"{url}/v1/query", json=body) as resp:
+            await resp.read()
+            return time.perf_counter() - start, None, resp.status == 200
+
+    ok = False
+    async with http.post(f"{url}/v1/query/stream", json=body) as resp:
+        event = None
+        async for raw in resp.content:
+            line = raw.decode("utf-8").strip()
+            if line.startswith("event:"):
+                event = line.split(":", 1)[1].strip()
+                if event == "token" and first_token is None:
+                    first_token = time.perf_counter() - start
+                elif event == "final":
+                    ok = True
+                elif event == "error":
+                    ok = False
+    return time.perf_counter() - start, first_token, ok and resp.status == 200
+
+
+async def session_worker(http, args, results):
+    session_id = f"load-{uuid.uuid4()}"
+    for i in range(args.requests):
+        query = args.query or DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)]
+        try:
+            results.append(await run_query(http, args.url, session_id, query, args.stream))
+        except aiohttp.ClientError:
+            results.append((0.0, None, False))
+
+
+async def main(args):
+    results = []
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.sessions)
+
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(session_worker(http, args, results) for _ in range(args.sessions)))
+        wall = time.perf_counter() - start
+
+    latencies = [r[0] for r in results if r[2]]
+    ttfts = [r[1] for r in results if r[2] and r[1] is not None]
+    errors = sum(1 for r in results if not r[2])
+
+    print(f"[load_test] sessions={args.sessions} requests/session={args.requests} stream={args.stream}")
+    print(f"  completed:   {len(latencies)}  errors: {errors}")
+    print(f"  wall time:   {wall:.2f}s")
+    print(f"  throughput:  {len(latencies) / wall:.2f} req/s")
+    if latencies:
+        print(f"  latency p50: {statistics.median(latencies):.2f}s  "
+              f"p95: {percentile(latencies, 95):.2f}s  max: {max(latencies):.2f}s")
+    if ttfts:
+        print(f"  first token p50: {statistics.median(ttfts):.2f}s  p95: {percentile(ttfts, 95):.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the agent HTTP API.")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent sessions")
+    parser.add_argument("--requests", type=int, default=3, help="Requests per session")
+    parser.add_argument("--query", default=None, help="Fixed query (default: rotate sample queries)")
+    parser.add_argument("--stream", action="store_true", help="Use the SSE endpoint and report time to first token")
+    parser.add_argument("--timeout", type=float, default=300, help="Per-request client timeout (s)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+scripts/memory_benchmark.py
+
+Measure resident memory per worker process when every worker loads the same
+FAISS namespaces, with memory-mapped indexes (VECTOR_INDEX_MMAP=1) and with
+private copies. Mapped pages are counted in each worker's RssFile but live
+once in the page cache; Pss splits shared pages across the processes using them.
+
+    PYTHONPATH=. python Scripts/memory_benchmark.py --workers 4 AAPL MSFT
+    PYTHONPATH=. python Scripts/memory_benchmark.py --workers 4 --synthetic 50000   # no index or API key needed
+"""
+import argparse
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import uuid
+
+import numpy as np
+
+FIELDS = ("VmRSS", "RssAnon", "RssFile")
+
+
+def memory_kb() -> dict:
+    """Resident memory of this process from /proc (Linux only), in kB."""
+    usage = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in FIELDS:
+                usage[key] = int(value.split()[0])
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    usage["Pss"] = int(line.split()[1])
+    except OSError:
+        pass
+    return usage
+
+
+def build_synthetic(base_dir: str, rows: int, dim: int) -> str:
+    """Write one random namespace with `rows` vectors; returns its name."""
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    import tools.vector_store as vector_store
+
+    vector_store.BASE_DIR = base_dir
+    index = faiss.IndexFlatL2(dim)
+    index.add(np.random.default_rng(0).random((rows, dim), dtype=np.float32))
+    ids = [str(uuid.uuid4()) for _ in range(rows)]
+    docstore = InMemoryDocstore({
+        doc_id: Document(page_content=f"Synthetic headline {i}", metadata={"id": f"bench_{i}"})
+        for i, doc_id in enumerate(ids)
+    })
+    store = FAISS(DeterministicFakeEmbedding(size=dim), index, docstore, dict(enumerate(ids)))
+    vector_store.save_vector_store(store, "_bench")
+    return "_bench"
+
+
+def worker(base_dir, namespaces, mmap, searches, barrier, results):
+    import tools.vector_store as vector_store
+
+    vector_store.BASE_DIR = base_dir
+    vector_store.INDEX_MMAP = mmap
+    rng = np.random.default_rng(os.getpid())
+    for namespace in namespaces:
+        store = vector_store.get_vector_store(namespace)
+        if store is None:
+            print(f"[memory_benchmark] No index for '{namespace}'")
+            continue
+        # Search by raw vector so no embedding calls are made
+        for _ in range(searches):
+            query = rng.random((1, store.index.d), dtype=np.float32)
+            _, rows = store.index.search(query, 5)
+            for row in rows[0]:
+                if row >= 0:
+                    store.docstore.search(store.index_to_docstore_id[int(row)])
+
+    # Measure while every worker still holds its stores
+    barrier.wait()
+    results.put(memory_kb())
+    barrier.wait()
+
+
+def run(base_dir, namespaces, mmap, args) -> list:
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(args.workers)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=worker, args=(base_dir, namespaces, mmap, args.searches, barrier, results))
+        for _ in range(args.workers)
+    ]
+    for p in procs:
+        p.start()
+    usage = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return usage
+
+
+def report(label, usage):
+    print(f"[memory_benchmark] {label}")
+    for i, u in enumerate(usage):
+        print(f"  worker {i}: " + "  ".join(f"{k} {u.get(k, 0) / 1024:7.1f} MB" for k in (*FIELDS, "Pss")))
+    for key in ("RssAnon", "Pss"):
+        total = sum(u.get(key, 0) for u in usage) / 1024
+        print(f"  total {key}: {total:.1f} MB")
+
+
+def main(args):
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")  # embeddings are constructed, never called
+    base_dir = args.base_dir
+    namespaces = args.namespaces
+    if args.synthetic:
+        base_dir = tempfile.mkdtemp(prefix="vector_index_bench_")
+        namespaces = [build_synthetic(base_dir, args.synthetic, args.dim)]
+    if not namespaces:
+        raise SystemExit("Pass namespaces to load or --synthetic ROWS")
+
+    print(f"[memory_benchmark] workers={args.workers} namespaces={namespaces} base_dir={base_dir}")
+    try:
+        for mmap in (True, False):
+            report("mmap" if mmap else "private copy", run(base_dir, namespaces, mmap, args))
+    finally:
+        if args.synthetic:
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report per-worker RSS with mapped vs copied FAISS indexes.")
+    parser.add_argument("namespaces", nargs="*", help="Namespaces under --base-dir to load")
+    parser.add_argument("--base-dir", default="vector_index")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--searches", type=int, default=20, help="Searches per namespace per worker")
+    parser.add_argument("--synthetic", type=int, default=0, help="Build a random namespace with this many rows")
+    parser.add_argument("--dim", type=int, default=1536, help="Vector size for --synthetic")
+    main(parser.parse_args())
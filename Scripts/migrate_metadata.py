@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+scripts/migrate_metadata.py
+
+Convert namespaces persisted with a pickled docstore (index.pkl) to SQLite
+metadata (meta.sqlite). The FAISS index itself is left untouched.
+Only run this on index.pkl files you created yourself.
+
+    python Scripts/migrate_metadata.py            # every namespace under vector_index/
+    python Scripts/migrate_metadata.py AAPL Apple
+"""
+import os
+import pickle
+import sys
+
+from tools.metadata_store import META_FILE, write_metadata
+from tools.vector_store import BASE_DIR, LEGACY_PICKLE_FILE
+
+
+def legacy_namespaces(base_dir: str = BASE_DIR):
+    for root, _, files in os.walk(base_dir):
+        if LEGACY_PICKLE_FILE in files:
+            yield os.path.relpath(root, base_dir)
+
+
+def migrate(namespace: str) -> None:
+    folder = os.path.normpath(os.path.join(BASE_DIR, namespace))
+    legacy = os.path.join(folder, LEGACY_PICKLE_FILE)
+    if not os.path.exists(legacy):
+        print(f"[migrate] {folder}: no {LEGACY_PICKLE_FILE}, skipping")
+        return
+
+    with open(legacy, "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+
+    rows = write_metadata(folder, docstore, index_to_docstore_id)
+    os.remove(legacy)
+    print(f"[migrate] {folder}: {rows} documents → {META_FILE}")
+
+
+def main(namespaces):
+    for namespace in namespaces or list(legacy_namespaces()):
+        migrate(namespace)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
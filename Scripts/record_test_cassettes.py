@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+scripts/record_test_cassettes.py
+
+Rebuild the committed yfinance cassettes under tests/cassettes/ from a
+deterministic fake yfinance, so the stock tests replay offline and the
+recordings never depend on live market data.
+
+    PYTHONPATH=. python Scripts/record_test_cassettes.py
+"""
+import pandas as pd
+
+from tests.conftest import cassette_path
+import tools.stock_tool as stock_tool
+from tools.replay import use_cassette
+
+QUOTES = {
+    "AAPL": {"longName": "Apple Inc.", "start": 210.0},
+    "MSFT": {"longName": "Microsoft Corporation", "start": 420.0},
+    "GOOGL": {"longName": "Alphabet Inc.", "start": 170.0},
+}
+INVALID = "INVALID_TICKER_123"
+HISTORY_DAYS = 31
+
+
+class FakeTicker:
+    """yf.Ticker stand-in: a 31-day ramp of closes and a plausible info dict."""
+
+    def __init__(self, ticker: str):
+        self.quote = QUOTES.get(ticker)
+
+    @property
+    def info(self) -> dict:
+        if self.quote is None:
+            # yfinance returns a near-empty info dict for unknown symbols
+            return {"trailingPegRatio": None}
+        closes = self._closes()
+        return {
+            "longName": self.quote["longName"],
+            "currentPrice": closes[-1],
+            "previousClose": closes[-2],
+            "volume": 52_000_000,
+            "averageVolume": 48_000_000,
+            "bid": closes[-1] - 0.05,
+            "ask": closes[-1] + 0.05,
+            "dayLow": closes[-1] - 2.0,
+            "dayHigh": closes[-1] + 1.5,
+            "marketCap": 3_100_000_000_000,
+            "trailingPE": 31.4,
+        }
+
+    def history(self, period: str) -> pd.DataFrame:
+        index = pd.date_range("2025-03-03", periods=HISTORY_DAYS, freq="B", tz="America/New_York", name="Date")
+        if self.quote is None:
+            return pd.DataFrame({"Close": []}, index=index[:0])
+        return pd.DataFrame({"Close": self._closes(), "Volume": [50_000_000] * HISTORY_DAYS}, index=index)
+
+    def _closes(self):
+        start = self.quote["start"]
+        return [round(start * (1 + 0.002 * i), 2) for i in range(HISTORY_DAYS)]
+
+
+def record(test_name: str, ticker: str) -> None:
+    path = cassette_path("test_stock_tool", test_name)
+    with use_cassette(str(path), "record") as cassette:
+        stock_tool._ticker_info(ticker)
+        stock_tool._ticker_history(ticker, "31d")
+    print(f"[record_test_cassettes] {path} ({len(cassette)} calls)")
+
+
+def main():
+    stock_tool.yf.Ticker = FakeTicker
+    for ticker in QUOTES:
+        record(f"test_fetch_stock_data_structure[{ticker}]", ticker)
+    record("test_fetch_stock_data_invalid_ticker", INVALID)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,22 +2,29 @@
 import os
 from dotenv import load_dotenv
 from pathlib import Path
-from typing import Optional, List, Union
+from typing import Iterator, Optional, List, Union
 
 from langchain.chat_models import ChatOpenAI
-from langchain.agents import initialize_agent, AgentType, Tool
+from langchain.agents import initialize_agent, AgentType, Tool, OpenAIMultiFunctionsAgent
 from langchain.tools import StructuredTool
 
 from tools.stock_tool import fetch_stock_data
-from tools.news_tool import fetch_headlines
+from tools.news_tool import fetch_headlines, iter_headlines
 from tools.summary_tool import summarize_stock, summarize_stock_multiple
 from tools.resolve_tool import resolve_company_name
+from tools.summary_store import get_precomputed_summary
+from tools.rate_limiter import openai_limiter
 from memory import get_memory
+from executor import ParallelAgentExecutor
 from pydantic import BaseModel, Field
 
 load_dotenv(dotenv_path=Path(__file__).resolve().parent / ".env")
 openai_api_base = os.getenv("OPENAI_API_BASE")
 
+# Run independent tool calls from one agent turn concurrently
+PARALLEL_TOOLS = os.getenv("AGENT_PARALLEL_TOOLS", "1") == "1"
+MAX_PARALLEL_TOOLS = int(os.getenv("AGENT_MAX_PARALLEL_TOOLS", "4"))
+
 # Tool Wrappers
 def stock_data(ticker: str) -> dict:
     """Fetch stock market data for a ticker symbol (e.g., AAPL)."""
@@ -31,6 +38,11 @@ def news_fetch(ticker: str, query: str, max_results: int = 5) -> List[dict]:
     company = resolve_company_name(ticker)
     return fetch_headlines(company, query=query, max_results=max_results)
 
+def news_stream(ticker: str, query: str, max_results: int = 5) -> Iterator[dict]:
+    """news_fetch() as a generator: each headline is yielded as soon as it passes the filters."""
+    company = resolve_company_name(ticker)
+    yield from iter_headlines(company, query=query, max_results=max_results)
+
 def summarize(tickers: Union[str, List[str]], query: Optional[str] = "") -> str:
     """
     Summarize stock and news data for VALID tickers like AAPL or MSFT.
@@ -38,17 +50,23 @@ def summarize(tickers: Union[str, List[str]], query: Optional[str] = "") -> str:
     if isinstance(tickers, str):
         tickers = [tickers]
 
-    data_items = []
-    for ticker in tickers:
-        data = fetch_stock_data(ticker)
-        if "error" in data:
-            return data["error"]
-        data_items.append(data)
+    # Peer groups get their prices from one batched download in the comparison engine
+    if len(tickers) > 1:
+        return summarize_stock_multiple(tickers, query=query)
+
+    data = fetch_stock_data(tickers[0])
+    if "error" in data:
+        return data["error"]
+
+    # Watchlist summaries are precomputed in the background; the quote above
+    # (served from the shared cache) checks the stored price is still current
+    if not (query or "").strip():
+        precomputed = get_precomputed_summary(data["ticker"], current_price=float(data["current_price"]))
+        if precomputed:
+            print(f"[Summarize] Serving precomputed summary for {data['ticker']}")
+            return precomputed
 
-    if len(data_items) == 1:
-        return summarize_stock(data_items[0], query=query)
-    else:
-        return summarize_stock_multiple(data_items, query=query)
+    return summarize_stock(data, query=query)
 
 class NewsFetchInput(BaseModel):
     ticker: str = Field(..., description="The stock ticker symbol (e.g., AAPL)")
@@ -58,8 +76,28 @@ class SummarizeInput(BaseModel):
     tickers: Union[str, List[str]] = Field(..., description="One or more stock tickers like AAPL or MSFT.")
     query: Optional[str] = Field("", description="Optional news topic to summarize, like 'AI chip development'.")
 
+# Shared chat model
+_llm = None
+
+def get_llm() -> ChatOpenAI:
+    """
+    Return the process-wide chat model.
+    Agents only differ by memory, so every session can share one client.
+    """
+    global _llm
+    if _llm is None:
+        llm_args = {
+            "openai_api_key": os.getenv("OPENAI_API_KEY"),
+            "temperature": 0,
+        }
+        if openai_api_base:
+            llm_args["openai_api_base"] = openai_api_base
+
+        _llm = ChatOpenAI(**llm_args, streaming=True, callbacks=[openai_limiter], rate_limiter=openai_limiter)
+    return _llm
+
 # Agent builder
-def build_agent(memory):
+def build_agent(memory, llm: Optional[ChatOpenAI] = None, parallel_tools: bool = PARALLEL_TOOLS):
     tools = [
         Tool.from_function(
             func=stock_data,
@@ -89,22 +127,27 @@ def build_agent(memory):
         )
     ]
 
-    llm_args = {
-        "openai_api_key": os.getenv("OPENAI_API_KEY"),
-        "temperature": 0,
-    }
-    if openai_api_base:
-        llm_args["openai_api_base"] = openai_api_base
+    llm = llm or get_llm()
 
-    llm = ChatOpenAI(**llm_args, streaming=True)
+    if not parallel_tools:
+        return initialize_agent(
+            tools=tools,
+            llm=llm,
+            agent=AgentType.OPENAI_FUNCTIONS,
+            memory=memory,
+            verbose=True,
+            max_iterations=6
+        )
 
-    return initialize_agent(
+    # Multi-function agent can request several tools per step; the executor runs them concurrently
+    agent = OpenAIMultiFunctionsAgent.from_llm_and_tools(llm=llm, tools=tools)
+    return ParallelAgentExecutor.from_agent_and_tools(
+        agent=agent,
         tools=tools,
-        llm=llm,
-        agent=AgentType.OPENAI_FUNCTIONS,
         memory=memory,
         verbose=True,
-        max_iterations=6
+        max_iterations=6,
+        max_parallel_tools=MAX_PARALLEL_TOOLS
     )
 
 # CLI test
@@ -0,0 +1,82 @@
+# executor.py
+"""
+Agent executor that runs the independent tool calls of one turn concurrently.
+
+When the model requests several tools in the same step (e.g. stock_data for
+three tickers plus news_fetch), the stock AgentExecutor performs them one
+after another. ParallelAgentExecutor submits them to a thread pool capped at
+max_parallel_tools and hands the observations back in the order the model
+issued the calls, so intermediate steps, memory and max_iterations behave
+exactly as before.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction
+from pydantic import PrivateAttr
+
+# Actions planned in the step currently being executed on this thread
+_local = threading.local()
+
+
+class _Turn:
+    def __init__(self):
+        self.actions: List[AgentAction] = []
+        self.futures: Optional[List[Future]] = None
+        self.next = 0
+
+
+class ParallelAgentExecutor(AgentExecutor):
+    max_parallel_tools: int = 4
+    """Upper bound on tool calls running at once within a single turn."""
+
+    _async_slots: Optional[asyncio.Semaphore] = PrivateAttr(default=None)
+
+    def _iter_next_step(self, name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager=None):
+        # The base class yields every planned AgentAction before performing any
+        # of them; record them so the first _perform_agent_action can fan out.
+        turn = _Turn()
+        previous = getattr(_local, "turn", None)
+        _local.turn = turn
+        try:
+            for step in super()._iter_next_step(
+                name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager
+            ):
+                if isinstance(step, AgentAction):
+                    turn.actions.append(step)
+                yield step
+        finally:
+            _local.turn = previous
+
+    def _perform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        perform = super()._perform_agent_action
+        turn = getattr(_local, "turn", None)
+        if turn is None or len(turn.actions) < 2 or self.max_parallel_tools < 2:
+            return perform(name_to_tool_map, color_mapping, agent_action, run_manager)
+
+        if turn.futures is None:
+            workers = min(self.max_parallel_tools, len(turn.actions))
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent-tool")
+            turn.futures = [
+                pool.submit(perform, name_to_tool_map, color_mapping, action, run_manager)
+                for action in turn.actions
+            ]
+            pool.shutdown(wait=False)
+            print(f"[ParallelAgentExecutor] Running {len(turn.actions)} tool calls with {workers} workers")
+
+        # Observations are returned in the order the model issued the calls
+        future = turn.futures[turn.next]
+        turn.next += 1
+        return future.result()
+
+    async def _aperform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        # The async path already gathers a turn's actions; only apply the cap
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(max(1, self.max_parallel_tools))
+        async with self._async_slots:
+            return await super()._aperform_agent_action(
+                name_to_tool_map, color_mapping, agent_action, run_manager
+            )
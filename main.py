@@ -5,8 +5,10 @@ import streamlit as st
 import uuid
 
 from tools.vector_store import load_vector_store
+from tools.watchlist import start_background_refresher
 from memory import get_memory
 from agent import build_agent
+from router import run_query
 
 from langchain_core.callbacks.manager import CallbackManager
 from langchain.callbacks.base import BaseCallbackHandler
@@ -20,6 +22,16 @@ class StreamHandler(BaseCallbackHandler):
         self.text += token
         self.container.markdown(f"```\n{self.text}\n```")  # nice monospaced block
 
+class HeadlineStream:
+    """Render fast-path news headlines one by one as they pass the filters."""
+    def __init__(self, container):
+        self.container = container
+        self.lines = []
+
+    def __call__(self, headline: dict) -> None:
+        self.lines.append(f"- [{headline['title']}]({headline.get('url', '')}) · {headline.get('published_at', 'N/A')}")
+        self.container.markdown("\n".join(["**Headlines so far:**", *self.lines]))
+
 
 # → Page config
 st.set_page_config(
@@ -36,6 +48,13 @@ st.markdown(
     """
 )
 
+# Keep watchlist summaries warm (one refresher thread per process)
+@st.cache_resource
+def _start_watchlist_refresher():
+    return start_background_refresher()
+
+_start_watchlist_refresher()
+
 # Load your RAG index once at startup
 vector_store = load_vector_store(namespace="default")
 
@@ -57,9 +76,10 @@ query = st.text_input("🧠 Ask a financial question:")
 if query:
     thinking_box = st.empty()  # creates the live-updating UI box
     stream_handler = StreamHandler(thinking_box)
+    headline_stream = HeadlineStream(thinking_box)
 
-    # Run agent with the stream handler
-    result = st.session_state.agent.run(query, callbacks=[stream_handler])
+    # Run agent with the stream handler (simple intents skip the agent loop)
+    result = run_query(st.session_state.agent, query, callbacks=[stream_handler], on_headline=headline_stream)
 
     st.markdown("### ✅ Final Answer")
     st.success(result)
@@ -1,22 +1,37 @@
 from dataclasses import dataclass
 from langchain_core.prompts import PromptTemplate
 
-# 2. Compare two tickers side‑by‑side
+# 2. Compare N tickers from precomputed numeric tables
+# Static instructions come first so provider-side prompt caching can reuse them.
 COMPARISON_TEMPLATE = PromptTemplate(
-    input_variables=["ticker_a", "data_a", "ticker_b", "data_b"],
+    input_variables=[
+        "focus", "window", "snapshot_table", "metrics_table", "correlation_table", "headlines"
+    ],
     template="""
-You are an expert investor advisor.
-Compare {ticker_a} vs. {ticker_b} based on:
+You are an expert investor advisor comparing a group of stocks.
+Every figure below was computed from market data. Use only these numbers;
+do not estimate or invent any others. Returns and volatility are over the
+stated window; beta and "vs" columns are against the stated benchmark.
 
-{ticker_a} data:  
-{data_a}
+Provide:
+1. A short (≤ 80 words) overview ranking the group on return and risk.
+2. Three to five bullet-pointed differences, each citing a number from the tables.
+3. One bullet on diversification: which names move together and which don't.
+4. A one-sentence takeaway (not investment advice).
 
-{ticker_b} data:  
-{data_b}
+Focus: {focus}
+Window: {window}
 
-Provide:
-1. A short (≤ 50 words) summary of each.  
-2. Three bullet‑pointed differences.  
-3. A one‑sentence recommendation.
+Quote snapshot:
+{snapshot_table}
+
+Return metrics:
+{metrics_table}
+
+Correlation of daily returns:
+{correlation_table}
+
+Headlines:
+{headlines}
 """.strip()
-)
\ No newline at end of file
+)
@@ -0,0 +1,180 @@
+"""
+Token-budgeted prompt assembly.
+
+Headlines are packed best-first (by retrieval score) into a fixed token budget,
+with URLs dropped and descriptions shortened, and per-ticker summaries are
+trimmed to an equal share of the comparison budget. Token counts come from a
+local tokenizer so nothing is sent to the provider to measure a prompt.
+"""
+import os
+from dataclasses import dataclass
+from typing import Dict, List
+
+import tiktoken
+
+TOKENIZER_ENCODING = os.getenv("PROMPT_TOKENIZER", "o200k_base")
+HEADLINE_TOKEN_BUDGET = int(os.getenv("SUMMARY_HEADLINE_TOKEN_BUDGET", "400"))
+COMPARISON_TOKEN_BUDGET = int(os.getenv("COMPARISON_TOKEN_BUDGET", "900"))
+MAX_DESCRIPTION_TOKENS = int(os.getenv("HEADLINE_DESCRIPTION_TOKENS", "32"))
+
+NO_HEADLINES = "- (No relevant headlines found.)"
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+        except Exception as e:
+            # Encoding files unavailable (e.g. offline); fall back to a char estimate
+            print(f"[Prompt Budget] Tokenizer unavailable ({e}); estimating 4 chars/token")
+            _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens locally with the configured tiktoken encoding."""
+    if not text:
+        return 0
+    enc = _get_encoding()
+    if enc is None:
+        return (len(text) + 3) // 4
+    return len(enc.encode(text))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens tokens, marking the cut with an ellipsis."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    enc = _get_encoding()
+    if enc is None:
+        return text[: max_tokens * 4].rstrip() + "…"
+    return enc.decode(enc.encode(text)[: max_tokens - 1]).rstrip() + "…"
+
+
+@dataclass
+class PackedText:
+    text: str
+    tokens: int
+    tokens_unpacked: int    # cost of the same content without budgeting
+    kept: int
+    total: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.tokens_unpacked - self.tokens)
+
+    def report(self, label: str) -> str:
+        return (
+            f"[Prompt Budget] {label}: kept {self.kept}/{self.total}, "
+            f"{self.tokens} tokens (unpacked {self.tokens_unpacked}, saved {self.tokens_saved})"
+        )
+
+
+def _headline_date(published: str) -> str:
+    # "2025-07-21T14:03:00Z" → "2025-07-21"
+    return (published or "")[:10]
+
+
+def format_headline_full(item: Dict) -> str:
+    """The unbudgeted format: title, full timestamp and URL."""
+    title = item.get("title", "")
+    url = item.get("url", "")
+    line = f"{title} ({item.get('published_at', '')})\n{url}" if url else title
+    return f"- {line}"
+
+
+def _format_headline_compact(item: Dict, description: str = "") -> str:
+    line = f"- {item.get('title', '').strip()}"
+    date = _headline_date(item.get("published_at", ""))
+    if date:
+        line += f" ({date})"
+    if description:
+        line += f": {description}"
+    return line
+
+
+def pack_headlines(
+    items: List[Dict],
+    budget: int = HEADLINE_TOKEN_BUDGET,
+    higher_is_better: bool = False,
+) -> PackedText:
+    """
+    Pack headline dicts (title, description, url, published_at, score) into `budget` tokens.
+
+    Headlines are taken best-score first; FAISS returns L2 distances, so lower
+    scores rank higher unless higher_is_better is set. URLs are always dropped.
+    Titles are placed first, then short descriptions are added to the
+    top-ranked headlines while budget remains. Output keeps rank order.
+    """
+    tokens_unpacked = count_tokens("\n".join(format_headline_full(i) for i in items))
+    if not items:
+        return PackedText(NO_HEADLINES, count_tokens(NO_HEADLINES), tokens_unpacked, 0, 0)
+
+    ranked = sorted(
+        items,
+        key=lambda i: i.get("score", 0.0),
+        reverse=higher_is_better,
+    )
+
+    # Pass 1: titles + dates, best first, until the budget is spent
+    lines: List[str] = []
+    chosen: List[Dict] = []
+    used = 0
+    for item in ranked:
+        line = _format_headline_compact(item)
+        cost = count_tokens(line) + 1  # newline
+        if used + cost > budget:
+            continue
+        lines.append(line)
+        chosen.append(item)
+        used += cost
+
+    # Pass 2: spend what's left on shortened descriptions for the top headlines
+    for idx, item in enumerate(chosen):
+        desc = (item.get("description") or "").strip()
+        if not desc:
+            continue
+        short = truncate_tokens(desc, MAX_DESCRIPTION_TOKENS)
+        enriched = _format_headline_compact(item, short)
+        extra = count_tokens(enriched) - count_tokens(lines[idx])
+        if used + extra > budget:
+            continue
+        lines[idx] = enriched
+        used += extra
+
+    text = "\n".join(lines) if lines else NO_HEADLINES
+    return PackedText(text, count_tokens(text), tokens_unpacked, len(lines), len(items))
+
+
+def pack_sections(
+    sections: Dict[str, str],
+    budget: int = COMPARISON_TOKEN_BUDGET,
+    bullet: str = "•",
+) -> PackedText:
+    """
+    Render {label: text} as bullet sections, giving each an equal share of `budget`.
+    Sections under their share donate the remainder to the ones after them.
+    """
+    full = "\n".join(f"{bullet} {label}: {text}" for label, text in sections.items())
+    tokens_unpacked = count_tokens(full)
+    if not sections:
+        return PackedText("", 0, 0, 0, 0)
+
+    lines: List[str] = []
+    remaining = budget
+    labels = list(sections)
+    for idx, label in enumerate(labels):
+        share = remaining // (len(labels) - idx)
+        prefix = f"{bullet} {label}: "
+        body = truncate_tokens(sections[label].strip(), share - count_tokens(prefix))
+        line = prefix + body
+        lines.append(line)
+        remaining -= count_tokens(line) + 1
+
+    text = "\n".join(lines)
+    return PackedText(text, count_tokens(text), tokens_unpacked, len(lines), len(sections))
@@ -0,0 +1,218 @@
+# router.py
+"""
+Deterministic fast path in front of the agent.
+
+Common single-intent requests ("summarize AAPL", "compare MSFT and AAPL",
+"price of TSLA", "news about Apple AI") are recognized with rules and sent
+straight to the tool wrappers in agent.py, skipping the planning LLM call.
+Anything the rules don't fully account for returns None from classify()
+and falls through to the full agent.
+"""
+import asyncio
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ROUTER", "1") == "1"
+
+# Company names users commonly type instead of the ticker
+COMPANY_TICKERS = {
+    "apple": "AAPL", "microsoft": "MSFT", "google": "GOOGL", "alphabet": "GOOGL",
+    "amazon": "AMZN", "tesla": "TSLA", "nvidia": "NVDA", "meta": "META",
+    "facebook": "META", "netflix": "NFLX", "intel": "INTC", "amd": "AMD",
+    "jpmorgan": "JPM", "visa": "V", "walmart": "WMT", "disney": "DIS",
+    "mastercard": "MA", "exxon": "XOM", "pfizer": "PFE", "berkshire": "BRK.B",
+}
+
+# All-caps words that are not tickers
+NOT_TICKERS = {
+    "A", "I", "AI", "AND", "OR", "VS", "THE", "OF", "ON", "IN", "FOR", "TO", "IS",
+    "CEO", "CFO", "US", "USA", "UK", "EU", "IPO", "ETF", "EPS", "EV", "FY",
+    "GDP", "SEC", "FED", "API", "PE", "YTD", "Q1", "Q2", "Q3", "Q4",
+}
+
+_TICKER_RE = re.compile(r"^[A-Z]{1,5}(?:\.[A-Z])?$")
+_LIST_SPLIT_RE = re.compile(r"\s*(?:,|&|/|\band\b|\bvs\.?|\bversus\b|\bwith\b)\s*", re.IGNORECASE)
+
+_SUMMARY_RE = re.compile(
+    r"^(?:please\s+)?(?:summarize|summarise|give me a summary of|summary (?:of|for)|brief(?:ing)? (?:on|for))\s+"
+    r"(?:(?:the\s+)?(?:recent\s+)?(?:performance|stock)\s+(?:for|of)\s+)?"
+    r"(?P<subject>.+?)(?:\s+(?:on|about|regarding|focusing on)\s+(?P<topic>.+))?$",
+    re.IGNORECASE,
+)
+_COMPARE_RE = re.compile(
+    r"^(?:please\s+)?compare\s+(?P<subject>.+?)(?:\s+(?:on|about|regarding|in terms of)\s+(?P<topic>.+))?$",
+    re.IGNORECASE,
+)
+_PRICE_RES = [
+    re.compile(
+        r"^(?:what(?:'s|\s+is)\s+)?(?:the\s+)?(?:current\s+|latest\s+)?(?:stock\s+|share\s+)?"
+        r"(?:price|quote)\s+(?:of|for)\s+(?P<subject>.+)$",
+        re.IGNORECASE,
+    ),
+    re.compile(r"^(?P<subject>\S+(?:\s*,\s*\S+)*)\s+(?:stock\s+|share\s+)?(?:price|quote)$", re.IGNORECASE),
+]
+_NEWS_RE = re.compile(
+    r"^(?:(?:show|get|fetch|find)\s+(?:me\s+)?)?(?:the\s+)?(?:latest\s+|recent\s+)?"
+    r"(?:news|headlines)\s+(?:about|on|for|regarding)\s+(?P<rest>.+)$",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class Route:
+    intent: str                     # "summary" | "compare" | "price" | "news"
+    tickers: List[str] = field(default_factory=list)
+    topic: str = ""
+
+
+def parse_ticker(token: str) -> Optional[str]:
+    """
+    Map a single token to a ticker: a known company name (any case)
+    or an all-caps symbol as the user typed it. Returns None otherwise.
+    """
+    token = token.strip().strip("\"'").removesuffix("'s").removesuffix("’s")
+    if not token:
+        return None
+    if token.lower() in COMPANY_TICKERS:
+        return COMPANY_TICKERS[token.lower()]
+    if _TICKER_RE.match(token) and token not in NOT_TICKERS:
+        return token
+    return None
+
+
+def parse_ticker_list(text: str) -> Optional[List[str]]:
+    """Parse 'AAPL, MSFT and Google' → ['AAPL', 'MSFT', 'GOOGL']; None if any part isn't a ticker."""
+    text = re.sub(r"^(?:tickers?|stocks?|shares of)\s+", "", text.strip(), flags=re.IGNORECASE)
+    parts = [p for p in _LIST_SPLIT_RE.split(text) if p]
+    tickers = []
+    for part in parts:
+        ticker = parse_ticker(part)
+        if ticker is None:
+            return None
+        if ticker not in tickers:
+            tickers.append(ticker)
+    return tickers or None
+
+
+def classify(query: str) -> Optional[Route]:
+    """
+    Recognize a simple intent without an LLM.
+    Returns None when the query doesn't match a rule exactly.
+    """
+    text = " ".join(query.strip().rstrip("?.!").split())
+    if not text:
+        return None
+
+    match = _COMPARE_RE.match(text)
+    if match:
+        tickers = parse_ticker_list(match.group("subject"))
+        if tickers and len(tickers) >= 2:
+            return Route("compare", tickers, (match.group("topic") or "").strip())
+        return None
+
+    match = _SUMMARY_RE.match(text)
+    if match:
+        tickers = parse_ticker_list(match.group("subject"))
+        if tickers:
+            intent = "compare" if len(tickers) > 1 else "summary"
+            return Route(intent, tickers, (match.group("topic") or "").strip())
+        return None
+
+    for pattern in _PRICE_RES:
+        match = pattern.match(text)
+        if match:
+            tickers = parse_ticker_list(match.group("subject"))
+            return Route("price", tickers) if tickers else None
+
+    match = _NEWS_RE.match(text)
+    if match:
+        rest = match.group("rest").strip()
+        ticker = parse_ticker(rest.split()[0])
+        if ticker:
+            return Route("news", [ticker], rest)
+        return None
+
+    return None
+
+
+def _format_quote(data: dict) -> str:
+    if "error" in data:
+        return data["error"]
+    return (
+        f"**{data['ticker']}** ({data.get('name') or 'N/A'}): ${data['current_price']} ({data['pct_change']})\n"
+        f"- 30-day trend: {data['trend_30d']}\n"
+        f"- Volume: {data['volume']}\n"
+        f"- Day range: {data['day_range']} · Bid/Ask: {data['bid_ask']}\n"
+        f"- Market cap: {data['market_cap']} · P/E: {data['pe_ratio']}"
+    )
+
+
+def _format_headlines(ticker: str, headlines: List[dict]) -> str:
+    if headlines and "error" in headlines[0]:
+        return headlines[0]["error"]
+    if not headlines:
+        return f"No relevant headlines found for {ticker}."
+    lines = [f"**Recent headlines for {ticker}:**"]
+    for h in headlines:
+        lines.append(f"- {h['title']} ({h.get('published_at', 'N/A')})\n  {h.get('url', '')}")
+    return "\n".join(lines)
+
+
+def dispatch(route: Route, on_headline: Optional[Callable[[dict], None]] = None) -> str:
+    """
+    Run a classified route against the agent's tool wrappers.
+    `on_headline` is called with each news headline as soon as it is found.
+    """
+    # Imported here so classify() stays usable without loading the agent stack
+    from agent import stock_data, news_stream, summarize
+
+    if route.intent in {"summary", "compare"}:
+        tickers = route.tickers[0] if len(route.tickers) == 1 else route.tickers
+        return summarize(tickers, query=route.topic)
+    if route.intent == "price":
+        return "\n\n".join(_format_quote(stock_data(t)) for t in route.tickers)
+    if route.intent == "news":
+        ticker = route.tickers[0]
+        headlines = []
+        for headline in news_stream(ticker, query=route.topic):
+            headlines.append(headline)
+            if on_headline is not None and "error" not in headline:
+                on_headline(headline)
+        return _format_headlines(ticker, headlines)
+    raise ValueError(f"Unknown route intent: {route.intent}")
+
+
+def _remember(agent, query: str, answer: str) -> None:
+    # Keep the conversation history identical to an agent run
+    memory = getattr(agent, "memory", None)
+    if memory is not None:
+        memory.save_context({"input": query}, {"output": answer})
+
+
+def run_query(agent, query: str, callbacks=None, on_headline=None) -> str:
+    """
+    Answer a query through the fast path when possible, else the full agent.
+    Fast-path news queries report each headline to `on_headline` as it arrives.
+    """
+    route = classify(query) if FAST_PATH_ENABLED else None
+    if route is None:
+        return agent.run(query, callbacks=callbacks or [])
+
+    print(f"[Router] Fast path: {route.intent} {route.tickers} topic='{route.topic}'")
+    answer = dispatch(route, on_headline=on_headline)
+    _remember(agent, query, answer)
+    return answer
+
+
+async def arun_query(agent, query: str, callbacks=None) -> str:
+    """Async variant of run_query(); fast-path tools run in a worker thread."""
+    route = classify(query) if FAST_PATH_ENABLED else None
+    if route is None:
+        return await agent.arun(query, callbacks=callbacks or [])
+
+    print(f"[Router] Fast path: {route.intent} {route.tickers} topic='{route.topic}'")
+    answer = await asyncio.to_thread(dispatch, route)
+    await asyncio.to_thread(_remember, agent, query, answer)
+    return answer
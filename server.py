@@ -0,0 +1,256 @@
+# server.py
+"""
+Async HTTP API for the financial analysis agent.
+
+Runs alongside the Streamlit front end (main.py) and exposes the same agent
+and tool wrappers over HTTP. The chat model, vector stores and per-session
+agents are created once per process and shared by every request.
+
+Endpoints:
+    GET  /health            liveness, cache hit rates, relevance cascade stats
+    POST /v1/query          {"query": ..., "session_id": ...} → final answer
+    POST /v1/query/stream   same body, answer streamed as server-sent events
+    POST /v1/tools/{name}   call stock_data / news_fetch / summarize directly
+
+Run with:
+    python server.py
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from aiohttp import web
+from langchain.callbacks.base import AsyncCallbackHandler
+
+from agent import build_agent, get_llm, stock_data, news_fetch, summarize
+from memory import get_memory
+from router import arun_query
+from tools.vector_store import get_vector_store
+from tools.watchlist import start_background_refresher
+from tools.cache import cache_stats
+from tools.relevance import relevance_stats
+
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+REQUEST_TIMEOUT = float(os.getenv("API_REQUEST_TIMEOUT", "90"))
+MAX_CONCURRENT_RUNS = int(os.getenv("API_MAX_CONCURRENT_RUNS", "32"))
+MAX_SESSIONS = int(os.getenv("API_MAX_SESSIONS", "1000"))
+
+TOOLS = {
+    "stock_data": stock_data,
+    "news_fetch": news_fetch,
+    "summarize": summarize,
+}
+
+
+class SSEQueueHandler(AsyncCallbackHandler):
+    """Push streamed LLM tokens onto a queue for the SSE response to drain."""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def on_llm_new_token(self, token: str, **kwargs) -> None:
+        if token:
+            await self.queue.put(token)
+
+
+class AgentPool:
+    """
+    Process-level registry of per-session agents.
+    Sessions share the chat model and vector stores; only memory is per session.
+    Runs for the same session are serialized so memory writes don't interleave.
+    Least recently used sessions are evicted past `max_sessions`, but never one
+    a request is still running or queued on: evicting it would let the next
+    request build a second agent and lock for the same session.
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._agents: "OrderedDict[str, tuple]" = OrderedDict()
+        self._users: Counter = Counter()  # requests holding or waiting on each session
+
+    def get(self, session_id: str):
+        entry = self._agents.get(session_id)
+        if entry is None:
+            memory = get_memory(session_id=session_id)
+            entry = (build_agent(memory=memory, llm=get_llm()), asyncio.Lock())
+            self._agents[session_id] = entry
+        else:
+            self._agents.move_to_end(session_id)
+        self._evict(keep=session_id)
+        return entry
+
+    @contextmanager
+    def checkout(self, session_id: str):
+        """The session's (agent, lock), protected from eviction until the block exits."""
+        entry = self.get(session_id)
+        self._users[session_id] += 1
+        try:
+            yield entry
+        finally:
+            self._users[session_id] -= 1
+            if not self._users[session_id]:
+                del self._users[session_id]
+            self._evict()
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """Drop the oldest idle sessions over the limit; busy ones stay until released."""
+        excess = len(self._agents) - self.max_sessions
+        for session_id in list(self._agents):
+            if excess <= 0:
+                break
+            if session_id == keep or self._users[session_id] or self._agents[session_id][1].locked():
+                continue
+            del self._agents[session_id]
+            excess -= 1
+
+
+def _error(status: int, message: str) -> web.Response:
+    return web.json_response({"error": message}, status=status)
+
+
+async def _read_query(request: web.Request):
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        return None, None
+    query = (body.get("query") or "").strip()
+    session_id = body.get("session_id") or f"session-{uuid.uuid4()}"
+    return query, session_id
+
+
+async def _run_agent(app: web.Application, session_id: str, query: str, callbacks=None) -> str:
+    with app["agents"].checkout(session_id) as (agent, session_lock):
+        async with app["run_slots"], session_lock:
+            return await arun_query(agent, query, callbacks=callbacks)
+
+
+async def health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok", "cache": cache_stats(), "relevance": relevance_stats()})
+
+
+async def query(request: web.Request) -> web.Response:
+    query_text, session_id = await _read_query(request)
+    if not query_text:
+        return _error(400, "Body must be JSON with a non-empty 'query'.")
+
+    start = time.perf_counter()
+    try:
+        answer = await asyncio.wait_for(
+            _run_agent(request.app, session_id, query_text),
+            timeout=REQUEST_TIMEOUT,
+        )
+    except asyncio.TimeoutError:
+        return _error(504, f"Agent did not answer within {REQUEST_TIMEOUT:.0f}s.")
+    except Exception as e:
+        return _error(500, f"Agent failed: {e}")
+
+    return web.json_response({
+        "session_id": session_id,
+        "answer": answer,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000),
+    })
+
+
+async def query_stream(request: web.Request) -> web.StreamResponse:
+    query_text, session_id = await _read_query(request)
+    if not query_text:
+        return _error(400, "Body must be JSON with a non-empty 'query'.")
+
+    response = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+    await response.prepare(request)
+
+    async def send(event: str, data: dict) -> None:
+        await response.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+
+    handler = SSEQueueHandler()
+    task = asyncio.create_task(_run_agent(request.app, session_id, query_text, callbacks=[handler]))
+    deadline = time.monotonic() + REQUEST_TIMEOUT
+
+    try:
+        await send("session", {"session_id": session_id})
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            getter = asyncio.ensure_future(handler.queue.get())
+            done, _ = await asyncio.wait({getter, task}, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                await send("token", {"token": getter.result()})
+                continue
+            getter.cancel()
+            if task in done:
+                # Flush whatever arrived between the last token and completion
+                while not handler.queue.empty():
+                    await send("token", {"token": handler.queue.get_nowait()})
+                await send("final", {"answer": task.result()})
+                break
+    except asyncio.TimeoutError:
+        task.cancel()
+        await send("error", {"error": f"Agent did not answer within {REQUEST_TIMEOUT:.0f}s."})
+    except ConnectionResetError:
+        task.cancel()
+        return response
+    except Exception as e:
+        await send("error", {"error": f"Agent failed: {e}"})
+
+    await response.write_eof()
+    return response
+
+
+async def call_tool(request: web.Request) -> web.Response:
+    name = request.match_info["name"]
+    func = TOOLS.get(name)
+    if func is None:
+        return _error(404, f"Unknown tool '{name}'. Available: {', '.join(TOOLS)}")
+
+    try:
+        args = await request.json()
+    except json.JSONDecodeError:
+        return _error(400, "Body must be a JSON object of tool arguments.")
+
+    try:
+        result = await asyncio.wait_for(asyncio.to_thread(func, **args), timeout=REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        return _error(504, f"Tool '{name}' did not finish within {REQUEST_TIMEOUT:.0f}s.")
+    except TypeError as e:
+        return _error(400, f"Bad arguments for '{name}': {e}")
+    except Exception as e:
+        return _error(500, f"Tool '{name}' failed: {e}")
+
+    return web.json_response({"tool": name, "result": result})
+
+
+async def on_startup(app: web.Application) -> None:
+    # Warm shared resources so the first request doesn't pay for them
+    get_llm()
+    await asyncio.to_thread(get_vector_store, "default")
+    start_background_refresher()
+
+
+def create_app() -> web.Application:
+    app = web.Application()
+    app["agents"] = AgentPool()
+    app["run_slots"] = asyncio.Semaphore(MAX_CONCURRENT_RUNS)
+    app.on_startup.append(on_startup)
+    app.router.add_get("/health", health)
+    app.router.add_post("/v1/query", query)
+    app.router.add_post("/v1/query/stream", query_stream)
+    app.router.add_post("/v1/tools/{name}", call_tool)
+    return app
+
+
+if __name__ == "__main__":
+    web.run_app(create_app(), host=API_HOST, port=API_PORT)
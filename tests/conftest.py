@@ -0,0 +1,38 @@
+import os
+import re
+from pathlib import Path
+
+import pytest
+
+# Modules build their OpenAI clients at import time; tests never reach the API
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+# Outbound calls are faked in tests; don't queue them on the shared rate limiter
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+from tools.replay import use_cassette  # noqa: E402
+
+CASSETTE_DIR = Path(__file__).parent / "cassettes"
+# replay: fail on anything unrecorded; auto: replay what is recorded and record the rest
+TEST_REPLAY_MODE = os.getenv("TEST_REPLAY_MODE", "replay")
+
+
+def cassette_path(module: str, test_name: str) -> Path:
+    """Cassette for one test: tests/cassettes/<module>/<test>.jsonl.gz."""
+    name = re.sub(r"[^\w.-]+", "_", test_name).strip("_")
+    return CASSETTE_DIR / module / f"{name}.jsonl.gz"
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "no_cassette: the test fakes upstream calls itself; don't record them")
+
+
+@pytest.fixture(autouse=True)
+def cassette(request):
+    """Upstream calls go through tests/cassettes/<module>/<test>.jsonl.gz."""
+    if TEST_REPLAY_MODE == "off" or request.node.get_closest_marker("no_cassette"):
+        yield None
+        return
+    path = cassette_path(request.node.module.__name__.rsplit(".", 1)[-1], request.node.name)
+    with use_cassette(str(path), TEST_REPLAY_MODE) as active:
+        yield active
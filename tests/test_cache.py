@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+
+import tools.cache as cache_module
+from tools.cache import CachePolicy, TwoTierCache
+
+
+class FakeRedis:
+    """The handful of Redis commands the cache uses, shared between 'replicas'."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return False
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def setup(monkeypatch):
+    monkeypatch.setitem(cache_module.POLICIES, "quote", CachePolicy(ttl=60, stale=60, local_ttl=5))
+    shared, clock = FakeRedis(), Clock()
+    replicas = [TwoTierCache(redis_getter=lambda: shared, clock=clock) for _ in range(2)]
+    return replicas, shared, clock
+
+
+def test_one_upstream_call_per_ttl_across_replicas(setup):
+    (a, b), _, clock = setup
+    calls = []
+    compute = lambda: calls.append(1) or {"price": 1.0}
+
+    for cache in (a, b, a, b):
+        assert cache.get_or_compute("quote", "AAPL", compute) == {"price": 1.0}
+    clock.now += 30  # past the local tier, still fresh in Redis
+    b.get_or_compute("quote", "AAPL", compute)
+    assert len(calls) == 1
+    assert a.stats()["quote"]["local_hits"] == 1
+    assert b.stats()["quote"]["redis_hits"] == 2
+
+    clock.now += 31  # now stale
+    b.get_or_compute("quote", "AAPL", compute)
+    assert len(calls) == 2
+
+
+def test_stale_value_served_while_another_caller_refreshes(setup):
+    (a, b), shared, clock = setup
+    a.get_or_compute("quote", "AAPL", lambda: "old")
+    clock.now += 90  # stale but inside the grace period
+
+    started, release = threading.Event(), threading.Event()
+
+    def slow_refresh():
+        started.set()
+        release.wait(2)
+        return "new"
+
+    refresher = threading.Thread(target=a.get_or_compute, args=("quote", "AAPL", slow_refresh))
+    refresher.start()
+    started.wait(2)
+    assert b.get_or_compute("quote", "AAPL", lambda: pytest.fail("stampede")) == "old"
+    release.set()
+    refresher.join()
+
+    assert b.get_or_compute("quote", "AAPL", lambda: pytest.fail("not cached")) == "new"
+    assert b.stats()["quote"]["stale_hits"] == 1
+
+
+def test_uncacheable_results_are_not_stored(setup):
+    (a, _), shared, _ = setup
+    assert a.get_or_compute("quote", "XXXX", lambda: {"error": "no data"},
+                            cacheable=lambda d: "error" not in d) == {"error": "no data"}
+    assert shared.data == {}
+
+
+def test_hit_counters_are_exact_under_concurrency(setup):
+    (a, _), _, _ = setup
+    a.get_or_compute("quote", "AAPL", lambda: "v")
+
+    def hammer():
+        for _ in range(2000):
+            a.get_or_compute("quote", "AAPL", lambda: pytest.fail("not cached"))
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert a.stats()["quote"]["local_hits"] == 8 * 2000
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools.comparison_tool import (
+    align_closes, compute_metrics, correlation_table, metrics_table, snapshot_from_closes
+)
+
+
+def synthetic_closes(n_days=120, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2025-01-01", periods=n_days)
+    market = rng.normal(0.0005, 0.01, n_days - 1)
+    returns = {
+        "SPY": market,
+        "LEVR": 2 * market,                                  # beta 2, perfectly correlated
+        "DEFN": 0.5 * market,                                # beta 0.5
+        "IDIO": rng.normal(0.001, 0.02, n_days - 1),         # uncorrelated, most volatile
+    }
+    closes = {name: 100 * np.concatenate([[1.0], np.cumprod(1 + r)]) for name, r in returns.items()}
+    return pd.DataFrame(closes, index=dates)
+
+
+def test_beta_correlation_and_relative_return():
+    closes = synthetic_closes()
+    result = compute_metrics(closes, benchmark="SPY")
+
+    assert result.tickers == ["LEVR", "DEFN", "IDIO"]
+    assert result.observations == len(closes) - 1
+    beta = dict(zip(result.tickers, result.beta))
+    assert beta["LEVR"] == pytest.approx(2.0)
+    assert beta["DEFN"] == pytest.approx(0.5)
+    assert abs(beta["IDIO"]) < 0.5
+
+    corr = result.correlation
+    assert corr[0, 1] == pytest.approx(1.0)
+    assert abs(corr[0, 2]) < 0.3
+
+    spy_total = closes["SPY"].iloc[-1] / closes["SPY"].iloc[0] - 1
+    levr_total = closes["LEVR"].iloc[-1] / closes["LEVR"].iloc[0] - 1
+    assert result.relative_return[0] == pytest.approx(levr_total - spy_total)
+
+
+def test_volatility_ranking():
+    result = compute_metrics(synthetic_closes(), benchmark="SPY")
+    ranks = dict(zip(result.tickers, result.volatility_rank))
+    assert ranks == {"IDIO": 1, "LEVR": 2, "DEFN": 3}
+
+
+def test_alignment_drops_short_history_and_gaps():
+    closes = synthetic_closes()
+    closes["NEW"] = np.nan
+    closes.loc[closes.index[-10:], "NEW"] = 50.0             # listed too recently
+    closes.loc[closes.index[5], "DEFN"] = np.nan             # one missing day
+
+    aligned, dropped = align_closes(closes)
+    assert dropped == ["NEW"]
+    assert len(aligned) == len(closes) - 1
+    assert not aligned.isna().any().any()
+
+
+@pytest.mark.parametrize("n_tickers, full_matrix", [(4, True), (50, False)])
+def test_tables_stay_compact(n_tickers, full_matrix):
+    rng = np.random.default_rng(1)
+    dates = pd.bdate_range("2025-01-01", periods=60)
+    closes = pd.DataFrame(
+        100 * np.cumprod(1 + rng.normal(0, 0.01, (60, n_tickers + 1)), axis=0),
+        index=dates, columns=[f"T{i}" for i in range(n_tickers)] + ["SPY"],
+    )
+    result = compute_metrics(closes, benchmark="SPY")
+
+    assert len(metrics_table(result).splitlines()) == n_tickers + 2
+    table = correlation_table(result)
+    assert ("most correlated" not in table) == full_matrix
+    assert len(table.splitlines()) == (n_tickers + 2 if full_matrix else 2)
+
+
+def test_snapshot_from_closes():
+    closes = pd.DataFrame(
+        {"AAA": [100.0 + i for i in range(40)], "NEW": [np.nan] * 39 + [10.0]},
+        index=pd.bdate_range("2025-01-01", periods=40),
+    )
+    snapshot = snapshot_from_closes(closes, ["AAA", "NEW", "GONE"])
+    assert snapshot == {"AAA": {
+        "current_price": "139.00",
+        "pct_change": f"{(139 / 138 - 1) * 100:+.2f}%",
+        "trend_30d": f"{(139 / 109 - 1) * 100:+.2f}%",
+    }}
@@ -0,0 +1,38 @@
+import pytest
+from langchain_core.documents import Document
+
+from tools.dedupe import NearDuplicateIndex, collapse_results
+
+
+@pytest.mark.parametrize("a, b, duplicate", [
+    ("Apple unveils new AI chip for iPhone 17 - Reuters", "Apple unveils new AI chip for iPhone 17 | Bloomberg", True),
+    ("Apple unveils new AI chip for iPhone 17", "Apple unveils new AI chips for iPhone 17", True),
+    ("Microsoft to cut 9,000 jobs in latest layoffs round",
+     "Microsoft to cut about 9,000 jobs in latest round of layoffs", True),
+    ("Apple stock rises on iPhone demand", "Apple stock falls on iPhone demand worries", False),
+    ("Apple to report earnings on Thursday", "Amazon to report earnings on Thursday", False),
+    ("Apple unveils new AI chip for iPhone 17", "Apple faces EU fine over App Store rules", False),
+])
+def test_near_duplicate_clustering(a, b, duplicate):
+    index = NearDuplicateIndex()
+    assert index.assign("a", a) == "a"
+    assert (index.assign("b", b) == "a") == duplicate
+
+
+def test_index_round_trips_through_pairs():
+    index = NearDuplicateIndex()
+    index.assign("aapl_1", "Apple unveils new AI chip for iPhone 17")
+    restored = NearDuplicateIndex.from_pairs(index.to_pairs())
+    assert restored.assign("aapl_2", "Apple unveils new AI chip for iPhone 17 - CNBC") == "aapl_1"
+
+
+def test_collapse_keeps_best_of_each_story():
+    results = [
+        (Document(page_content="Apple unveils new AI chip - Reuters", metadata={"cluster_id": "c1"}), 0.1),
+        (Document(page_content="Apple unveils its new AI chip", metadata={"cluster_id": "c1"}), 0.2),
+        (Document(page_content="Apple unveils new AI chip | CNBC", metadata={}), 0.3),   # pre-clustering index
+        (Document(page_content="Apple faces EU fine over App Store", metadata={"cluster_id": "c2"}), 0.4),
+        (Document(page_content="Apple supplier expands India plant", metadata={"cluster_id": "c3"}), 0.5),
+    ]
+    kept = collapse_results(results, k=2)
+    assert [score for _, score in kept] == [0.1, 0.4]
@@ -0,0 +1,58 @@
+import time
+from typing import Any, List, Tuple, Union
+
+from langchain.agents import BaseMultiActionAgent
+from langchain.tools import Tool
+from langchain_core.agents import AgentAction, AgentFinish
+
+from executor import ParallelAgentExecutor
+
+TICKERS = ["AAPL", "MSFT", "GOOGL"]
+
+
+class ScriptedAgent(BaseMultiActionAgent):
+    """Requests one slow tool call per ticker in a single step, then finishes."""
+
+    @property
+    def input_keys(self):
+        return ["input"]
+
+    def plan(self, intermediate_steps: List[Tuple[AgentAction, str]], callbacks=None, **kwargs: Any
+             ) -> Union[List[AgentAction], AgentFinish]:
+        if intermediate_steps:
+            return AgentFinish({"output": [obs for _, obs in intermediate_steps]}, log="")
+        return [AgentAction(tool="slow_quote", tool_input=t, log="") for t in TICKERS]
+
+    async def aplan(self, intermediate_steps, callbacks=None, **kwargs):
+        return self.plan(intermediate_steps, callbacks, **kwargs)
+
+
+def slow_quote(ticker: str) -> str:
+    # Later tickers finish first so ordering bugs would show up
+    time.sleep(0.1 * (len(TICKERS) - TICKERS.index(ticker)))
+    return f"quote:{ticker}"
+
+
+def build_executor(max_parallel_tools: int) -> ParallelAgentExecutor:
+    tool = Tool.from_function(func=slow_quote, name="slow_quote", description="Slow quote lookup.")
+    return ParallelAgentExecutor.from_agent_and_tools(
+        agent=ScriptedAgent(), tools=[tool], max_parallel_tools=max_parallel_tools
+    )
+
+
+def test_parallel_tool_calls_keep_issue_order():
+    result = build_executor(max_parallel_tools=4).invoke({"input": "quotes"})
+    assert result["output"] == [f"quote:{t}" for t in TICKERS]
+
+
+def test_parallel_tool_calls_run_concurrently():
+    start = time.perf_counter()
+    build_executor(max_parallel_tools=4).invoke({"input": "quotes"})
+    parallel = time.perf_counter() - start
+
+    start = time.perf_counter()
+    build_executor(max_parallel_tools=1).invoke({"input": "quotes"})
+    sequential = time.perf_counter() - start
+
+    # Sequential ≈ 0.6s, parallel ≈ the slowest call (0.3s)
+    assert parallel < sequential * 0.75, f"parallel={parallel:.2f}s sequential={sequential:.2f}s"
@@ -0,0 +1,117 @@
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+import tools.headline_utils as headline_utils
+import tools.ingest_tool as ingest_tool
+import tools.retrieval_tool as retrieval_tool
+import tools.vector_store as vector_store
+from tools.metadata_store import iter_documents
+from tools.watermark import load_watermark
+
+
+def article(i):
+    return {"title": f"Apple headline {i}", "url": f"https://example.com/{i}",
+            "publishedAt": f"2025-07-{i:02d}T00:00:00Z", "description": ""}
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+@pytest.mark.no_cassette
+@pytest.mark.parametrize("total, max_results, expected_pages, complete", [
+    (250, 500, 3, True),    # short last page ends pagination
+    (200, 500, 2, True),    # totalResults reached on a full page
+    (250, 150, 2, False),   # max_results reached
+])
+def test_fetch_headlines_paginates(monkeypatch, total, max_results, expected_pages, complete):
+    pages = []
+
+    def fake_get(url, params):
+        pages.append(params["page"])
+        start = (params["page"] - 1) * params["pageSize"]
+        batch = [article(i % 28 + 1) for i in range(start, min(start + params["pageSize"], total))]
+        return FakeResponse({"totalResults": total, "articles": batch})
+
+    monkeypatch.setattr(headline_utils.requests, "get", fake_get)
+    result, reached = headline_utils.fetch_headlines_window("AAPL", max_results=max_results, since="2025-07-01")
+    assert pages == list(range(1, expected_pages + 1))
+    assert len(result) == min(total, max_results)
+    assert reached == complete
+
+
+@pytest.fixture
+def ingest_env(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "BASE_DIR", str(tmp_path))
+    fake_embeddings = lambda: DeterministicFakeEmbedding(size=16)
+    monkeypatch.setattr(vector_store, "OpenAIEmbeddings", fake_embeddings)
+    monkeypatch.setattr(retrieval_tool, "OpenAIEmbeddings", fake_embeddings)
+    monkeypatch.setattr(ingest_tool, "bump_headline_version", lambda *a: None)
+
+
+def test_ingest_is_incremental(ingest_env, monkeypatch):
+    calls = []
+    feed = [article(i) for i in (3, 2, 1)]
+
+    def fake_fetch(ticker, max_results, since=None, until=None):
+        calls.append(since)
+        return list(feed), True
+
+    monkeypatch.setattr(ingest_tool, "fetch_headlines_window", fake_fetch)
+
+    assert ingest_tool.ingest_headlines_for_ticker("AAPL") == 3
+    assert load_watermark("AAPL")["latest_published_at"] == "2025-07-03T00:00:00Z"
+
+    # NewsAPI's `from` is inclusive, so the newest article comes back again;
+    # a syndicated copy of headline 2 is indexed under that story's cluster
+    syndicated = {**article(4), "title": "Apple headline 2 - Reuters", "url": "https://wire.example.com/2"}
+    feed = [syndicated, article(3)]
+    assert ingest_tool.ingest_headlines_for_ticker("AAPL") == 1
+    assert calls == [None, "2025-07-03T00:00:00Z"]
+
+    store = vector_store.load_vector_store("AAPL")
+    assert store.index.ntotal == 4
+    clusters = {doc.page_content: doc.metadata["cluster_id"] for doc in iter_documents(store)}
+    assert clusters["Apple headline 2 - Reuters"] == clusters["Apple headline 2"]
+    assert len(set(clusters.values())) == 3
+    assert len(load_watermark("AAPL")["seen_ids"]) == 4
+
+
+def test_truncated_backlog_resumes_before_advancing(ingest_env, monkeypatch):
+    # Articles 1-9 exist; the mark is at 2 and each run can fetch only 3
+    feed = [article(i) for i in range(9, 0, -1)]
+    windows = []
+
+    def fake_fetch(ticker, max_results, since=None, until=None):
+        windows.append((since, until))
+        matching = [a for a in feed if (not since or a["publishedAt"] >= since)
+                    and (not until or a["publishedAt"] <= until)]
+        return matching[:max_results], len(matching) <= max_results
+
+    monkeypatch.setattr(ingest_tool, "fetch_headlines_window", fake_fetch)
+    feed, everything = feed[-2:], feed
+    ingest_tool.ingest_headlines_for_ticker("AAPL", max_results=3)
+    feed = everything
+
+    mark = "2025-07-02T00:00:00Z"
+    ingest_tool.ingest_headlines_for_ticker("AAPL", max_results=3)     # 9, 8, 7
+    watermark = load_watermark("AAPL")
+    assert watermark["latest_published_at"] == mark
+    assert watermark["resume_before"] == "2025-07-07T00:00:00Z"
+
+    ingest_tool.ingest_headlines_for_ticker("AAPL", max_results=3)     # 7 (seen), 6, 5
+    ingest_tool.ingest_headlines_for_ticker("AAPL", max_results=3)     # 5 (seen), 4, 3
+    ingest_tool.ingest_headlines_for_ticker("AAPL", max_results=3)     # 3 (seen), 2 (seen) → gap closed
+    watermark = load_watermark("AAPL")
+    assert windows[1:] == [(mark, None), (mark, "2025-07-07T00:00:00Z"),
+                           (mark, "2025-07-05T00:00:00Z"), (mark, "2025-07-03T00:00:00Z")]
+    assert watermark["latest_published_at"] == "2025-07-09T00:00:00Z"
+    assert watermark["resume_before"] is None
+    assert vector_store.load_vector_store("AAPL").index.ntotal == 9
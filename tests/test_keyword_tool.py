@@ -0,0 +1,93 @@
+import sqlite3
+import time
+
+import pytest
+
+import tools.keyword_tool as keyword_tool
+from tools.keyword_tool import build_lexicon, local_extract, normalize_query, parse_keyword_json, KeywordMemo
+
+HEADLINES = [
+    "Apple unveils new AI chip for Macs",
+    "Apple AI chip production ramps in Taiwan",
+    "Siri overhaul delayed until next year",
+    "Siri overhaul talks continue at Apple",
+]
+LEXICON = build_lexicon(HEADLINES)
+
+
+def test_lexicon_keeps_repeated_phrases():
+    assert {"ai chip", "siri overhaul"}.issubset(LEXICON)
+    assert "taiwan" not in LEXICON  # appears in a single headline only
+
+
+@pytest.mark.parametrize("query, primary, secondary", [
+    ("Apple AI chip development", ["Apple", "AI chip"], ["development"]),
+    ("Apple Siri overhaul strategy", ["Apple", "Siri overhaul"], ["strategy"]),
+])
+def test_local_extract_confident(query, primary, secondary):
+    result, confident = local_extract(query, LEXICON, company="Apple")
+    assert confident
+    assert result == {"primary_keywords": primary, "secondary_keywords": secondary}
+
+
+@pytest.mark.parametrize("query, company, confident", [
+    ("Apple carbon emission policy", "Apple", False),
+    ("Tesla Battery Supply", "Tesla", False),      # title case isn't a proper noun
+    ("APPLE AI CHIP DEVELOPMENT", "Apple", True),  # lexicon phrase still matches in caps
+    ("APPLE BATTERY", "Apple", False),
+    ("Apple Siri delays", "Apple", False),
+    ("Apple Siri", "Apple", True),                # "siri" is in the headline lexicon
+    ("Apple EV plans", "Apple", True),
+])
+def test_local_extract_confidence(query, company, confident):
+    assert local_extract(query, LEXICON, company=company)[1] == confident
+
+
+def test_parse_keyword_json():
+    reply = 'Output:\n{"primary_keywords": ["Apple", "AI chip"], "secondary_keywords": ["development"]}'
+    assert parse_keyword_json(reply) == {"primary_keywords": ["Apple", "AI chip"], "secondary_keywords": ["development"]}
+    assert parse_keyword_json("__import__('os').system('echo')") is None
+    assert parse_keyword_json('{"primary_keywords": "Apple"}') is None
+
+
+def test_memo_persists(tmp_path):
+    path = str(tmp_path / "keywords.sqlite")
+    result = {"primary_keywords": ["Apple"], "secondary_keywords": []}
+    KeywordMemo(path).put(normalize_query("  Apple  News! "), "AAPL", result, "local")
+    assert KeywordMemo(path).get(normalize_query("apple news"), "AAPL") == result
+
+
+def test_memo_expires_and_tracks_lexicon(tmp_path, monkeypatch):
+    memo = KeywordMemo(str(tmp_path / "keywords.sqlite"), ttl=60, max_items=2)
+    local = {"primary_keywords": ["Apple"], "secondary_keywords": []}
+    llm = {"primary_keywords": ["AI chip"], "secondary_keywords": []}
+    memo.put("apple ai", "AAPL", local, "local", lexicon_size=10)
+    memo.put("ai chip", "AAPL", llm, "llm", lexicon_size=10)
+
+    # A rebuilt lexicon invalidates local results, not the LLM's
+    assert memo.get("apple ai", "AAPL", lexicon_size=10) == local
+    assert memo.get("apple ai", "AAPL", lexicon_size=25) is None
+    assert memo.get("ai chip", "AAPL", lexicon_size=25) == llm
+
+    now = time.time()
+    monkeypatch.setattr(keyword_tool.time, "time", lambda: now + 61)
+    assert memo.get("ai chip", "AAPL") is None
+
+
+def test_memo_memory_tier_is_bounded(tmp_path):
+    memo = KeywordMemo(str(tmp_path / "keywords.sqlite"), max_items=2)
+    for i in range(5):
+        memo.put(f"query {i}", "AAPL", {"primary_keywords": [str(i)], "secondary_keywords": []}, "llm")
+    assert len(memo._mem) == 2
+    assert memo.get("query 0", "AAPL") == {"primary_keywords": ["0"], "secondary_keywords": []}  # still on disk
+
+
+def test_memo_migrates_old_table(tmp_path):
+    path = str(tmp_path / "keywords.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE keywords (query TEXT NOT NULL, ticker TEXT NOT NULL, result TEXT NOT NULL,"
+                 " source TEXT NOT NULL, created REAL NOT NULL, PRIMARY KEY (query, ticker))")
+    conn.execute("INSERT INTO keywords VALUES ('apple ai', 'AAPL', '{}', 'local', ?)", (time.time(),))
+    conn.commit()
+    conn.close()
+    assert KeywordMemo(path).get("apple ai", "AAPL", lexicon_size=10) is None
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+import tools.vector_store as vector_store
+from tools.metadata_store import SQLiteDocstore, iter_documents
+
+TITLES = [f"Apple headline {i}" for i in range(20)]
+METADATAS = [
+    {"id": f"aapl_{i}", "description": f"desc {i}", "url": f"https://example.com/{i}",
+     "published_at": "2025-07-21T00:00:00Z"}
+    for i in range(20)
+]
+
+
+@pytest.fixture
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "BASE_DIR", str(tmp_path))
+    monkeypatch.setattr(vector_store, "OpenAIEmbeddings", lambda: DeterministicFakeEmbedding(size=16))
+    return tmp_path
+
+
+def test_save_and_load_without_pickle(store_dir):
+    original = FAISS.from_texts(TITLES, DeterministicFakeEmbedding(size=16), metadatas=METADATAS)
+    version = vector_store.save_vector_store(original, "AAPL")
+
+    assert (store_dir / "AAPL" / "CURRENT").read_text() == version
+    files = set(os.listdir(store_dir / "AAPL" / "versions" / version))
+    assert files == {"index.faiss", "meta.sqlite"}
+
+    loaded = vector_store.load_vector_store("AAPL")
+    assert isinstance(loaded.docstore, SQLiteDocstore)
+    assert len(loaded.index_to_docstore_id) == len(TITLES)
+
+    expected = original.similarity_search_with_score("Apple headline 7", k=3)
+    actual = loaded.similarity_search_with_score("Apple headline 7", k=3)
+    assert [(d.page_content, d.metadata) for d, _ in actual] == [(d.page_content, d.metadata) for d, _ in expected]
+
+
+def test_merge_into_loaded_store_and_resave(store_dir):
+    embeddings = DeterministicFakeEmbedding(size=16)
+    vector_store.save_vector_store(FAISS.from_texts(TITLES, embeddings, metadatas=METADATAS), "AAPL")
+
+    loaded = vector_store.load_vector_store("AAPL")
+    loaded.merge_from(FAISS.from_texts(["Fresh headline"], embeddings, metadatas=[{"id": "aapl_new", "cluster": "7"}]))
+    vector_store.save_vector_store(loaded, "AAPL")
+
+    reloaded = vector_store.load_vector_store("AAPL")
+    docs = list(iter_documents(reloaded))
+    assert len(docs) == len(TITLES) + 1
+    assert docs[-1].page_content == "Fresh headline"
+    assert docs[-1].metadata["cluster"] == "7"
+
+
+def test_legacy_pickle_requires_opt_in(store_dir):
+    FAISS.from_texts(TITLES, DeterministicFakeEmbedding(size=16)).save_local(str(store_dir / "OLD"))
+    assert vector_store.load_vector_store("OLD") is None
@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+
+import tools.news_tool as news_tool
+
+
+@pytest.fixture
+def headlines(monkeypatch):
+    """Ten ranked Apple hits; 'reject' titles fail relevance, slow ones block until released."""
+    titles = ["Apple AI 0", "Apple AI 1 reject", "Apple AI 2", "Samsung AI 3", "Apple AI 4",
+              "Apple AI 5", "Apple AI 6", "Apple AI 7", "Apple AI 8", "Apple AI 9"]
+    results = [(Document(page_content=t, metadata={"url": f"https://example.com/{i}"}), 0.1 * i, None)
+               for i, t in enumerate(titles)]
+    monkeypatch.setattr(news_tool, "extract_keywords_from_query",
+                        lambda q, ticker=None: {"primary_keywords": ["Apple"], "secondary_keywords": ["AI"]})
+    monkeypatch.setattr(news_tool, "resolve_company_name", lambda t: "Apple")
+    monkeypatch.setattr(news_tool, "get_vector_store", lambda t: object())
+    monkeypatch.setattr(news_tool, "retrieve_with_vectors", lambda store, query, k: results)
+    monkeypatch.setattr(news_tool, "topic_embedding", lambda store, topic: None)
+    monkeypatch.setattr(news_tool, "RELEVANCE_LOOKAHEAD", 3)
+
+    state = {"judged": [], "slow": set(), "release": threading.Event()}
+
+    def judge(title, description, topic, similarity):
+        state["judged"].append(title)
+        if title in state["slow"]:
+            state["release"].wait(5)
+        return "reject" not in title
+
+    monkeypatch.setattr(news_tool, "judge_relevance_cascade", judge)
+    return state
+
+
+def test_yields_in_rank_order_and_stops_at_max_results(headlines):
+    # Later checks finish first; order still follows retrieval rank
+    headlines["slow"].add("Apple AI 0")
+    threading.Timer(0.1, headlines["release"].set).start()
+
+    titles = [h["title"] for h in news_tool.iter_headlines("AAPL", "Apple AI strategy", max_results=3)]
+    assert titles == ["Apple AI 0", "Apple AI 2", "Apple AI 4"]
+    # Keyword misses are never judged, and nothing past the lookahead window is
+    assert "Samsung AI 3" not in headlines["judged"]
+    assert not {"Apple AI 8", "Apple AI 9"} & set(headlines["judged"])
+
+
+def test_first_headline_does_not_wait_for_later_checks(headlines):
+    headlines["slow"].update({"Apple AI 2", "Apple AI 4"})
+    stream = news_tool.iter_headlines("AAPL", "Apple AI strategy", max_results=3)
+
+    started = time.perf_counter()
+    assert next(stream)["title"] == "Apple AI 0"
+    assert time.perf_counter() - started < 1
+    headlines["release"].set()
+    assert [h["title"] for h in stream] == ["Apple AI 2", "Apple AI 4"]
+
+
+def test_fetch_headlines_matches_stream(headlines):
+    streamed = list(news_tool.iter_headlines("AAPL", "Apple AI strategy", max_results=4))
+    assert news_tool.fetch_headlines("AAPL", "Apple AI strategy", max_results=4) == streamed
+    assert news_tool.fetch_headlines("AAPL", "news") == [
+        {"error": "Query too vague — please use a descriptive topic like 'Apple AI strategy'."}
+    ]
+
+
+def test_no_checks_past_max_results_when_everything_passes(headlines, monkeypatch):
+    judged = []
+    monkeypatch.setattr(news_tool, "judge_relevance_cascade",
+                        lambda title, description, topic, similarity: judged.append(title) or True)
+
+    titles = [h["title"] for h in news_tool.iter_headlines("AAPL", "Apple AI strategy", max_results=2)]
+    assert titles == ["Apple AI 0", "Apple AI 1 reject"]
+    assert sorted(judged) == titles
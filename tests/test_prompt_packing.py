@@ -0,0 +1,46 @@
+from prompts.packing import count_tokens, pack_headlines, pack_sections, NO_HEADLINES
+
+HEADLINES = [
+    {
+        "title": f"Apple headline number {i} about the AI chip roadmap",
+        "description": "A long description of the story that repeats itself. " * 8,
+        "url": f"https://news.example.com/articles/2025/07/21/apple-ai-chip-roadmap-{i}?utm_source=feed",
+        "published_at": "2025-07-21T14:03:00Z",
+        "score": 0.1 * i,
+    }
+    for i in range(10, 0, -1)
+]
+
+
+def test_pack_headlines_respects_budget_and_drops_urls():
+    packed = pack_headlines(HEADLINES, budget=120)
+    assert packed.tokens <= 120
+    assert "https://" not in packed.text
+    assert 0 < packed.kept < packed.total == len(HEADLINES)
+    assert packed.tokens_saved > 0
+
+
+def test_pack_headlines_keeps_best_scores_first():
+    packed = pack_headlines(HEADLINES, budget=60)
+    lines = packed.text.splitlines()
+    # Lowest distance (headline 1) ranks first
+    assert lines[0].startswith("- Apple headline number 1 ")
+    assert "(2025-07-21)" in lines[0]
+
+
+def test_pack_headlines_empty():
+    packed = pack_headlines([], budget=100)
+    assert packed.text == NO_HEADLINES
+    assert packed.kept == packed.total == 0
+
+
+def test_pack_sections_shares_budget():
+    long_summary = "Revenue grew while margins compressed. " * 60
+    sections = {"AAPL": long_summary, "MSFT": long_summary, "GOOGL": "Short summary."}
+    packed = pack_sections(sections, budget=300)
+    assert packed.tokens <= 300
+    assert packed.text.count("•") == 3
+    assert "• GOOGL: Short summary." in packed.text
+    assert packed.tokens_unpacked == count_tokens(
+        "\n".join(f"• {k}: {v}" for k, v in sections.items())
+    )
@@ -0,0 +1,107 @@
+import pytest
+
+import tools.rate_limiter as rate_limiter
+from tools.rate_limiter import BATCH, INTERACTIVE, Limit, LocalBuckets, priority
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setitem(rate_limiter.UPSTREAMS, "test", {
+        "requests": Limit(rate=2.0, capacity=4.0),
+        "tokens": Limit(rate=10.0, capacity=600.0),
+    })
+    monkeypatch.setattr(rate_limiter, "BATCH_RESERVE_FRACTION", 0.5)
+
+
+def take(buckets, tokens=0, level=INTERACTIVE):
+    return buckets.try_acquire("test", rate_limiter._bucket_requests("test", tokens, level))
+
+
+def test_bucket_refills_at_rate(limits):
+    clock = FakeClock()
+    buckets = LocalBuckets(clock)
+    assert [take(buckets) for _ in range(4)] == [0.0] * 4  # burst up to capacity
+    assert take(buckets) == pytest.approx(0.5)              # 1 request at 2/s
+    clock.now += 0.5
+    assert take(buckets) == 0.0
+
+
+def test_token_budget_limits_large_prompts(limits):
+    clock = FakeClock()
+    buckets = LocalBuckets(clock)
+    assert take(buckets, tokens=500) == 0.0
+    assert take(buckets, tokens=200) == pytest.approx(10.0)  # 100 short at 10 tokens/s
+
+
+@pytest.mark.parametrize("level, allowed", [(INTERACTIVE, 4), (BATCH, 2)])
+def test_batch_leaves_reserve_for_interactive(limits, level, allowed):
+    buckets = LocalBuckets(FakeClock())
+    granted = sum(take(buckets, level=level) == 0.0 for _ in range(6))
+    assert granted == allowed
+
+
+def test_penalize_pauses_upstream(limits):
+    clock = FakeClock()
+    buckets = LocalBuckets(clock)
+    buckets.penalize("test", 3.0)
+    assert take(buckets) == pytest.approx(3.0)
+    clock.now += 3.0
+    assert take(buckets) == 0.0
+
+
+def test_priority_context():
+    assert rate_limiter.current_priority() == INTERACTIVE
+    with priority(BATCH):
+        assert rate_limiter.current_priority() == BATCH
+    assert rate_limiter.current_priority() == INTERACTIVE
+
+
+def test_single_request_bucket_keeps_reserve_for_interactive(monkeypatch):
+    monkeypatch.setitem(rate_limiter.UPSTREAMS, "test", {"requests": rate_limiter._per_second("UNSET_RPS", "1")})
+    buckets = LocalBuckets(FakeClock())
+    assert take(buckets, level=BATCH) == 0.0
+    assert take(buckets, level=BATCH) > 0       # the rest is held back
+    assert take(buckets) == 0.0                 # for interactive callers
+
+
+def test_acquire_raises_after_max_wait(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limiter, "_try_acquire", lambda upstream, tokens, level: 30.0)
+    with pytest.raises(rate_limiter.RateLimitTimeout, match="newsapi"):
+        rate_limiter.acquire("newsapi", max_wait=5)
+
+
+@pytest.mark.no_cassette
+def test_interleaved_async_chats_charge_their_own_prompts(monkeypatch):
+    import asyncio
+
+    from langchain_core.callbacks import AsyncCallbackHandler
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    charged = []
+    monkeypatch.setattr(rate_limiter, "acquire", lambda upstream, tokens=0, **kwargs: charged.append(tokens))
+
+    class Stagger(AsyncCallbackHandler):
+        """Holds the long prompt back so the short one acquires first."""
+
+        async def on_chat_model_start(self, serialized, messages, **kwargs):
+            await asyncio.sleep(0.05 if len(messages[0][0].content) > 100 else 0.01)
+
+    limiter = rate_limiter.RateLimitCallback("openai", completion_tokens=0)
+    chat = FakeListChatModel(responses=["ok"], callbacks=[limiter, Stagger()], rate_limiter=limiter)
+    long_prompt, short_prompt = "Apple " * 200, "Apple"
+
+    async def both():
+        await asyncio.gather(chat.ainvoke(long_prompt), chat.ainvoke(short_prompt))
+
+    asyncio.run(both())
+    assert charged == [limiter._cost([short_prompt]), limiter._cost([long_prompt])]
+    assert limiter._pending.get() == ()
@@ -0,0 +1,81 @@
+from collections import Counter, deque
+
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+import tools.relevance as relevance
+from tools.relevance import calibrate, judge_with_cascade
+from tools.retrieval_tool import retrieve_with_vectors
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(relevance, "_stats", Counter())
+    monkeypatch.setattr(relevance, "_observations", deque(maxlen=100))
+    monkeypatch.setattr(relevance, "RELEVANCE_ACCEPT", 0.8)
+    monkeypatch.setattr(relevance, "RELEVANCE_REJECT", 0.6)
+
+
+@pytest.mark.parametrize("similarity, expected, source, llm_calls", [
+    (0.9, True, "accept", 0),
+    (0.5, False, "reject", 0),
+    (0.7, "llm", "llm", 1),      # ambiguous band goes to the judge
+    (None, "llm", "llm", 1),     # no vector available
+])
+def test_cascade_routes_by_similarity(similarity, expected, source, llm_calls):
+    calls = []
+    verdict, got_source = judge_with_cascade(similarity, judge=lambda: calls.append(1) or "llm", audit_rate=0)
+    assert (verdict, got_source, len(calls)) == (expected, source, llm_calls)
+
+
+def test_audits_measure_agreement_and_cached_verdicts_are_free():
+    judge_with_cascade(0.95, judge=lambda: True, audit_rate=1.0)                  # audited, agrees
+    judge_with_cascade(0.10, judge=lambda: True, audit_rate=1.0)                  # audited, disagrees
+    judge_with_cascade(0.90, judge=lambda: True, judge_is_cached=lambda: True, audit_rate=0)
+    judge_with_cascade(0.70, judge=lambda: False, audit_rate=0)
+
+    stats = relevance.relevance_stats()
+    assert stats["checked"] == 4
+    assert stats["audited"] == 3
+    assert stats["agreement"] == pytest.approx(2 / 3, abs=1e-3)
+    assert stats["llm_avoided"] == pytest.approx(1 - 3 / 4)
+
+
+@pytest.mark.parametrize("cached, audit_rate, expected", [
+    (True, 0, (False, "llm")),       # cached judge verdict overrides the local accept
+    (False, 1.0, (False, "llm")),    # so does a paid audit
+    (False, 0, (True, "accept")),
+])
+def test_judge_verdict_wins_when_known(cached, audit_rate, expected):
+    got = judge_with_cascade(0.95, judge=lambda: False, judge_is_cached=lambda: cached, audit_rate=audit_rate)
+    assert got == expected
+    # The local guess still counts towards agreement whenever the judge ruled
+    assert relevance.relevance_stats().get("audited", 0) == int(expected[1] == "llm")
+
+
+@pytest.mark.parametrize("negatives, positives, band", [
+    ((0.50, 0.70), (0.75, 0.95), False),   # separable: thresholds meet between the classes
+    ((0.50, 0.80), (0.65, 0.95), True),    # overlap: the overlap stays with the LLM
+])
+def test_calibrate_thresholds(negatives, positives, band):
+    rng = np.random.default_rng(0)
+    observations = [(float(s), False) for s in rng.uniform(*negatives, 200)]
+    observations += [(float(s), True) for s in rng.uniform(*positives, 200)]
+    suggested = calibrate(observations)
+    assert (suggested["reject"] < suggested["accept"]) == band
+    assert positives[0] - 0.05 <= suggested["reject"] and suggested["accept"] <= negatives[1] + 0.05
+    assert calibrate(observations[:5]) is None
+
+
+def test_retrieve_with_vectors_returns_stored_embeddings():
+    embeddings = DeterministicFakeEmbedding(size=16)
+    titles = ["Apple AI chip", "Apple App Store fine", "Apple India plant"]
+    store = FAISS.from_texts(titles, embeddings)
+    results = retrieve_with_vectors(store, "Apple AI chip", k=2)
+
+    assert len(results) == 2
+    doc, distance, vector = results[0]
+    assert doc.page_content == "Apple AI chip"
+    np.testing.assert_allclose(vector, embeddings.embed_query("Apple AI chip"), rtol=1e-5)
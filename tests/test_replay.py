@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.globals import get_llm_cache
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+import tools.rate_limiter as rate_limiter
+import tools.stock_tool as stock_tool
+from tools.replay import CassetteMiss, ReplayedError, ReplayEmbeddings, ReplayLLMCache, replayable, use_cassette
+
+calls = []
+
+
+@replayable("test.quote")
+def quote(ticker, period="1d"):
+    calls.append(ticker)
+    if ticker == "BAD":
+        raise ValueError(f"no data for {ticker}")
+    return {"ticker": ticker, "period": period, "n": len(calls)}
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+def test_record_then_replay_without_upstream(tmp_path):
+    path = str(tmp_path / "session.jsonl.gz")
+    with use_cassette(path, "record"):
+        first = quote("AAPL")
+        second = quote("AAPL", period="1d")   # same bound arguments → same key
+        with pytest.raises(ValueError):
+            quote("BAD")
+
+    calls.clear()
+    with use_cassette(path, "replay"):
+        assert quote("AAPL") == first
+        assert quote("AAPL") == second       # identical requests play back in order
+        assert quote("AAPL") == second       # then the last one repeats
+        with pytest.raises(ReplayedError, match="no data for BAD"):
+            quote("BAD")
+        with pytest.raises(CassetteMiss):
+            quote("MSFT")
+    assert calls == []
+
+
+def test_auto_records_misses_but_not_errors(tmp_path):
+    path = str(tmp_path / "auto.jsonl.gz")
+    with use_cassette(path, "auto"):
+        quote("AAPL")
+        with pytest.raises(ValueError):
+            quote("BAD")
+    with use_cassette(path, "auto"):
+        quote("AAPL")
+        with pytest.raises(ValueError):
+            quote("BAD")
+    assert calls == ["AAPL", "BAD", "BAD"]
+
+
+def test_yfinance_history_round_trips(tmp_path, monkeypatch):
+    index = pd.date_range("2025-03-01", periods=31, freq="D", tz="America/New_York", name="Date")
+    history = pd.DataFrame({"Close": [100.0 + i for i in range(31)], "Volume": list(range(31))}, index=index)
+
+    class FakeTicker:
+        def __init__(self, ticker):
+            pass
+
+        def history(self, period):
+            return history
+
+    path = str(tmp_path / "yf.jsonl.gz")
+    monkeypatch.setattr(stock_tool.yf, "Ticker", FakeTicker)
+    with use_cassette(path, "record"):
+        stock_tool._ticker_history("AAPL", "31d")
+
+    monkeypatch.setattr(stock_tool.yf, "Ticker", None)
+    with use_cassette(path, "replay"):
+        replayed = stock_tool._ticker_history("AAPL", "31d")
+    pd.testing.assert_frame_equal(replayed, history, check_freq=False)
+
+
+def test_embeddings_and_chat_replay(tmp_path):
+    embeddings = ReplayEmbeddings(DeterministicFakeEmbedding(size=8))
+    chat = FakeListChatModel(responses=["first answer", "second answer"])
+    path = str(tmp_path / "llm.jsonl.gz")
+    with use_cassette(path, "record"):
+        vectors = embeddings.embed_documents(["Apple headline 1", "Apple headline 2"])
+        answer = chat.invoke("Summarize AAPL").content
+
+    with use_cassette(path, "replay"):
+        replayed = embeddings.embed_documents(["Apple headline 1", "Apple headline 2"])
+        np.testing.assert_allclose(replayed, vectors, rtol=1e-6)   # stored as float32
+        assert chat.invoke("Summarize AAPL").content == answer == "first answer"
+        with pytest.raises(CassetteMiss):
+            embeddings.embed_query("never recorded")
+
+
+@pytest.mark.no_cassette
+def test_llm_cache_installed_only_while_a_cassette_is_active(tmp_path):
+    assert get_llm_cache() is None
+    with use_cassette(str(tmp_path / "llm.jsonl.gz"), "auto"):
+        assert isinstance(get_llm_cache(), ReplayLLMCache)
+    assert get_llm_cache() is None
+
+
+@pytest.mark.no_cassette
+def test_chats_served_from_cassette_take_no_rate_limit_tokens(tmp_path, monkeypatch):
+    acquired = []
+    monkeypatch.setattr(rate_limiter, "acquire", lambda upstream, tokens=0, **kwargs: acquired.append(tokens))
+    limiter = rate_limiter.RateLimitCallback("openai", completion_tokens=100)
+    chat = FakeListChatModel(responses=["live answer"], callbacks=[limiter], rate_limiter=limiter)
+    path = str(tmp_path / "llm.jsonl.gz")
+
+    with use_cassette(path, "auto"):
+        chat.invoke("Summarize AAPL")
+    assert len(acquired) == 1 and acquired[0] > 100   # prompt tokens + completion estimate
+
+    with use_cassette(path, "auto"):
+        assert chat.invoke("Summarize AAPL").content == "live answer"
+        chat.invoke("Summarize MSFT")                   # not recorded: goes upstream
+    assert len(acquired) == 2
+    assert limiter._pending.get() == ()
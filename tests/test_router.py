@@ -0,0 +1,40 @@
+import pytest
+from router import classify, parse_ticker_list
+
+@pytest.mark.parametrize("query, intent, tickers, topic", [
+    ("summarize AAPL", "summary", ["AAPL"], ""),
+    ("Summarize ticker AAPL", "summary", ["AAPL"], ""),
+    ("Summarize recent performance for ticker AAPL.", "summary", ["AAPL"], ""),
+    ("summarize TSLA on battery supply", "summary", ["TSLA"], "battery supply"),
+    ("compare MSFT and AAPL", "compare", ["MSFT", "AAPL"], ""),
+    ("Compare Apple vs Google in terms of AI strategy", "compare", ["AAPL", "GOOGL"], "AI strategy"),
+    ("price of TSLA", "price", ["TSLA"], ""),
+    ("What is the current price of MSFT?", "price", ["MSFT"], ""),
+    ("NVDA stock price", "price", ["NVDA"], ""),
+    ("news about Apple AI", "news", ["AAPL"], "Apple AI"),
+    ("Fetch news about Apple's AI strategy", "news", ["AAPL"], "Apple's AI strategy"),
+])
+def test_classify_simple_intents(query, intent, tickers, topic):
+    route = classify(query)
+    assert route is not None, f"Expected a fast-path route for: {query}"
+    assert route.intent == intent
+    assert route.tickers == tickers
+    assert route.topic == topic
+
+
+@pytest.mark.parametrize("query", [
+    "",
+    "What are the key drivers behind Tesla's recent performance?",
+    "Summarize Apple's latest AI chip development",
+    "compare AAPL",
+    "news about the economy",
+    "price of the AI sector",
+    "Should I buy AAPL before earnings?",
+])
+def test_classify_falls_through(query):
+    assert classify(query) is None, f"Query should go to the full agent: {query}"
+
+
+def test_parse_ticker_list_rejects_unknown_words():
+    assert parse_ticker_list("AAPL, MSFT and Google") == ["AAPL", "MSFT", "GOOGL"]
+    assert parse_ticker_list("AAPL and friends") is None
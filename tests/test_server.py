@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(server, "get_memory", lambda session_id: session_id)
+    monkeypatch.setattr(server, "get_llm", lambda: None)
+    monkeypatch.setattr(server, "build_agent", lambda memory, llm: f"agent:{memory}")
+    return server.AgentPool(max_sessions=2)
+
+
+def test_least_recently_used_idle_session_is_evicted(pool):
+    pool.get("a")
+    pool.get("b")
+    pool.get("a")
+    pool.get("c")
+    assert list(pool._agents) == ["a", "c"]
+
+
+def test_busy_sessions_are_not_evicted(pool):
+    async def scenario():
+        with pool.checkout("a") as (agent, lock):
+            async with lock:
+                with pool.checkout("b"):          # queued, not yet holding its lock
+                    pool.get("c")
+                    assert list(pool._agents) == ["a", "b", "c"]
+                    # A new request for a busy session reuses its agent and lock
+                    assert pool.get("a") == (agent, lock)
+        # Released sessions are trimmed back to the limit
+        assert len(pool._agents) == 2 and "a" in pool._agents
+
+    asyncio.run(scenario())
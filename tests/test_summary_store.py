@@ -0,0 +1,43 @@
+import pytest
+
+import tools.summary_store as summary_store
+
+
+@pytest.fixture
+def local_store(monkeypatch):
+    monkeypatch.setattr(summary_store, "get_redis", lambda: None)
+    monkeypatch.setattr(summary_store, "_local_summaries", {})
+    monkeypatch.setattr(summary_store, "_local_versions", {})
+    monkeypatch.setattr(summary_store, "MAX_SUMMARY_AGE", 900)
+    monkeypatch.setattr(summary_store, "PRICE_THRESHOLD_PCT", 1.0)
+
+
+@pytest.mark.parametrize("current_price, served", [
+    (None, True),
+    (100.5, True),
+    (101.0, False),
+    (98.0, False),
+])
+def test_price_move_invalidates_summary(local_store, current_price, served):
+    summary_store.save_summary("AAPL", "Apple summary", 100.0, 0)
+    expected = "Apple summary" if served else None
+    assert summary_store.get_precomputed_summary("AAPL", current_price=current_price) == expected
+
+
+def test_summary_expires_unless_refresher_confirms_it(local_store, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(summary_store.time, "time", lambda: now[0])
+    record = summary_store.save_summary("AAPL", "Apple summary", 100.0, 0)
+
+    now[0] += 600
+    summary_store.touch_summary(record)
+    now[0] += 600
+    assert summary_store.get_precomputed_summary("AAPL") == "Apple summary"
+    now[0] += 301
+    assert summary_store.get_precomputed_summary("AAPL") is None
+
+
+def test_new_headlines_invalidate_summary(local_store):
+    summary_store.save_summary("AAPL", "Apple summary", 100.0, summary_store.get_headline_version("AAPL"))
+    summary_store.bump_headline_version("AAPL", 3)
+    assert summary_store.get_precomputed_summary("AAPL") is None
@@ -0,0 +1,44 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+import tools.summary_tool as summary_tool
+
+
+def test_peer_comparison_batches_prices_and_fans_out_lookups(monkeypatch):
+    tickers = [f"T{i}" for i in range(12)]
+    rng = np.random.default_rng(0)
+    closes = pd.DataFrame(
+        100 * np.cumprod(1 + rng.normal(0, 0.01, (60, len(tickers) + 1)), axis=0),
+        index=pd.bdate_range("2025-01-01", periods=60), columns=tickers + ["SPY"],
+    )
+    downloads, threads, prompts = [], set(), []
+
+    def info(ticker):
+        threads.add(threading.current_thread().name)
+        if ticker == "NODATA":
+            return {"ticker": ticker, "error": "no data"}
+        return {"ticker": ticker, "pe_ratio": "20.0×", "market_cap": "$1.0B"}
+
+    def headlines(ticker, query, k):
+        threads.add(threading.current_thread().name)
+        return [{"title": f"{ticker} headline"}]
+
+    class Response:
+        class choice:
+            class message:
+                content = "comparison"
+        choices = [choice]
+
+    monkeypatch.setattr(summary_tool, "load_closes", lambda t: downloads.append(list(t)) or closes)
+    monkeypatch.setattr(summary_tool, "fetch_stock_info", info)
+    monkeypatch.setattr(summary_tool, "get_relevant_headline_items", headlines)
+    monkeypatch.setattr(summary_tool, "_create_completion",
+                        lambda **kwargs: prompts.append(kwargs["messages"][0]["content"]) or Response)
+
+    assert summary_tool.summarize_stock_multiple(tickers + ["NODATA"]) == "comparison"
+    assert downloads == [tickers + ["NODATA"]]
+    assert all(name.startswith("comparison") for name in threads)
+    assert f"T3 | ${closes['T3'].iloc[-1]:.2f}" in prompts[0]
+    assert "NODATA | n/a | n/a | n/a | n/a | n/a" in prompts[0]
@@ -0,0 +1,81 @@
+import os
+import threading
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+import tools.vector_store as vector_store
+
+
+def make_store(*titles):
+    return FAISS.from_texts(list(titles), DeterministicFakeEmbedding(size=16))
+
+
+def setup(tmp_path, monkeypatch, keep=3, grace=300):
+    monkeypatch.setattr(vector_store, "BASE_DIR", str(tmp_path))
+    monkeypatch.setattr(vector_store, "OpenAIEmbeddings", lambda: DeterministicFakeEmbedding(size=16))
+    monkeypatch.setattr(vector_store, "KEEP_VERSIONS", keep)
+    monkeypatch.setattr(vector_store, "GC_GRACE_SECONDS", grace)
+    monkeypatch.setattr(vector_store, "_store_cache", {})
+
+
+def test_reader_stays_pinned_across_swap(tmp_path, monkeypatch):
+    setup(tmp_path, monkeypatch)
+    first = vector_store.save_vector_store(make_store("Apple headline 1"), "AAPL")
+    pinned = vector_store.get_vector_store("AAPL")
+
+    second = vector_store.save_vector_store(make_store("Apple headline 1", "Apple headline 2"), "AAPL")
+    assert second > first
+    assert pinned.index.ntotal == 1
+    assert pinned.similarity_search("Apple headline 1", k=1)[0].page_content == "Apple headline 1"
+    assert vector_store.get_vector_store("AAPL").index.ntotal == 2
+    assert vector_store.load_vector_store("AAPL", version=first).index.ntotal == 1
+
+
+def test_writer_lock_serializes_read_modify_write(tmp_path, monkeypatch):
+    setup(tmp_path, monkeypatch)
+    vector_store.save_vector_store(make_store("seed"), "AAPL")
+
+    def append(i):
+        with vector_store.namespace_writer("AAPL"):
+            store = vector_store.load_vector_store("AAPL")
+            store.merge_from(make_store(f"headline {i}"))
+            vector_store.save_vector_store(store, "AAPL")
+
+    threads = [threading.Thread(target=append, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert vector_store.load_vector_store("AAPL").index.ntotal == 5
+
+
+def test_old_versions_are_collected(tmp_path, monkeypatch):
+    setup(tmp_path, monkeypatch, keep=2, grace=0)
+    versions = [vector_store.save_vector_store(make_store(f"headline {i}"), "AAPL") for i in range(4)]
+    assert sorted(os.listdir(tmp_path / "AAPL" / "versions")) == versions[-2:]
+
+    monkeypatch.setattr(vector_store, "GC_GRACE_SECONDS", 300)
+    vector_store.save_vector_store(make_store("headline 4"), "AAPL")
+    # The version just superseded is still inside its grace period
+    assert len(os.listdir(tmp_path / "AAPL" / "versions")) == 3
+
+
+def test_shared_store_is_memory_mapped_with_fallback(tmp_path, monkeypatch):
+    setup(tmp_path, monkeypatch)
+    monkeypatch.setattr(vector_store, "INDEX_MMAP", True)
+    vector_store.save_vector_store(make_store("Apple headline 1", "Apple headline 2"), "AAPL")
+
+    flags = []
+    read_index = vector_store.faiss.read_index
+
+    def unmappable(path, *args):
+        flags.append(args)
+        if args:
+            raise RuntimeError("mmap not supported for this index type")
+        return read_index(path)
+
+    monkeypatch.setattr(vector_store.faiss, "read_index", unmappable)
+    store = vector_store.get_vector_store("AAPL")
+    assert flags == [(vector_store._MMAP_FLAGS,), ()]
+    assert store.similarity_search("Apple headline 2", k=1)[0].page_content == "Apple headline 2"
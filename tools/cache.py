@@ -0,0 +1,281 @@
+"""
+Two-tier cache for upstream lookups shared by every replica.
+
+Reads go to a small in-process LRU first, then to Redis. Values are stored as
+orjson envelopes {"v": value, "f": fresh_until, "s": stale_until}. Each
+namespace has its own TTLs (see POLICIES). After an entry goes stale it is
+kept for a grace period:
+  - one caller per key (a local single-flight plus a Redis NX lock) recomputes it,
+  - everyone else keeps getting the stale value instead of calling the upstream.
+On a cold miss, callers that lose the lock wait briefly for the winner's value.
+A hot key therefore costs one upstream call per TTL across the cluster.
+
+Envelopes stay orjson rather than msgpack. Cached values are small dicts and
+strings (a quote is about 1 KB), where orjson encodes and decodes in
+microseconds, and msgpack would only save a few hundred bytes per key. orjson
+is also already a dependency, serializes numpy values natively, and keeps
+entries readable with redis-cli.
+
+    @cached("quote", key=lambda ticker: ticker.strip().upper())
+    def fetch_stock_data(ticker): ...
+"""
+import functools
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+import orjson
+import redis
+from dotenv import load_dotenv
+
+from tools.redis_client import get_redis
+
+load_dotenv()
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1") == "1"
+LOCAL_MAX_ITEMS = int(os.getenv("CACHE_LOCAL_MAX_ITEMS", "1024"))
+LOCK_TTL = int(os.getenv("CACHE_LOCK_SECONDS", "30"))      # upper bound on one recompute
+LOCK_WAIT = float(os.getenv("CACHE_LOCK_WAIT_SECONDS", "5"))  # cold-miss wait for another caller
+
+KEY = "cache:{namespace}:{key}"
+LOCK_KEY = "cache:lock:{namespace}:{key}"
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    ttl: float        # seconds an entry is fresh
+    stale: float      # extra seconds a stale entry may be served while one caller refreshes it
+    local_ttl: float  # cap on freshness in the in-process tier
+
+
+POLICIES: Dict[str, CachePolicy] = {
+    # Quotes move; keep them short and let each replica's LRU absorb bursts
+    "quote": CachePolicy(
+        ttl=float(os.getenv("CACHE_TTL_QUOTE", "60")), stale=60, local_ttl=5,
+    ),
+    # Ticker → company name practically never changes
+    "resolve": CachePolicy(
+        ttl=float(os.getenv("CACHE_TTL_RESOLVE", str(7 * 24 * 3600))), stale=24 * 3600, local_ttl=3600,
+    ),
+    # Name, market cap and P/E for peer comparisons; prices come from the batched download
+    "info": CachePolicy(
+        ttl=float(os.getenv("CACHE_TTL_INFO", "900")), stale=300, local_ttl=60,
+    ),
+}
+DEFAULT_POLICY = CachePolicy(ttl=300, stale=60, local_ttl=30)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+
+class TwoTierCache:
+    def __init__(self, max_local_items: int = LOCAL_MAX_ITEMS,
+                 redis_getter: Callable[[], Optional[redis.Redis]] = get_redis,
+                 clock: Callable[[], float] = time.time):
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (_Entry, local_fresh_until)
+        self._max_local = max_local_items
+        self._redis = redis_getter
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Event] = {}
+        self._stats: Dict[str, Counter] = {}
+
+    # === Tiers ===
+
+    def _local_get(self, key: str) -> Optional[tuple]:
+        with self._lock:
+            item = self._local.get(key)
+            if item is not None:
+                self._local.move_to_end(key)
+            return item
+
+    def _local_put(self, key: str, entry: _Entry, policy: CachePolicy) -> None:
+        local_fresh = min(entry.fresh_until, self._clock() + policy.local_ttl)
+        with self._lock:
+            self._local[key] = (entry, local_fresh)
+            self._local.move_to_end(key)
+            while len(self._local) > self._max_local:
+                self._local.popitem(last=False)
+
+    def _redis_get(self, key: str) -> Optional[_Entry]:
+        client = self._redis()
+        if client is None:
+            return None
+        try:
+            raw = client.get(key)
+        except redis.RedisError as e:
+            print(f"[Cache] Redis read failed for {key}: {e}")
+            return None
+        if raw is None:
+            return None
+        try:
+            data = orjson.loads(raw)
+            return _Entry(data["v"], data["f"], data["s"])
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            return None
+
+    def _redis_put(self, key: str, entry: _Entry) -> None:
+        client = self._redis()
+        if client is None:
+            return
+        payload = orjson.dumps(
+            {"v": entry.value, "f": entry.fresh_until, "s": entry.stale_until},
+            option=orjson.OPT_SERIALIZE_NUMPY,
+        )
+        try:
+            client.set(key, payload, ex=max(1, int(entry.stale_until - self._clock())))
+        except (redis.RedisError, TypeError) as e:
+            print(f"[Cache] Redis write failed for {key}: {e}")
+
+    # === Single flight ===
+
+    def _try_lead(self, namespace: str, key: str) -> bool:
+        """Claim the right to recompute a key, locally and across replicas."""
+        full = KEY.format(namespace=namespace, key=key)
+        with self._lock:
+            if full in self._inflight:
+                return False
+            self._inflight[full] = threading.Event()
+
+        client = self._redis()
+        if client is not None:
+            try:
+                claimed = client.set(LOCK_KEY.format(namespace=namespace, key=key), "1", nx=True, ex=LOCK_TTL)
+            except redis.RedisError:
+                claimed = True
+            if not claimed:
+                self._finish(namespace, key)
+                return False
+        return True
+
+    def _finish(self, namespace: str, key: str, release_redis: bool = False) -> None:
+        full = KEY.format(namespace=namespace, key=key)
+        with self._lock:
+            event = self._inflight.pop(full, None)
+        if event is not None:
+            event.set()
+        if release_redis:
+            client = self._redis()
+            if client is not None:
+                try:
+                    client.delete(LOCK_KEY.format(namespace=namespace, key=key))
+                except redis.RedisError:
+                    pass
+
+    def _wait_for_leader(self, namespace: str, key: str) -> Optional[_Entry]:
+        full = KEY.format(namespace=namespace, key=key)
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            with self._lock:
+                event = self._inflight.get(full)
+            if event is not None:
+                event.wait(min(0.05, max(0.0, deadline - time.monotonic())))
+            else:
+                time.sleep(0.05)
+            item = self._local_get(full)
+            entry = item[0] if item else self._redis_get(full)
+            if entry is not None and self._clock() < entry.fresh_until:
+                return entry
+        return None
+
+    def _count(self, namespace: str, field: str) -> None:
+        with self._lock:
+            self._stats.setdefault(namespace, Counter())[field] += 1
+
+    # === Public API ===
+
+    def get_or_compute(self, namespace: str, key: str, compute: Callable[[], Any],
+                       cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        policy = POLICIES.get(namespace, DEFAULT_POLICY)
+        full = KEY.format(namespace=namespace, key=key)
+        now = self._clock()
+
+        item = self._local_get(full)
+        if item is not None and now < item[1]:
+            self._count(namespace, "local_hits")
+            return item[0].value
+
+        entry = self._redis_get(full)
+        if entry is not None and now < entry.fresh_until:
+            self._count(namespace, "redis_hits")
+            self._local_put(full, entry, policy)
+            return entry.value
+
+        candidates = [e for e in (entry, item[0] if item else None) if e is not None]
+        stale = max(candidates, key=lambda e: e.fresh_until) if candidates else None
+        if stale is not None and now >= stale.stale_until:
+            stale = None
+
+        if not self._try_lead(namespace, key):
+            if stale is not None:
+                self._count(namespace, "stale_hits")
+                return stale.value
+            waited = self._wait_for_leader(namespace, key)
+            if waited is not None:
+                self._count(namespace, "redis_hits")
+                self._local_put(full, waited, policy)
+                return waited.value
+            self._count(namespace, "lock_timeouts")
+            # Leader is slow or gone; compute without caching contention
+            return compute()
+
+        self._count(namespace, "misses")
+        try:
+            value = compute()
+            if cacheable is None or cacheable(value):
+                now = self._clock()
+                entry = _Entry(value, now + policy.ttl, now + policy.ttl + policy.stale)
+                self._redis_put(full, entry)
+                self._local_put(full, entry, policy)
+            return value
+        finally:
+            self._finish(namespace, key, release_redis=True)
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-namespace counters and hit rate for this process."""
+        with self._lock:
+            snapshot = {namespace: Counter(counts) for namespace, counts in self._stats.items()}
+        report = {}
+        for namespace, counts in snapshot.items():
+            hits = counts["local_hits"] + counts["redis_hits"] + counts["stale_hits"]
+            total = hits + counts["misses"] + counts["lock_timeouts"]
+            report[namespace] = {**counts, "hit_rate": round(hits / total, 3) if total else 0.0}
+        return report
+
+
+_cache = TwoTierCache()
+
+
+def get_cache() -> TwoTierCache:
+    return _cache
+
+
+def cached(namespace: str, key: Callable[..., str],
+           cacheable: Optional[Callable[[Any], bool]] = None):
+    """
+    Decorator routing a function through the shared cache.
+    `key` maps the call's arguments to a cache key; `cacheable` can veto
+    storing a result (e.g. error dicts).
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not CACHE_ENABLED:
+                return fn(*args, **kwargs)
+            return _cache.get_or_compute(
+                namespace, key(*args, **kwargs), lambda: fn(*args, **kwargs), cacheable
+            )
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
+
+
+def cache_stats() -> Dict[str, dict]:
+    return _cache.stats()
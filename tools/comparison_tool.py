@@ -0,0 +1,232 @@
+"""
+Numeric comparison engine for N tickers.
+
+One batched yfinance download builds an aligned daily-return matrix
+(dates × tickers, benchmark included). Every metric then comes out of the
+same NumPy pass:
+  - total return and return relative to the benchmark
+  - annualized volatility and its ranking
+  - beta against the benchmark
+  - the pairwise correlation matrix
+The same download also gives each ticker's latest price and its day and
+30-day change (snapshot_from_closes), so a peer group needs no per-ticker
+quote calls. The tables are compact enough to put a 50-ticker peer group in a
+single prompt.
+"""
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from tools.rate_limiter import acquire
+from tools.replay import replayable, encode_frame, decode_frame
+
+BENCHMARK = os.getenv("COMPARISON_BENCHMARK", "SPY")
+COMPARISON_PERIOD = os.getenv("COMPARISON_PERIOD", "6mo")
+MIN_OBSERVATIONS = 20          # tickers with fewer aligned days are dropped
+TRADING_DAYS = 252
+FULL_MATRIX_MAX_TICKERS = 8    # larger groups get top/bottom correlated pairs instead
+TOP_PAIRS = 5
+
+
+@dataclass
+class ComparisonResult:
+    tickers: List[str]                 # compared tickers, benchmark excluded
+    benchmark: Optional[str]
+    start: str
+    end: str
+    observations: int                  # aligned daily returns
+    total_return: np.ndarray           # per ticker, fraction
+    relative_return: np.ndarray        # total return minus the benchmark's
+    volatility: np.ndarray             # annualized, fraction
+    volatility_rank: np.ndarray        # 1 = most volatile
+    beta: np.ndarray
+    correlation: np.ndarray            # N × N
+    dropped: List[str] = field(default_factory=list)
+
+
+@replayable("yfinance.download", encode=encode_frame, decode=decode_frame)
+def download_closes(tickers: List[str], period: str = COMPARISON_PERIOD) -> pd.DataFrame:
+    """Adjusted daily closes for all tickers in one yfinance request (columns = tickers)."""
+    acquire("yfinance")
+    data = yf.download(
+        tickers, period=period, interval="1d", auto_adjust=True,
+        group_by="column", progress=False, threads=True,
+    )
+    if data is None or data.empty:
+        return pd.DataFrame()
+    closes = data["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(name=tickers[0])
+    return closes
+
+
+def align_closes(closes: pd.DataFrame, min_observations: int = MIN_OBSERVATIONS):
+    """
+    Drop tickers without enough history, then keep only dates every remaining
+    ticker traded. Returns (aligned closes, dropped tickers).
+    """
+    counts = closes.notna().sum()
+    keep = [c for c in closes.columns if counts[c] > min_observations]
+    dropped = [str(c) for c in closes.columns if c not in keep]
+    return closes[keep].dropna(how="any"), dropped
+
+
+def compute_metrics(closes: pd.DataFrame, benchmark: Optional[str] = BENCHMARK,
+                    dropped: Optional[List[str]] = None) -> ComparisonResult:
+    """
+    All metrics from an aligned close matrix (dates × tickers).
+    The benchmark column, if present, is used for beta and relative return and
+    is left out of the result's tickers.
+    """
+    prices = closes.to_numpy(dtype=float)
+    names = [str(c) for c in closes.columns]
+    returns = prices[1:] / prices[:-1] - 1.0                    # T × N
+    observations = returns.shape[0]
+
+    total = prices[-1] / prices[0] - 1.0
+    centered = returns - returns.mean(axis=0)
+    cov = centered.T @ centered / max(observations - 1, 1)      # N × N
+    std = np.sqrt(np.diag(cov))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = cov / np.outer(std, std)
+    volatility = std * np.sqrt(TRADING_DAYS)
+
+    if benchmark in names:
+        b = names.index(benchmark)
+        beta = cov[:, b] / cov[b, b] if cov[b, b] > 0 else np.full(len(names), np.nan)
+        relative = total - total[b]
+        idx = [i for i in range(len(names)) if i != b]
+    else:
+        benchmark = None
+        beta = np.full(len(names), np.nan)
+        relative = np.full(len(names), np.nan)
+        idx = list(range(len(names)))
+
+    vol = volatility[idx]
+    rank = np.empty(len(idx), dtype=int)
+    rank[np.argsort(-vol)] = np.arange(1, len(idx) + 1)
+
+    return ComparisonResult(
+        tickers=[names[i] for i in idx],
+        benchmark=benchmark,
+        start=str(closes.index[0])[:10],
+        end=str(closes.index[-1])[:10],
+        observations=observations,
+        total_return=total[idx],
+        relative_return=relative[idx],
+        volatility=vol,
+        volatility_rank=rank,
+        beta=beta[idx],
+        correlation=corr[np.ix_(idx, idx)],
+        dropped=list(dropped or []),
+    )
+
+
+def snapshot_from_closes(closes: pd.DataFrame, tickers: List[str]) -> Dict[str, dict]:
+    """
+    Latest price, day change and 30-day change per ticker, formatted like
+    fetch_stock_data. Uses each ticker's own trading days (before alignment);
+    tickers with fewer than two closes are left out.
+    """
+    snapshot = {}
+    for ticker in tickers:
+        if ticker not in closes.columns:
+            continue
+        series = closes[ticker].dropna()
+        if len(series) < 2:
+            continue
+        last, previous = float(series.iloc[-1]), float(series.iloc[-2])
+        month_ago = float(series.iloc[max(0, len(series) - 31)])
+        snapshot[ticker] = {
+            "current_price": f"{last:.2f}",
+            "pct_change": f"{(last / previous - 1) * 100:+.2f}%",
+            "trend_30d": f"{(last / month_ago - 1) * 100:+.2f}%",
+        }
+    return snapshot
+
+
+def load_closes(tickers: List[str], benchmark: Optional[str] = BENCHMARK,
+                period: str = COMPARISON_PERIOD) -> Optional[pd.DataFrame]:
+    """Closes for the tickers plus the benchmark in one download. None when nothing comes back."""
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    symbols = tickers + ([benchmark] if benchmark and benchmark not in tickers else [])
+    try:
+        closes = download_closes(symbols, period=period)
+    except Exception as e:
+        print(f"[Comparison] Price download failed: {e}")
+        return None
+    if closes.empty:
+        print(f"[Comparison] No price history for {', '.join(symbols)}")
+        return None
+    return closes
+
+
+def compare_closes(closes: pd.DataFrame, benchmark: Optional[str] = BENCHMARK) -> Optional[ComparisonResult]:
+    """Align and compare downloaded closes. None without enough overlapping history."""
+    aligned, dropped = align_closes(closes)
+    if len(aligned) <= MIN_OBSERVATIONS or not [c for c in aligned.columns if c != benchmark]:
+        print(f"[Comparison] Not enough overlapping history for {', '.join(map(str, closes.columns))}")
+        return None
+    if dropped:
+        print(f"[Comparison] Dropped for short history: {', '.join(dropped)}")
+    return compute_metrics(aligned, benchmark=benchmark, dropped=dropped)
+
+
+def compare_tickers(tickers: List[str], benchmark: Optional[str] = BENCHMARK,
+                    period: str = COMPARISON_PERIOD) -> Optional[ComparisonResult]:
+    """Download, align and compare. None when no usable price history comes back."""
+    closes = load_closes(tickers, benchmark=benchmark, period=period)
+    return compare_closes(closes, benchmark=benchmark) if closes is not None else None
+
+
+# === Prompt tables ===
+
+def _pct(x: float) -> str:
+    return "n/a" if np.isnan(x) else f"{x * 100:+.1f}%"
+
+
+def metrics_table(result: ComparisonResult) -> str:
+    """One row per ticker, best total return first."""
+    bench = result.benchmark or "benchmark"
+    n = len(result.tickers)
+    # Mean correlation with the rest of the group (diagonal excluded)
+    avg_corr = (np.nansum(result.correlation, axis=1) - 1.0) / max(n - 1, 1)
+    lines = [
+        f"ticker | return | vs {bench} | ann. vol | vol rank | beta | avg corr",
+        "---|---|---|---|---|---|---",
+    ]
+    for i in np.argsort(-result.total_return):
+        beta = "n/a" if np.isnan(result.beta[i]) else f"{result.beta[i]:.2f}"
+        lines.append(
+            f"{result.tickers[i]} | {_pct(result.total_return[i])} | {_pct(result.relative_return[i])} | "
+            f"{result.volatility[i] * 100:.1f}% | {result.volatility_rank[i]}/{n} | {beta} | "
+            f"{avg_corr[i]:.2f}"
+        )
+    return "\n".join(lines)
+
+
+def correlation_table(result: ComparisonResult, full_max: int = FULL_MATRIX_MAX_TICKERS,
+                      top: int = TOP_PAIRS) -> str:
+    """Full matrix for small groups; most and least correlated pairs otherwise."""
+    names, corr = result.tickers, result.correlation
+    n = len(names)
+    if n < 2:
+        return "(single ticker — no pairs)"
+    if n <= full_max:
+        lines = [" | ".join([""] + names), "|".join(["---"] * (n + 1))]
+        for i, name in enumerate(names):
+            lines.append(" | ".join([name] + [f"{corr[i, j]:.2f}" for j in range(n)]))
+        return "\n".join(lines)
+
+    rows, cols = np.triu_indices(n, k=1)
+    values = corr[rows, cols]
+    order = np.argsort(-values)
+    fmt = lambda k: f"{names[rows[k]]}/{names[cols[k]]} {values[k]:.2f}"
+    return (
+        "most correlated: " + ", ".join(fmt(k) for k in order[:top]) + "\n"
+        "least correlated: " + ", ".join(fmt(k) for k in order[::-1][:top])
+    )
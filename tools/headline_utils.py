@@ -1,25 +1,78 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import requests
 import os
 from dotenv import load_dotenv
 
+from tools.rate_limiter import acquire, penalize, is_rate_limit_error, retry_after_seconds
+from tools.replay import replayable
+
 load_dotenv()
 
 API_KEY = os.getenv("NEWS_API_KEY")
 BASE_URL = os.getenv("NEWS_API_BASE")
+MAX_PAGE_SIZE = 100  # NewsAPI limit per request
+MAX_RATE_LIMIT_RETRIES = 3
+
+def fetch_headlines_raw(ticker: str, max_results: int = 100, since: Optional[str] = None,
+                        until: Optional[str] = None) -> List[Dict]:
+    """
+    Fetch up to `max_results` articles mentioning `ticker`, newest first.
+    See fetch_headlines_window() for `since`/`until`.
+    """
+    return fetch_headlines_window(ticker, max_results, since, until)[0]
 
-def fetch_headlines_raw(ticker: str, max_results: int = 100) -> List[Dict]:
+@replayable("newsapi.everything", encode=list, decode=tuple)
+def fetch_headlines_window(ticker: str, max_results: int = 100, since: Optional[str] = None,
+                           until: Optional[str] = None) -> Tuple[List[Dict], bool]:
+    """
+    Fetch up to `max_results` articles mentioning `ticker`, newest first.
+    `since` and `until` (ISO 8601) are sent as NewsAPI's `from` and `to`.
+    Pages of up to 100 are requested until the window is exhausted.
+    Returns (articles, complete). complete is False when paging stopped
+    early, at `max_results` or on an error, so articles older than the
+    last one returned were not fetched.
+    """
+    page_size = min(max_results, MAX_PAGE_SIZE)
     params = {
         "q": f'"{ticker}"',
         "language": "en",
         "sortBy": "publishedAt",
-        "pageSize": max_results,
+        "pageSize": page_size,
         "apiKey": API_KEY,
     }
+    if since:
+        params["from"] = since
+    if until:
+        params["to"] = until
+
+    articles: List[Dict] = []
+    page = 1
+    retries = 0
+    complete = False
+    while len(articles) < max_results:
+        try:
+            acquire("newsapi")
+            resp = requests.get(BASE_URL, params={**params, "page": page})
+            resp.raise_for_status()
+            payload = resp.json()
+        except requests.HTTPError as e:
+            if is_rate_limit_error(e) and retries < MAX_RATE_LIMIT_RETRIES:
+                retries += 1
+                penalize("newsapi", retry_after_seconds(e))
+                continue
+            print(f"[headlines] {ticker}: page {page} failed: {e}")
+            break
+        except Exception as e:
+            print(f"[headlines] {ticker}: page {page} failed: {e}")
+            break
+
+        batch = payload.get("articles", [])
+        articles.extend(batch)
+        if len(batch) < page_size or len(articles) >= payload.get("totalResults", 0):
+            complete = len(articles) <= max_results
+            break
+        page += 1
+    else:
+        print(f"[headlines] {ticker}: stopped at {max_results} articles; older backlog left for the next run")
 
-    try:
-        resp = requests.get(BASE_URL, params=params)
-        resp.raise_for_status()
-        return resp.json().get("articles", [])
-    except Exception as e:
-        return []
\ No newline at end of file
+    return articles[:max_results], complete
@@ -1,51 +1,112 @@
+import hashlib
+import os
 from typing import Tuple, List
-from tools.headline_utils import fetch_headlines_raw
+from tools.headline_utils import fetch_headlines_window
 from tools.retrieval_tool import init_vector_store, merge_vector_stores
-from tools.vector_store import load_vector_store, save_vector_store
+from tools.vector_store import load_vector_store, namespace_writer, save_vector_store
+from tools.summary_store import bump_headline_version
+from tools.metadata_store import iter_documents
+from tools.dedupe import NearDuplicateIndex
+from tools.watermark import (
+    MAX_SEEN_IDS, article_id, article_published_at, advance_watermark, load_watermark, save_watermark
+)
+
+INGEST_MAX_RESULTS = int(os.getenv("INGEST_MAX_RESULTS", "300"))
+
+def _bootstrap_watermark(store) -> dict:
+    """Build a watermark from an index ingested before watermarks existed."""
+    articles = []
+    clusters = NearDuplicateIndex()
+    for doc in iter_documents(store):
+        meta = doc.metadata or {}
+        articles.append({"url": meta.get("url"), "title": doc.page_content,
+                         "published_at": meta.get("published_at")})
+        clusters.assign(meta.get("id") or doc.page_content, doc.page_content)
+    return advance_watermark(None, articles, canonicals=clusters.to_pairs(limit=MAX_SEEN_IDS))
 
 def ingest_headlines_for_ticker(
     ticker: str,
-    max_results: int = 100,
+    max_results: int = INGEST_MAX_RESULTS,
     persist: bool = True
-) -> None:
+) -> int:
     """
     Ingest and vectorize news headlines for a specific ticker.
     Saves the index under vector_index/{ticker}/
+    Only articles newer than the namespace's watermark are requested, and
+    already-seen articles are skipped. A run that cannot reach the watermark
+    within `max_results` leaves a resume point, and the next run fills that
+    gap before moving the watermark. Near-duplicate headlines get the
+    cluster_id of the story they repeat. Returns the number of newly indexed
+    headlines and signals the change to precomputed summaries.
+    Holds the namespace's writer lock from load to save, so concurrent ingests
+    of one ticker cannot drop each other's headlines.
     """
-    headlines = fetch_headlines_raw(ticker, max_results=max_results)
+    with namespace_writer(ticker):
+        return _ingest_locked(ticker, max_results, persist)
+
+def _ingest_locked(ticker: str, max_results: int, persist: bool) -> int:
+    existing_store = load_vector_store(namespace=ticker)
+    watermark = load_watermark(ticker)
+    if watermark is None and existing_store:
+        watermark = _bootstrap_watermark(existing_store)
+
+    since = watermark["latest_published_at"] if watermark else None
+    until = watermark.get("resume_before") if watermark else None
+    headlines, complete = fetch_headlines_window(ticker, max_results=max_results, since=since, until=until)
+    seen = set(watermark["seen_ids"]) if watermark else set()
+    clusters = NearDuplicateIndex.from_pairs(watermark["canonicals"] if watermark else [])
 
     docs = []
-    for i, article in enumerate(headlines):
-        title = article.get("title", "").strip()
+    for article in headlines:
+        title = (article.get("title") or "").strip()
         if not title:
             continue
 
+        aid = article_id(article)
+        if aid in seen:
+            continue
+        seen.add(aid)
+
+        doc_id = f"{ticker.lower()}_{hashlib.sha1(aid.encode('utf-8')).hexdigest()[:12]}"
         doc = {
-            "id": f"{ticker.lower()}_{i}",
-            "title": (article.get("title") or "").strip(),
+            "id": doc_id,
+            "cluster_id": clusters.assign(doc_id, title),
+            "title": title,
             "description": (article.get("description") or "").strip(),
             "url": (article.get("url") or "").strip(),
-            "published_at": (article.get("published_at") or "").strip()
+            "published_at": article_published_at(article)
         }
         docs.append(doc)
 
-    if not docs:
-        print(f"[ingest] No headlines found for {ticker.upper()}")
-        return
+    duplicates = sum(doc["cluster_id"] != doc["id"] for doc in docs)
+    window = f"since {since or 'the beginning'}" + (f" before {until}" if until else "")
+    print(f"[ingest] {ticker.upper()}: {len(headlines)} fetched {window}, "
+          f"{len(docs)} new ({duplicates} near-duplicates of known stories)"
+          + ("" if complete else "; older backlog resumes next run"))
 
-    new_store = init_vector_store(docs)
-    existing_store = load_vector_store(namespace=ticker)
-
-    combined_store = merge_vector_stores(existing_store, new_store) if existing_store else new_store
+    if docs:
+        new_store = init_vector_store(docs)
+        combined_store = merge_vector_stores(existing_store, new_store) if existing_store else new_store
 
     if persist:
-        save_vector_store(combined_store, namespace=ticker)
-        print(f"[ingest] Indexed {len(docs)} headlines for {ticker.upper()} → vector_index/{ticker}/")
+        if docs:
+            save_vector_store(combined_store, namespace=ticker)
+        # All fetched articles, not just new ones, so the resume point reflects how far paging got
+        save_watermark(ticker, advance_watermark(
+            watermark, headlines, canonicals=clusters.to_pairs(limit=MAX_SEEN_IDS), complete=complete
+        ))
+        if docs:
+            bump_headline_version(ticker, len(docs))
+            print(f"[ingest] Indexed {len(docs)} headlines for {ticker.upper()} → vector_index/{ticker}/")
+
+    return len(docs)
 
 if __name__ == "__main__":
     # Example: test ingesting Apple headlines
     from sys import argv
+    from tools.rate_limiter import BATCH, priority
 
     ticker = argv[1] if len(argv) > 1 else "AAPL"
     print(f"[Test] Ingesting headlines for {ticker}...")
-    ingest_headlines_for_ticker(ticker)
\ No newline at end of file
+    with priority(BATCH):
+        ingest_headlines_for_ticker(ticker)
@@ -0,0 +1,381 @@
+"""
+Keyword extraction service for headline search.
+
+extract_keywords() answers from, in order:
+  1. an in-process LRU + SQLite memo keyed on (normalized query, ticker);
+     entries expire after KEYWORD_MEMO_TTL_SECONDS, and local results also
+     once the ticker's lexicon has been rebuilt for a grown index,
+  2. a local extractor that chunks the query against a phrase lexicon built
+     from the ticker's indexed headlines,
+  3. the gpt-4.1-nano extractor, only when the local result isn't confident.
+LLM replies are parsed as JSON, never evaluated.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from langchain.chat_models import ChatOpenAI
+from langchain.prompts import ChatPromptTemplate
+
+from tools.resolve_tool import resolve_company_name
+from tools.metadata_store import iter_documents
+from tools.rate_limiter import openai_limiter
+from tools.vector_store import get_vector_store
+
+load_dotenv()
+
+KEYWORD_CACHE_PATH = os.getenv("KEYWORD_CACHE_PATH", "keyword_cache.sqlite")
+LEXICON_MIN_DF = int(os.getenv("KEYWORD_LEXICON_MIN_DF", "2"))  # docs a phrase must appear in
+MEMO_TTL = float(os.getenv("KEYWORD_MEMO_TTL_SECONDS", str(7 * 24 * 3600)))
+MEMO_MAX_ITEMS = int(os.getenv("KEYWORD_MEMO_MAX_ITEMS", "4096"))  # in-process tier
+
+EMPTY_RESULT = {"primary_keywords": [], "secondary_keywords": []}
+VAGUE_QUERIES = {"news", "company", "company news"}
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "in", "on", "for", "to", "with", "about", "at",
+    "by", "from", "is", "are", "its", "it", "their", "s", "what", "how", "why", "any",
+    "me", "show", "get", "find", "latest", "recent", "new", "news", "report", "reports",
+    "update", "updates", "company", "stock", "stocks", "shares",
+}
+
+# Supporting terms that are useful context but shouldn't be required in a headline
+SECONDARY_TERMS = {
+    "launch", "launches", "development", "strategy", "plan", "plans", "growth", "outlook",
+    "results", "earnings", "revenue", "sales", "deal", "deals", "partnership", "investment",
+    "expansion", "performance", "policy", "regulation", "lawsuit", "acquisition", "demand",
+    "forecast", "guidance", "production", "release", "roadmap", "progress", "push", "efforts",
+}
+
+# Use a lightweight model for fast keyword extraction
+llm_keyword = ChatOpenAI(temperature=0, model="gpt-4.1-nano", callbacks=[openai_limiter], rate_limiter=openai_limiter)
+
+keyword_prompt = ChatPromptTemplate.from_template("""
+You are an advanced keyword extraction system helping a financial news search agent.
+
+Your job is to extract:
+
+1. **Primary keywords**: Specific named entities, products, technologies, or COMPOUND NOUN PHRASES (e.g., "AI chip", "carbon emission policy", "Apple") that MUST appear in the news title or description. These are essential concepts the article is fundamentally about.
+
+2. **Secondary keywords**: Supporting terms, time references, or general actions (e.g., "launch", "development", "strategy") that are useful context but not required.
+
+Avoid generic terms like “news” or “report.” Extract compound concepts exactly as they appear (e.g., "AI chip" not "AI" and "chip").
+
+Return a JSON object with two arrays.
+
+---
+
+**Example 1**
+
+Query: "Apple AI chip development"
+
+Output:
+{{
+  "primary_keywords": ["Apple", "AI chip"],
+  "secondary_keywords": ["development"]
+}}
+
+---
+
+**Now extract keywords for this query**:
+
+Query: {query}
+""")
+
+_WORD_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9&.\-]*")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(_WORD_RE.findall((query or "").lower()))
+
+
+def _words(text: str) -> List[str]:
+    return [w.rstrip(".") for w in _WORD_RE.findall(text)]
+
+
+# === Persistent memo ===
+
+class KeywordMemo:
+    """
+    (normalized query, ticker) → keyword dict, in a bounded LRU and on disk.
+    Entries older than `ttl` are ignored. A local result also records the
+    lexicon size it was extracted against and is ignored once the lexicon
+    has changed; LLM results don't depend on the lexicon.
+    """
+
+    def __init__(self, path: str = KEYWORD_CACHE_PATH, ttl: float = MEMO_TTL, max_items: int = MEMO_MAX_ITEMS):
+        self._ttl = ttl
+        self._max_items = max_items
+        # key -> (result, source, created, lexicon_size)
+        self._mem: "OrderedDict[Tuple[str, str], tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS keywords ("
+            " query TEXT NOT NULL, ticker TEXT NOT NULL, result TEXT NOT NULL,"
+            " source TEXT NOT NULL, created REAL NOT NULL, lexicon_size INTEGER,"
+            " PRIMARY KEY (query, ticker))"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(keywords)")}
+        if "lexicon_size" not in columns:
+            # Memos written before lexicon tracking; their local results never match a size
+            self._conn.execute("ALTER TABLE keywords ADD COLUMN lexicon_size INTEGER")
+        self._conn.commit()
+
+    def _valid(self, entry: tuple, lexicon_size: Optional[int]) -> bool:
+        _, source, created, stored_size = entry
+        if time.time() - created > self._ttl:
+            return False
+        return source != "local" or lexicon_size is None or stored_size == lexicon_size
+
+    def _remember(self, key: Tuple[str, str], entry: tuple) -> None:
+        self._mem[key] = entry
+        self._mem.move_to_end(key)
+        while len(self._mem) > self._max_items:
+            self._mem.popitem(last=False)
+
+    def get(self, query: str, ticker: str, lexicon_size: Optional[int] = None) -> Optional[dict]:
+        key = (query, ticker)
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is None:
+                row = self._conn.execute(
+                    "SELECT result, source, created, lexicon_size FROM keywords WHERE query = ? AND ticker = ?", key
+                ).fetchone()
+                if row is None:
+                    return None
+                entry = (json.loads(row[0]), row[1], row[2], row[3])
+            if not self._valid(entry, lexicon_size):
+                self._mem.pop(key, None)
+                return None
+            self._remember(key, entry)
+            return entry[0]
+
+    def put(self, query: str, ticker: str, result: dict, source: str, lexicon_size: Optional[int] = None) -> None:
+        entry = (result, source, time.time(), lexicon_size)
+        with self._lock:
+            self._remember((query, ticker), entry)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO keywords (query, ticker, result, source, created, lexicon_size)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (query, ticker, json.dumps(result), source, entry[2], lexicon_size),
+            )
+            self._conn.commit()
+
+
+_memo: Optional[KeywordMemo] = None
+
+
+def get_memo() -> KeywordMemo:
+    global _memo
+    if _memo is None:
+        _memo = KeywordMemo()
+    return _memo
+
+
+# === Lexicon built from indexed headlines ===
+
+_lexicons: Dict[str, Tuple[int, set]] = {}
+
+
+def build_lexicon(texts: List[str], min_df: int = LEXICON_MIN_DF) -> set:
+    """
+    Lowercase 1–3 word phrases (no stopwords at the edges) that occur in at
+    least `min_df` of the given headline texts.
+    """
+    df: Counter = Counter()
+    for text in texts:
+        words = [w.lower() for w in _words(text)]
+        phrases = set()
+        for n in (1, 2, 3):
+            for i in range(len(words) - n + 1):
+                gram = words[i:i + n]
+                if gram[0] in STOPWORDS or gram[-1] in STOPWORDS:
+                    continue
+                phrases.add(" ".join(gram))
+        df.update(phrases)
+    return {p for p, count in df.items() if count >= min_df}
+
+
+def lexicon_size(namespace: Optional[str]) -> int:
+    """Indexed headlines the namespace's lexicon is built from; changes whenever it is rebuilt."""
+    store = get_vector_store(namespace) if namespace else None
+    return store.index.ntotal if store is not None else 0
+
+
+def get_lexicon(namespace: Optional[str]) -> set:
+    """Lexicon for a namespace's indexed headlines, rebuilt when the index grows."""
+    if not namespace:
+        return set()
+    store = get_vector_store(namespace)
+    if store is None:
+        return set()
+    size = store.index.ntotal
+    cached = _lexicons.get(namespace)
+    if cached and cached[0] == size:
+        return cached[1]
+    texts = [
+        f"{doc.page_content} {(doc.metadata or {}).get('description', '')}"
+        for doc in iter_documents(store)
+    ]
+    lexicon = build_lexicon(texts)
+    _lexicons[namespace] = (size, lexicon)
+    return lexicon
+
+
+# === Extractors ===
+
+def local_extract(query: str, lexicon: set, company: Optional[str] = None) -> Tuple[dict, bool]:
+    """
+    Chunk the query into keywords without an LLM.
+    Returns (result, confident); confident only when every content word was
+    accounted for by the company name, a lexicon phrase or proper noun from
+    the ticker's headlines, a known secondary term or an acronym. Other
+    capitalized words (e.g. a title-case "Tesla Battery Supply") go to the LLM.
+    """
+    words = _words(query)
+    lowered = [w.lower() for w in words]
+    # In an all-caps query every word looks like an acronym
+    all_caps = all(w.isupper() for w, low in zip(words, lowered) if low not in STOPWORDS)
+    company_words = {w.lower() for w in _words(company or "")}
+    primary: List[str] = []
+    secondary: List[str] = []
+    confident = True
+
+    i = 0
+    while i < len(words):
+        word, low = words[i], lowered[i]
+        if low in STOPWORDS:
+            i += 1
+            continue
+
+        if company_words and low in company_words:
+            if company not in primary:
+                primary.append(company)
+            i += 1
+            continue
+
+        # Longest lexicon phrase starting here (multi-word phrases are primary)
+        matched = 0
+        for n in (3, 2):
+            if i + n <= len(words) and " ".join(lowered[i:i + n]) in lexicon:
+                phrase = " ".join(words[i:i + n])
+                if lowered[i + n - 1] in SECONDARY_TERMS:
+                    continue
+                primary.append(phrase)
+                matched = n
+                break
+        if matched:
+            i += matched
+            continue
+
+        if low in SECONDARY_TERMS:
+            secondary.append(word)
+        elif word.isupper() and 2 <= len(word) <= 5 and not all_caps:
+            primary.append(word)   # acronym, e.g. "AI", "EV"
+        elif word[:1].isupper() and low in lexicon:
+            primary.append(word)   # proper noun from the ticker's headlines, e.g. "Siri"
+        elif low in lexicon:
+            secondary.append(word)
+            confident = False      # a lone common word might belong to a phrase
+        else:
+            confident = False
+        i += 1
+
+    if not primary:
+        confident = False
+    return {"primary_keywords": primary, "secondary_keywords": secondary}, confident
+
+
+def parse_keyword_json(text: str) -> Optional[dict]:
+    """Parse the LLM reply as JSON; None if it isn't a valid keyword object."""
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    result = {}
+    for key in ("primary_keywords", "secondary_keywords"):
+        values = data.get(key, [])
+        if not isinstance(values, list):
+            return None
+        result[key] = [str(v).strip() for v in values if str(v).strip()]
+    return result
+
+
+def llm_extract(query: str) -> Optional[dict]:
+    try:
+        response = (keyword_prompt | llm_keyword).invoke({"query": query})
+    except Exception as e:
+        print(f"[Keyword Extractor] Error: {e}")
+        return None
+    content = response.content.strip()
+    print("[Keyword Extraction] Raw LLM response:", content)
+    parsed = parse_keyword_json(content)
+    if parsed is None:
+        print(f"[Keyword Extractor] Could not parse JSON: {content}")
+    return parsed
+
+
+def _enhance_query(query: str, ticker: Optional[str], resolved: Optional[str]) -> str:
+    """Replace ticker-only or vague queries with resolved company names."""
+    # Case 1: Vague query
+    if not query or query.lower() in VAGUE_QUERIES:
+        query = resolved or "financial news"
+        print(f"[Fallback] Replaced vague query with: {query}")
+
+    # Case 2: Ticker symbol used directly
+    elif ticker and query.upper() == ticker.upper():
+        query = resolved
+        print(f"[Fallback] Replaced ticker symbol with resolved name: {query}")
+
+    # Case 3: Query is missing resolved company name
+    elif ticker and resolved and resolved.lower() not in query.lower():
+        query = f"{resolved} {query}"
+        print(f"[Enhancement] Added company name to query: {query}")
+
+    return query
+
+
+def extract_keywords(query: str, ticker: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    Extract primary and secondary keywords for a headline search.
+    Memoized on (normalized query, ticker); the LLM only runs on memo misses
+    where the local extractor isn't confident. Local results are only reused
+    while the ticker's lexicon is unchanged.
+    """
+    query = (query or "").strip()
+    memo_key = (normalize_query(query), (ticker or "").upper())
+    memo = get_memo()
+    size = lexicon_size(ticker)
+
+    cached = memo.get(*memo_key, lexicon_size=size)
+    if cached is not None:
+        return cached
+
+    resolved = resolve_company_name(ticker) if ticker else None
+    query = _enhance_query(query, ticker, resolved)
+
+    result, confident = local_extract(query, get_lexicon(ticker), company=resolved)
+    source = "local"
+    if not confident:
+        llm_result = llm_extract(query)
+        if llm_result is None:
+            # Don't memoize failures; the local guess is better than nothing
+            return result if result["primary_keywords"] else dict(EMPTY_RESULT)
+        result, source = llm_result, "llm"
+
+    print(f"[Keyword Extraction] ({source}) {result}")
+    memo.put(*memo_key, result, source, lexicon_size=size)
+    return result
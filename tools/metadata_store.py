@@ -0,0 +1,208 @@
+"""
+SQLite-backed document metadata for FAISS namespaces.
+
+Replaces the pickled InMemoryDocstore (index.pkl) with meta.sqlite:
+
+    docs(row          INTEGER PRIMARY KEY,  -- position in the FAISS index
+         docstore_id  TEXT UNIQUE,          -- LangChain docstore id
+         title, id, description, url, published_at TEXT,
+         extra        TEXT)                 -- JSON for any other metadata keys
+
+Opening a namespace reads no documents; Document objects are built only for
+the rows a search returns. Nothing is unpickled.
+"""
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Tuple, Union
+
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+META_FILE = "meta.sqlite"
+# Read metadata through mmap so worker processes share the page cache (0 disables)
+MMAP_SIZE = int(os.getenv("METADATA_MMAP_SIZE", str(256 * 1024 * 1024)))
+COLUMNS = ("id", "description", "url", "published_at")
+
+_SCHEMA = """
+CREATE TABLE docs (
+    row INTEGER PRIMARY KEY,
+    docstore_id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    id TEXT,
+    description TEXT,
+    url TEXT,
+    published_at TEXT,
+    extra TEXT
+)
+"""
+_SELECT = "SELECT docstore_id, title, id, description, url, published_at, extra FROM docs"
+
+
+def _to_document(row: tuple) -> Document:
+    _, title, doc_id, description, url, published_at, extra = row
+    metadata = {"id": doc_id, "description": description, "url": url, "published_at": published_at}
+    if extra:
+        metadata.update(json.loads(extra))
+    return Document(page_content=title, metadata=metadata)
+
+
+def _to_row(position: int, docstore_id: str, doc: Document) -> tuple:
+    meta = dict(doc.metadata or {})
+    values = [meta.pop(col, "") or "" for col in COLUMNS]
+    extra = json.dumps(meta) if meta else None
+    return (position, docstore_id, doc.page_content, *values, extra)
+
+
+class _SQLiteConnection:
+    """One read-only connection per namespace, shared across threads."""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        if MMAP_SIZE:
+            self.conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        self.lock = threading.Lock()
+
+    def one(self, sql: str, params: tuple = ()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def all(self, sql: str, params: tuple = ()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    """
+    Docstore that reads documents from meta.sqlite on demand.
+    Documents added after loading (e.g. by merge_from) are held in memory
+    until the store is saved again.
+    """
+
+    def __init__(self, db: _SQLiteConnection):
+        self._db = db
+        self._pending: Dict[str, Document] = {}
+        self._deleted: set = set()
+
+    def search(self, search: str) -> Union[str, Document]:
+        if search in self._deleted:
+            return f"ID {search} not found."
+        if search in self._pending:
+            return self._pending[search]
+        row = self._db.one(f"{_SELECT} WHERE docstore_id = ?", (search,))
+        if row is None:
+            return f"ID {search} not found."
+        return _to_document(row)
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        overlapping = set(texts).intersection(self._pending)
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+        self._pending.update(texts)
+        self._deleted.difference_update(texts)
+
+    def delete(self, ids: List) -> None:
+        for _id in ids:
+            self._pending.pop(_id, None)
+            self._deleted.add(_id)
+
+    def iter_documents(self) -> Iterator[Tuple[str, Document]]:
+        for row in self._db.all(f"{_SELECT} ORDER BY row"):
+            if row[0] not in self._deleted and row[0] not in self._pending:
+                yield row[0], _to_document(row)
+        yield from self._pending.items()
+
+
+class RowIdMap(MutableMapping):
+    """
+    FAISS position → docstore id, read from meta.sqlite one row at a time.
+    Writes go to an in-memory overlay until the store is saved again.
+    """
+
+    def __init__(self, db: _SQLiteConnection):
+        self._db = db
+        self._base_len = db.one("SELECT COUNT(*) FROM docs")[0]
+        self._overlay: Dict[int, str] = {}
+        self._removed: set = set()
+
+    def __getitem__(self, row) -> str:
+        row = int(row)
+        if row in self._overlay:
+            return self._overlay[row]
+        if row in self._removed:
+            raise KeyError(row)
+        found = self._db.one("SELECT docstore_id FROM docs WHERE row = ?", (row,))
+        if found is None:
+            raise KeyError(row)
+        return found[0]
+
+    def __setitem__(self, row, docstore_id: str) -> None:
+        self._overlay[int(row)] = docstore_id
+
+    def __delitem__(self, row) -> None:
+        row = int(row)
+        self._overlay.pop(row, None)
+        if row < self._base_len:
+            self._removed.add(row)
+
+    def __iter__(self) -> Iterator[int]:
+        for row in range(self._base_len):
+            if row not in self._removed and row not in self._overlay:
+                yield row
+        yield from self._overlay
+
+    def __len__(self) -> int:
+        base = self._base_len - len(self._removed)
+        extra = sum(1 for row in self._overlay if row >= self._base_len or row in self._removed)
+        return base + extra
+
+
+def open_metadata(folder: str) -> Tuple[SQLiteDocstore, RowIdMap]:
+    """Open a namespace's meta.sqlite as a lazy (docstore, index_to_docstore_id) pair."""
+    db = _SQLiteConnection(os.path.join(folder, META_FILE))
+    return SQLiteDocstore(db), RowIdMap(db)
+
+
+def write_metadata(folder: str, docstore, index_to_docstore_id) -> int:
+    """
+    Write meta.sqlite for a store. The file is built under a temporary name and
+    renamed into place, so open readers keep seeing the previous version.
+    Returns the number of rows written.
+    """
+    path = os.path.join(folder, META_FILE)
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute(_SCHEMA)
+        rows = []
+        for position in sorted(index_to_docstore_id):
+            docstore_id = index_to_docstore_id[position]
+            doc = docstore.search(docstore_id)
+            if not isinstance(doc, Document):
+                raise ValueError(f"Could not find document for id {docstore_id}, got {doc}")
+            rows.append(_to_row(int(position), docstore_id, doc))
+        conn.executemany("INSERT INTO docs VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+    return len(rows)
+
+
+def iter_documents(store) -> Iterator[Document]:
+    """Every document in a FAISS store, whichever docstore backs it."""
+    docstore = store.docstore
+    if isinstance(docstore, SQLiteDocstore):
+        for _, doc in docstore.iter_documents():
+            yield doc
+    else:
+        for docstore_id in store.index_to_docstore_id.values():
+            doc = docstore.search(docstore_id)
+            if isinstance(doc, Document):
+                yield doc
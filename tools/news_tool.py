@@ -1,19 +1,31 @@
 import os
+import contextvars
+import numpy as np
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dotenv import load_dotenv
-from typing import Optional, List, Dict, Tuple
+from typing import Optional, List, Dict, Tuple, Iterator, Deque
 
-from tools.vector_store import load_vector_store
-from tools.retrieval_tool import retrieve
+from tools.vector_store import get_vector_store
+from tools.retrieval_tool import retrieve_with_vectors
+from tools.relevance import cosine, judge_with_cascade, relevance_stats, topic_embedding
 from tools.ingest_tool import ingest_headlines_for_ticker
 from tools.resolve_tool import resolve_company_name
+from tools.keyword_tool import extract_keywords
+from tools.rate_limiter import openai_limiter
 from langchain_core.documents import Document
 from langchain.chat_models import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
+from langchain.prompts import PromptTemplate
+from langchain.chains import LLMChain
 
 load_dotenv()
 
-# Use a lightweight model for fast keyword extraction
-llm_keyword = ChatOpenAI(temperature=0, model="gpt-4.1-nano")
+# Relevance checks started ahead of the consumer; the first headline waits for
+# one check, later ones are usually decided by the time they are asked for
+RELEVANCE_LOOKAHEAD = int(os.getenv("RELEVANCE_LOOKAHEAD", "4"))
+_relevance_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("RELEVANCE_WORKERS", "8")), thread_name_prefix="relevance"
+)
 
 def contains_all_keywords(text: str, keywords: List[str]) -> bool:
     """
@@ -24,91 +36,21 @@ def contains_all_keywords(text: str, keywords: List[str]) -> bool:
 
 def extract_keywords_from_query(query: str, ticker: Optional[str] = None) -> Dict[str, List[str]]:
     """
-    Use LLM to extract primary and secondary keywords from a *cleaned* query.
-    Replaces ticker-only or vague queries with resolved company names *before* prompting the LLM.
+    Extract primary and secondary keywords from a *cleaned* query.
+    Replaces ticker-only or vague queries with resolved company names first.
+    Served from the keyword memo / local extractor when possible (see tools.keyword_tool).
     """
-    query = query.strip()
-    resolved = resolve_company_name(ticker) if ticker else None
-
-    # Case 1: Vague query
-    if not query or query.lower() in {"news", "company", "company news"}:
-        query = resolved or "financial news"
-        print(f"[Fallback] Replaced vague query with: {query}")
-
-    # Case 2: Ticker symbol used directly
-    elif ticker and query.upper() == ticker.upper():
-        query = resolved
-        print(f"[Fallback] Replaced ticker symbol with resolved name: {query}")
-
-    # Case 3: Query is missing resolved company name
-    elif ticker and resolved and resolved.lower() not in query.lower():
-        query = f"{resolved} {query}"
-        print(f"[Enhancement] Added company name to query: {query}")
-
-    # === Now safe to pass to LLM ===
-    prompt = ChatPromptTemplate.from_template("""
-You are an advanced keyword extraction system helping a financial news search agent.
-
-Your job is to extract:
-
-1. **Primary keywords**: Specific named entities, products, technologies, or COMPOUND NOUN PHRASES (e.g., "AI chip", "carbon emission policy", "Apple") that MUST appear in the news title or description. These are essential concepts the article is fundamentally about.
-
-2. **Secondary keywords**: Supporting terms, time references, or general actions (e.g., "launch", "development", "strategy") that are useful context but not required.
-
-Avoid generic terms like “news” or “report.” Extract compound concepts exactly as they appear (e.g., "AI chip" not "AI" and "chip").
-
-Return a JSON object with two arrays.
-
----
-
-**Example 1**
-
-Query: "Apple AI chip development"
-
-Output:
-{{
-  "primary_keywords": ["Apple", "AI chip"],
-  "secondary_keywords": ["development"]
-}}
-
----
-
-**Now extract keywords for this query**:
-
-Query: {query}
-""")
-
-    try:
-        chain = prompt | llm_keyword
-        response = chain.invoke({"query": query})
-        print("[Keyword Extraction] Raw LLM response:", response.content.strip())
-        return eval(response.content.strip())
-    except Exception as e:
-        print(f"[Keyword Extractor] Error: {e}")
-        return {"primary_keywords": [], "secondary_keywords": []}
-
+    return extract_keywords(query, ticker=ticker)
 
 
 # Global in-memory relevance cache
 relevance_cache = {}
 
-def judge_relevance_cached(title: str, description: str, topic: str, threshold: float = 0.4) -> bool:
-    """
-    Check whether a headline is relevant to a topic using LLM (cached).
-    """
-    key = (title, description, topic)
-    if key in relevance_cache:
-        return relevance_cache[key]
-
-    # Call LLM
-    from langchain.chat_models import ChatOpenAI
-    from langchain.prompts import PromptTemplate
-    from langchain.chains import LLMChain
-
-    llm = ChatOpenAI(temperature=0)
-    prompt = PromptTemplate(
-        input_variables=["title", "description", "filter_topic"],
-        template="""
+# Shared relevance judge (built once per process, not per headline)
+llm_relevance = ChatOpenAI(temperature=0, callbacks=[openai_limiter], rate_limiter=openai_limiter)
+relevance_prompt = PromptTemplate(
+    input_variables=["title", "description", "filter_topic"],
+    template="""
 Decide if the following article is directly relevant to the company's business **in the area of {filter_topic}**.
 
 Relevant examples include:
@@ -125,9 +67,33 @@ Description: {description}
 Respond ONLY with a float between 0 and 1. Be strict: 
 0 = not clearly about {filter_topic}, 1 = directly about it.
 """
+)
+relevance_chain = LLMChain(llm=llm_relevance, prompt=relevance_prompt)
+
+def judge_relevance_cascade(title: str, description: str, topic: str, similarity: Optional[float]) -> bool:
+    """
+    Relevance via the local embedding cascade (tools.relevance); only headlines
+    whose similarity to the topic is ambiguous reach judge_relevance_cached.
+    """
+    verdict, source = judge_with_cascade(
+        similarity,
+        judge=lambda: judge_relevance_cached(title, description, topic),
+        judge_is_cached=lambda: (title, description, topic) in relevance_cache,
     )
-    chain = LLMChain(llm=llm, prompt=prompt)
-    response = chain.run({
+    if source != "llm":
+        print(f"[Relevance] {source}ed locally (similarity {similarity:.3f}): {title}")
+    return verdict
+
+def judge_relevance_cached(title: str, description: str, topic: str, threshold: float = 0.4) -> bool:
+    """
+    Check whether a headline is relevant to a topic using LLM (cached).
+    """
+    key = (title, description, topic)
+    if key in relevance_cache:
+        return relevance_cache[key]
+
+    # Call LLM
+    response = relevance_chain.run({
         "title": title,
         "description": description,
         "filter_topic": topic
@@ -147,19 +113,49 @@ Respond ONLY with a float between 0 and 1. Be strict:
 from typing import Optional, List, Dict, Tuple
 from langchain.schema import Document
 
-def fetch_headlines(
+def _keyword_matches(
+    raw_results: List[Tuple[Document, float, Optional[np.ndarray]]],
+    primary_keywords: List[str],
+    topic_vector: Optional[np.ndarray],
+) -> Iterator[Dict]:
+    """Search hits containing every primary keyword, in rank order."""
+    for doc, score, vector in raw_results:
+        meta = doc.metadata or {}
+        title = meta.get("title", doc.page_content.strip())
+        desc = meta.get("description", "")
+
+        # 🧠 Hard filter: primary keywords
+        if not contains_all_keywords(f"{title} {desc}", primary_keywords):
+            print(f"[Filtered: Missing Primary Keywords] {title}")
+            continue
+
+        yield {
+            "title": title,
+            "description": desc,
+            "url": meta.get("url", "N/A"),
+            "published_at": meta.get("published_at", "N/A"),
+            "score": score,
+            "similarity": cosine(vector, topic_vector),
+        }
+
+def iter_headlines(
     ticker: str,
     query: str,
     max_results: int = 5,
     auto_ingest: bool = True,
     is_relevant: bool = True
-) -> List[Dict]:
+) -> Iterator[Dict]:
     """
-    Retrieve relevant headlines for a company from its FAISS vector store.
-    Applies primary keyword filtering and optional LLM-based filtering.
+    Yield relevant headlines for a company in retrieval rank order, each as
+    soon as it passes the primary keyword and relevance filters.
+    Relevance checks for the next RELEVANCE_LOOKAHEAD candidates run
+    concurrently. Iteration stops after `max_results` headlines, and checks
+    that have not started are cancelled. Errors are yielded as a single
+    {"error": ...} item.
     """
     if not query or not query.strip() or query.lower().strip() in {"company news", "news", "general"}:
-        return [{"error": "Query too vague — please use a descriptive topic like 'Apple AI strategy'."}]
+        yield {"error": "Query too vague — please use a descriptive topic like 'Apple AI strategy'."}
+        return
 
     # 🔍 Step 1: Extract primary/secondary keywords
     keyword_info = extract_keywords_from_query(query, ticker=ticker)
@@ -177,57 +173,87 @@ def fetch_headlines(
 
 
     # Step 2: Load or ingest vector store
-    vector_store = load_vector_store(ticker)
+    vector_store = get_vector_store(ticker)
     if not vector_store and auto_ingest:
         ingest_headlines_for_ticker(ticker, max_results=100)
-        vector_store = load_vector_store(ticker)
+        vector_store = get_vector_store(ticker)
 
     if not vector_store:
-        return [{"error": f"No vector index found for '{ticker}' — please run ingestion first."}]
+        yield {"error": f"No vector index found for '{ticker}' — please run ingestion first."}
+        return
 
     # Step 3: Vector search using secondary query
     try:
-        raw_results: List[Tuple[Document, float]] = retrieve(vector_store, query=secondary_query, k=10)
+        raw_results: List[Tuple[Document, float, Optional[np.ndarray]]] = retrieve_with_vectors(
+            vector_store, query=secondary_query, k=10
+        )
     except Exception as e:
-        return [{"error": f"Vector search failed: {str(e)}"}]
+        yield {"error": f"Vector search failed: {str(e)}"}
+        return
 
-    # Step 4: Filter by primary keywords + LLM
-    filtered = []
-    for doc, score in raw_results:
-        meta = doc.metadata or {}
-        title = meta.get("title", doc.page_content.strip())
-        desc = meta.get("description", "")
-        url = meta.get("url", "N/A")
-        published = meta.get("published_at", "N/A")
+    topic_vector = topic_embedding(vector_store, query) if is_relevant else None
+    candidates = _keyword_matches(raw_results, primary_keywords, topic_vector)
 
-        # 🧠 Hard filter: primary keywords
-        if not contains_all_keywords(f"{title} {desc}", primary_keywords):
-            print(f"[Filtered: Missing Primary Keywords] {title}")
-            continue
+    def check(candidate: Dict) -> bool:
+        return judge_relevance_cascade(candidate["title"], candidate["description"], query, candidate["similarity"])
 
-        # 🤖 Optional LLM Relevance Check
-        llm_relevance = True
+    # Step 4: Relevance (local similarity, LLM only when ambiguous), checked ahead of the consumer
+    pending: Deque[Tuple[Dict, Optional[Future]]] = deque()
+    found = 0
+    try:
+        while found < max_results:
+            # Never check more ahead than could still be yielded, so nothing is judged past max_results
+            while len(pending) < max(1, min(RELEVANCE_LOOKAHEAD, max_results - found)):
+                candidate = next(candidates, None)
+                if candidate is None:
+                    break
+                # Copy the context so the rate limiter priority follows the check
+                future = _relevance_pool.submit(contextvars.copy_context().run, check, candidate) if is_relevant else None
+                pending.append((candidate, future))
+            if not pending:
+                break
+
+            candidate, future = pending.popleft()
+            llm_relevance = future.result() if future is not None else True
+            title, desc, score = candidate["title"], candidate["description"], candidate["score"]
+
+            # 🔍 Logging
+            print(f"\n[Headline Check] Title: {title}")
+            print(f"→ Score: {score:.2f} | Primary Match: ✅ | LLM Relevance: {llm_relevance}")
+            print(f"→ Description: {desc}")
+            print(f"→ URL: {candidate['url']} | Published At: {candidate['published_at']}")
+
+            if not llm_relevance:
+                print(f"[Rejected by LLM] {title}")
+                continue
+
+            found += 1
+            yield {
+                "title": title,
+                "description": desc or f"Similarity Score: {score:.2f}",
+                "url": candidate["url"],
+                "published_at": candidate["published_at"],
+            }
+    finally:
+        for _, future in pending:
+            if future is not None:
+                future.cancel()
         if is_relevant:
-            llm_relevance = judge_relevance_cached(title, desc, topic=query)
-
-        # 🔍 Logging
-        print(f"\n[Headline Check] Title: {title}")
-        print(f"→ Score: {score:.2f} | Primary Match: ✅ | LLM Relevance: {llm_relevance}")
-        print(f"→ Description: {desc}")
-        print(f"→ URL: {url} | Published At: {published}")
-
-        if not llm_relevance:
-            print(f"[Rejected by LLM] {title}")
-            continue
-
-        filtered.append({
-            "title": title,
-            "description": desc or f"Similarity Score: {score:.2f}",
-            "url": url,
-            "published_at": published,
-        })
-
-        if len(filtered) >= max_results:
-            break
+            stats = relevance_stats()
+            print(f"[Relevance] LLM calls avoided: {stats['llm_avoided']:.0%} of {stats.get('checked', 0)} checks"
+                  f" | agreement with LLM: {stats['agreement'] if stats['agreement'] is not None else 'n/a'}")
 
-    return filtered
+def fetch_headlines(
+    ticker: str,
+    query: str,
+    max_results: int = 5,
+    auto_ingest: bool = True,
+    is_relevant: bool = True
+) -> List[Dict]:
+    """
+    Retrieve relevant headlines for a company from its FAISS vector store.
+    Applies primary keyword filtering and optional relevance filtering
+    (embedding similarity first, LLM judge for ambiguous headlines).
+    See iter_headlines() to receive headlines as they pass the filters.
+    """
+    return list(iter_headlines(ticker, query, max_results, auto_ingest, is_relevant))
@@ -0,0 +1,349 @@
+"""
+Token-bucket rate limiting for outbound calls, shared through Redis.
+
+Each upstream (OpenAI, NewsAPI, yfinance) has a requests-per-second bucket,
+and OpenAI also has a tokens-per-minute bucket. Buckets live in Redis, so every
+process and replica draws from the same budget; when Redis is down each process
+falls back to its own buckets.
+
+Callers queue instead of failing: acquire() sleeps until the buckets have room,
+and raises RateLimitTimeout if none turns up within RATE_LIMIT_MAX_WAIT.
+Batch work (ingestion, watchlist refreshes) may only draw a bucket down to a
+reserve, so interactive requests still find capacity while ingestion is busy.
+Request buckets are sized so one request plus the reserve always fits, even
+for upstreams allowing a single request per second.
+A 429 from an upstream pauses that upstream for everyone via penalize().
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from tools.redis_client import get_redis
+
+load_dotenv()
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+# Below 1, or batch callers could never fit a request on top of the reserve
+BATCH_RESERVE_FRACTION = min(float(os.getenv("RATE_LIMIT_BATCH_RESERVE", "0.5")), 0.9)
+MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "120"))
+DEFAULT_PENALTY = float(os.getenv("RATE_LIMIT_PENALTY_SECONDS", "5"))
+COMPLETION_TOKEN_ESTIMATE = int(os.getenv("RATE_LIMIT_COMPLETION_TOKENS", "512"))
+
+BUCKET_KEY = "ratelimit:{upstream}:{kind}"
+BLOCKED_KEY = "ratelimit:{upstream}:blocked_until"
+
+
+class RateLimitTimeout(RuntimeError):
+    """No capacity turned up for an upstream within the caller's max wait."""
+
+
+@dataclass(frozen=True)
+class Limit:
+    rate: float      # tokens refilled per second
+    capacity: float  # burst size
+
+
+def _per_second(env: str, default: str) -> Limit:
+    rps = float(os.getenv(env, default))
+    # capacity >= 1 + reserve, i.e. capacity * (1 - fraction) >= 1, so a batch request always fits
+    return Limit(rate=rps, capacity=max(1.0, rps, 1.0 / (1.0 - BATCH_RESERVE_FRACTION)))
+
+
+def _per_minute(env: str, default: str) -> Limit:
+    per_minute = float(os.getenv(env, default))
+    return Limit(rate=per_minute / 60.0, capacity=per_minute)
+
+
+UPSTREAMS: Dict[str, Dict[str, Limit]] = {
+    "openai": {
+        "requests": _per_second("RATE_LIMIT_OPENAI_RPS", "5"),
+        "tokens": _per_minute("RATE_LIMIT_OPENAI_TPM", "200000"),
+    },
+    "newsapi": {"requests": _per_second("RATE_LIMIT_NEWSAPI_RPS", "1")},
+    "yfinance": {"requests": _per_second("RATE_LIMIT_YFINANCE_RPS", "2")},
+}
+
+_priority: ContextVar[str] = ContextVar("rate_limit_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority(level: str):
+    """Run the enclosed calls with the given priority class (INTERACTIVE or BATCH)."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def _bucket_requests(upstream: str, tokens: int, level: str) -> List[Tuple[str, Limit, float, float]]:
+    """(kind, limit, cost, reserve) for every bucket a call has to draw from."""
+    limits = UPSTREAMS[upstream]
+    costs = {"requests": 1.0, "tokens": float(tokens)}
+    requests_ = []
+    for kind, limit in limits.items():
+        cost = min(costs.get(kind, 0.0), limit.capacity)
+        if cost <= 0:
+            continue
+        reserve = limit.capacity * BATCH_RESERVE_FRACTION if level == BATCH else 0.0
+        # Only a prompt too large for the token budget can't fit alongside the reserve
+        requests_.append((kind, limit, cost, max(0.0, min(reserve, limit.capacity - cost))))
+    return requests_
+
+
+# === Redis buckets ===
+
+# KEYS[1] = blocked-until key, KEYS[2..] = bucket hashes
+# ARGV = rate, capacity, cost, reserve per bucket
+# Returns "0" when the tokens were taken, otherwise the seconds to wait.
+_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local blocked = tonumber(redis.call('GET', KEYS[1]) or '0')
+if blocked > now then
+  return tostring(blocked - now)
+end
+
+local levels = {}
+local wait = 0
+for i = 2, #KEYS do
+  local base = (i - 2) * 4
+  local rate, cap = tonumber(ARGV[base + 1]), tonumber(ARGV[base + 2])
+  local cost, reserve = tonumber(ARGV[base + 3]), tonumber(ARGV[base + 4])
+  local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+  local level = tonumber(state[1]) or cap
+  local ts = tonumber(state[2]) or now
+  level = math.min(cap, level + math.max(0, now - ts) * rate)
+  levels[i] = level
+  local short = cost + reserve - level
+  if short > 0 then
+    wait = math.max(wait, short / rate)
+  end
+end
+if wait > 0 then
+  return tostring(wait)
+end
+
+for i = 2, #KEYS do
+  local base = (i - 2) * 4
+  local rate, cap, cost = tonumber(ARGV[base + 1]), tonumber(ARGV[base + 2]), tonumber(ARGV[base + 3])
+  redis.call('HSET', KEYS[i], 'tokens', levels[i] - cost, 'ts', now)
+  redis.call('EXPIRE', KEYS[i], math.ceil(cap / rate) + 1)
+end
+return '0'
+"""
+
+_script = None
+
+
+def _redis_try_acquire(client: redis.Redis, upstream: str, buckets) -> float:
+    global _script
+    if _script is None:
+        _script = client.register_script(_ACQUIRE_SCRIPT)
+    keys = [BLOCKED_KEY.format(upstream=upstream)]
+    args: List[float] = []
+    for kind, limit, cost, reserve in buckets:
+        keys.append(BUCKET_KEY.format(upstream=upstream, kind=kind))
+        args.extend([limit.rate, limit.capacity, cost, reserve])
+    return float(_script(keys=keys, args=args, client=client))
+
+
+# === In-process fallback ===
+
+class LocalBuckets:
+    """The same bucket arithmetic as the Redis script, for a single process."""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._state: Dict[str, Tuple[float, float]] = {}  # key -> (level, ts)
+        self._blocked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, upstream: str, buckets) -> float:
+        with self._lock:
+            now = self._clock()
+            blocked = self._blocked.get(upstream, 0.0)
+            if blocked > now:
+                return blocked - now
+
+            levels = {}
+            wait = 0.0
+            for kind, limit, cost, reserve in buckets:
+                key = BUCKET_KEY.format(upstream=upstream, kind=kind)
+                level, ts = self._state.get(key, (limit.capacity, now))
+                level = min(limit.capacity, level + max(0.0, now - ts) * limit.rate)
+                levels[key] = level
+                short = cost + reserve - level
+                if short > 0:
+                    wait = max(wait, short / limit.rate)
+            if wait > 0:
+                return wait
+
+            for kind, limit, cost, _ in buckets:
+                key = BUCKET_KEY.format(upstream=upstream, kind=kind)
+                self._state[key] = (levels[key] - cost, now)
+            return 0.0
+
+    def penalize(self, upstream: str, seconds: float) -> None:
+        with self._lock:
+            until = self._clock() + seconds
+            self._blocked[upstream] = max(self._blocked.get(upstream, 0.0), until)
+
+
+_local = LocalBuckets()
+
+
+def _try_acquire(upstream: str, tokens: int, level: str) -> float:
+    buckets = _bucket_requests(upstream, tokens, level)
+    client = get_redis()
+    if client is not None:
+        try:
+            return _redis_try_acquire(client, upstream, buckets)
+        except redis.RedisError as e:
+            print(f"[RateLimit] Redis bucket failed for {upstream}: {e} — using local bucket")
+    return _local.try_acquire(upstream, buckets)
+
+
+def acquire(upstream: str, tokens: int = 0, level: Optional[str] = None, max_wait: float = MAX_WAIT) -> float:
+    """
+    Block until `upstream` has capacity for one request (and `tokens` tokens,
+    where the upstream has a token budget). Returns the seconds spent queued.
+    Raises RateLimitTimeout if no capacity turns up within `max_wait` seconds.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return 0.0
+    level = level or current_priority()
+    started = time.monotonic()
+    while True:
+        wait = _try_acquire(upstream, tokens, level)
+        waited = time.monotonic() - started
+        if wait <= 0:
+            if waited >= 1.0:
+                print(f"[RateLimit] {upstream}: queued {waited:.1f}s ({level})")
+            return waited
+        if waited + wait > max_wait:
+            raise RateLimitTimeout(
+                f"{upstream}: no capacity after {waited:.1f}s ({level}); next slot in {wait:.1f}s, "
+                f"over the {max_wait:.0f}s limit"
+            )
+        # Short sleeps with jitter so queued callers don't retry in lockstep
+        time.sleep(min(wait, 1.0) + random.uniform(0, 0.05))
+
+
+def penalize(upstream: str, seconds: float = DEFAULT_PENALTY) -> None:
+    """Pause all callers of `upstream` for `seconds`, e.g. after a 429."""
+    print(f"[RateLimit] {upstream}: rate limited upstream, pausing {seconds:.1f}s")
+    client = get_redis()
+    if client is not None:
+        try:
+            now_s, now_us = client.time()
+            until = now_s + now_us / 1e6 + seconds
+            client.set(BLOCKED_KEY.format(upstream=upstream), until, ex=int(seconds) + 1)
+            return
+        except redis.RedisError as e:
+            print(f"[RateLimit] Could not record pause for {upstream}: {e}")
+    _local.penalize(upstream, seconds)
+
+
+def retry_after_seconds(error: Exception, default: float = DEFAULT_PENALTY) -> float:
+    """Retry-After from an HTTP error's response, if the upstream sent one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or default)
+    except (TypeError, ValueError):
+        return default
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or type(error).__name__ == "RateLimitError"
+
+
+class RateLimitCallback(BaseCallbackHandler, BaseRateLimiter):
+    """
+    Queue LangChain model calls on the shared buckets.
+    Attach to a chat model as both `callbacks=[limiter]` and `rate_limiter=limiter`.
+    The callback sizes the prompt (plus an estimate for the completion), and
+    LangChain calls acquire() only after its LLM cache lookup, so calls
+    answered from a replay cassette take no tokens.
+
+    Prompt costs are handed over in a ContextVar rather than per thread:
+    agent coroutines on the server share the event-loop thread, but each runs
+    in its own task context.
+    """
+
+    # Run in the caller's task or thread, so the ContextVar set here is the one acquire() reads
+    run_inline = True
+
+    def __init__(self, upstream: str = "openai", completion_tokens: int = COMPLETION_TOKEN_ESTIMATE):
+        self.upstream = upstream
+        self.completion_tokens = completion_tokens
+        # (run_id, tokens) of started runs that haven't acquired yet, oldest first.
+        # Always replaced, never mutated, so contexts copied into tasks stay independent.
+        self._pending: ContextVar[Tuple[Tuple[Any, int], ...]] = ContextVar(
+            f"rate_limit_pending_{upstream}", default=()
+        )
+
+    def _cost(self, texts: List[str]) -> int:
+        from prompts.packing import count_tokens
+        return sum(count_tokens(text) for text in texts) + self.completion_tokens
+
+    def _next_cost(self) -> int:
+        pending = self._pending.get()
+        if not pending:
+            return self.completion_tokens
+        self._pending.set(pending[1:])
+        return pending[0][1]
+
+    def _discard(self, run_id) -> None:
+        pending = self._pending.get()
+        if any(run == run_id for run, _ in pending):
+            self._pending.set(tuple(entry for entry in pending if entry[0] != run_id))
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        acquire(self.upstream, tokens=self._next_cost())
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        tokens = self._next_cost()
+        await asyncio.to_thread(acquire, self.upstream, tokens)
+        return True
+
+    def on_chat_model_start(self, serialized, messages, *, run_id=None, **kwargs) -> None:
+        tokens = self._cost([m.content for batch in messages for m in batch if isinstance(m.content, str)])
+        self._pending.set(self._pending.get() + ((run_id, tokens),))
+
+    def on_llm_start(self, serialized, prompts, **kwargs) -> None:
+        # Completion models have no rate_limiter hook; queue before the call
+        acquire(self.upstream, tokens=self._cost(list(prompts)))
+
+    def on_llm_end(self, response, *, run_id=None, **kwargs) -> None:
+        # Served from the cache: never acquired
+        self._discard(run_id)
+
+    def on_llm_error(self, error, *, run_id=None, **kwargs) -> None:
+        self._discard(run_id)
+        if is_rate_limit_error(error):
+            penalize(self.upstream, retry_after_seconds(error))
+
+
+openai_limiter = RateLimitCallback("openai")
@@ -0,0 +1,38 @@
+import os
+import threading
+import time
+from typing import Optional
+
+import redis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+RETRY_SECONDS = 30  # how long to wait before retrying an unreachable server
+
+_client: Optional[redis.Redis] = None
+_last_failure = 0.0
+_lock = threading.Lock()
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """
+    Return a shared Redis client, or None if the server isn't reachable.
+    Callers fall back to process-local state when this returns None.
+    """
+    global _client, _last_failure
+    with _lock:
+        if _client is not None:
+            return _client
+        if time.monotonic() - _last_failure < RETRY_SECONDS:
+            return None
+        try:
+            client = redis.Redis.from_url(REDIS_URL, socket_connect_timeout=1, socket_timeout=2)
+            client.ping()
+        except redis.RedisError as e:
+            print(f"[Redis] Unavailable at {REDIS_URL}: {e} — using in-process fallback")
+            _last_failure = time.monotonic()
+            return None
+        _client = client
+        return _client
@@ -0,0 +1,146 @@
+"""
+Cascaded headline relevance: embedding similarity first, LLM judge second.
+
+The cosine similarity between a headline's stored embedding and the topic's
+embedding settles the clear cases locally:
+    similarity >= RELEVANCE_ACCEPT  → relevant
+    similarity <= RELEVANCE_REJECT  → not relevant
+Only headlines in between go to the LLM judge. A sample of local decisions
+(RELEVANCE_AUDIT_RATE) is also sent to the judge, and so are any already in
+the judge's cache since those cost nothing. This measures how often the local
+decision agrees with the LLM; whenever the judge has ruled, its verdict is the
+one returned, and the local guess only feeds the agreement stats.
+calibrate() suggests thresholds from the similarity/verdict pairs the judge has produced.
+"""
+import os
+import random
+import threading
+from collections import Counter, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+RELEVANCE_ACCEPT = float(os.getenv("RELEVANCE_ACCEPT", "0.86"))
+RELEVANCE_REJECT = float(os.getenv("RELEVANCE_REJECT", "0.76"))
+AUDIT_RATE = float(os.getenv("RELEVANCE_AUDIT_RATE", "0.05"))
+MAX_OBSERVATIONS = 2000
+MAX_TOPICS = 256
+
+_topic_vectors: Dict[str, np.ndarray] = {}
+_lock = threading.Lock()
+_stats: Counter = Counter()
+_observations: Deque[Tuple[float, bool]] = deque(maxlen=MAX_OBSERVATIONS)  # (similarity, LLM verdict)
+
+
+def topic_embedding(store, topic: str) -> Optional[np.ndarray]:
+    """The topic's embedding from the store's own model, cached per topic."""
+    key = topic.strip().lower()
+    with _lock:
+        if key in _topic_vectors:
+            return _topic_vectors[key]
+    try:
+        vector = store._embed_query(topic)
+    except Exception as e:
+        print(f"[Relevance] Topic embedding failed: {e}")
+        return None
+    vector = np.asarray(vector, dtype=np.float32)
+    with _lock:
+        if len(_topic_vectors) >= MAX_TOPICS:
+            _topic_vectors.pop(next(iter(_topic_vectors)))
+        _topic_vectors[key] = vector
+    return vector
+
+
+def cosine(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> Optional[float]:
+    if a is None or b is None:
+        return None
+    norm = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(np.dot(a, b) / norm) if norm else None
+
+
+def local_verdict(similarity: Optional[float]) -> Optional[bool]:
+    """True/False when the similarity is outside the ambiguous band, else None."""
+    if similarity is None:
+        return None
+    if similarity >= RELEVANCE_ACCEPT:
+        return True
+    if similarity <= RELEVANCE_REJECT:
+        return False
+    return None
+
+
+def judge_with_cascade(
+    similarity: Optional[float],
+    judge: Callable[[], bool],
+    judge_is_cached: Callable[[], bool] = lambda: False,
+    audit_rate: float = AUDIT_RATE,
+) -> Tuple[bool, str]:
+    """
+    Decide relevance, calling `judge` (the LLM) only for ambiguous similarities,
+    audits, and headlines it has already ruled on (`judge_is_cached`).
+    Returns (verdict, source), where source is "accept" or "reject" for local
+    decisions and "llm" whenever the judge's verdict was used.
+    """
+    verdict = local_verdict(similarity)
+    cached = judge_is_cached()
+    with _lock:
+        _stats["checked"] += 1
+
+    if verdict is None:
+        llm = judge()
+        with _lock:
+            _stats["llm"] += 1
+            _stats["llm_calls"] += int(not cached)
+            if similarity is not None:
+                _observations.append((similarity, llm))
+        return llm, "llm"
+
+    source = "accept" if verdict else "reject"
+    with _lock:
+        _stats[source] += 1
+
+    if not cached and random.random() >= audit_rate:
+        return verdict, source
+
+    llm = judge()
+    with _lock:
+        _stats["audited"] += 1
+        _stats["llm_calls"] += int(not cached)
+        _stats["agreed"] += int(llm == verdict)
+        _observations.append((similarity, llm))
+    return llm, "llm"
+
+
+def calibrate(observations: List[Tuple[float, bool]], target: float = 0.95,
+              min_samples: int = 20) -> Optional[Dict[str, float]]:
+    """
+    Suggest thresholds from (similarity, LLM verdict) pairs.
+    `accept` lets through at most 1 - `target` of the headlines the LLM called
+    irrelevant. `reject` drops at most 1 - `target` of the ones it called
+    relevant. If the classes separate cleanly, both meet in the middle and no
+    ambiguous band is left. None when either class has too few samples.
+    """
+    positives = np.array([s for s, v in observations if v])
+    negatives = np.array([s for s, v in observations if not v])
+    if min(len(positives), len(negatives)) < min_samples // 2:
+        return None
+    accept = float(np.quantile(negatives, target))
+    reject = float(np.quantile(positives, 1 - target))
+    if reject > accept:
+        accept = reject = (accept + reject) / 2
+    return {"accept": round(accept, 4), "reject": round(reject, 4)}
+
+
+def relevance_stats() -> Dict[str, float]:
+    """Process-wide cascade counters, LLM calls avoided and agreement with the LLM."""
+    with _lock:
+        stats = dict(_stats)
+        observations = list(_observations)
+    checked = stats.get("checked", 0)
+    audited = stats.get("audited", 0)
+    # Share of checks that didn't cost a judge call (cached verdicts are free)
+    stats["llm_avoided"] = round(1 - stats.get("llm_calls", 0) / checked, 3) if checked else 0.0
+    stats["agreement"] = round(stats.get("agreed", 0) / audited, 3) if audited else None
+    stats["thresholds"] = {"accept": RELEVANCE_ACCEPT, "reject": RELEVANCE_REJECT}
+    stats["suggested_thresholds"] = calibrate(observations)
+    return stats
@@ -0,0 +1,335 @@
+"""
+Record/replay for upstream calls (yfinance, NewsAPI, embeddings, chat completions).
+
+Each boundary goes through call(), which looks the request up in the active
+cassette, a gzip JSONL file with one line per upstream call:
+
+    {"kind": "yfinance.history", "key": "<sha1 of kind + request>",
+     "request": {...}, "response": ..., "ms": 412}
+
+REPLAY_MODE picks the behaviour:
+    off     call upstream, record nothing (default)
+    record  call upstream and write every call, errors included, to a new cassette
+    replay  answer only from the cassette; a call that was never recorded raises CassetteMiss
+    auto    replay recorded calls, go upstream for the rest and append them
+
+Identical requests play back in recorded order, and the last response
+repeats once they run out. A session recorded in production
+(REPLAY_MODE=record) can then be replayed offline with REPLAY_MODE=replay
+REPLAY_CASSETTE=<file>, without network access or rate limiting.
+"""
+import atexit
+import base64
+import gzip
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from langchain_community.embeddings import OpenAIEmbeddings
+from langchain_core.caches import BaseCache
+from langchain_core.embeddings import Embeddings
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_core.load import dumpd, load
+
+load_dotenv()
+
+MODES = ("off", "record", "replay", "auto")
+REPLAY_MODE = os.getenv("REPLAY_MODE", "off").lower()
+REPLAY_DIR = os.getenv("REPLAY_DIR", "cassettes")
+REPLAY_CASSETTE = os.getenv("REPLAY_CASSETTE")
+
+
+class CassetteMiss(LookupError):
+    """A replay-only cassette has no recording for this request."""
+
+
+class ReplayedError(RuntimeError):
+    """An upstream error recorded in the cassette, raised again on replay."""
+
+
+def request_key(kind: str, request: Any) -> str:
+    payload = json.dumps({"kind": kind, "request": request}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Recorded calls from one gzip JSONL file, plus a writer for new ones."""
+
+    def __init__(self, path: str, mode: str):
+        if mode not in MODES or mode == "off":
+            raise ValueError(f"Cassette mode must be one of record/replay/auto, got '{mode}'")
+        self.path = path
+        self.mode = mode
+        self._entries: Dict[str, List[dict]] = {}
+        self._cursor: Counter = Counter()
+        self._out = None
+        self._lock = threading.Lock()
+        if mode != "record" and os.path.exists(path):
+            self._load()
+
+    def _load(self) -> None:
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry["key"], []).append(entry)
+        except EOFError:
+            # A recorder that died without closing leaves a truncated final block
+            pass
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def play(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            position = min(self._cursor[key], len(entries) - 1)
+            self._cursor[key] += 1
+            return entries[position]
+
+    def record(self, entry: dict) -> None:
+        line = json.dumps(entry, separators=(",", ":"), default=str)
+        with self._lock:
+            self._entries.setdefault(entry["key"], []).append(entry)
+            self._cursor[entry["key"]] += 1
+            if self._out is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._out = gzip.open(self.path, "wt" if self.mode == "record" else "at", encoding="utf-8")
+            self._out.write(line + "\n")
+            self._out.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._out is not None:
+                self._out.close()
+                self._out = None
+
+
+_active: Optional[Cassette] = None
+_active_lock = threading.Lock()
+
+
+def _session_cassette() -> Optional[Cassette]:
+    """The process-wide cassette configured by REPLAY_MODE / REPLAY_CASSETTE."""
+    if REPLAY_MODE not in MODES:
+        print(f"[Replay] Unknown REPLAY_MODE '{REPLAY_MODE}', recording disabled")
+        return None
+    if REPLAY_MODE == "off":
+        return None
+    path = REPLAY_CASSETTE
+    if path is None:
+        if REPLAY_MODE == "replay":
+            print("[Replay] REPLAY_MODE=replay needs REPLAY_CASSETTE, recording disabled")
+            return None
+        path = os.path.join(REPLAY_DIR, f"session-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl.gz")
+    cassette = Cassette(path, REPLAY_MODE)
+    atexit.register(cassette.close)
+    print(f"[Replay] {REPLAY_MODE} → {path} ({len(cassette)} recorded calls)")
+    return cassette
+
+
+def active_cassette() -> Optional[Cassette]:
+    return _active
+
+
+def is_replaying() -> bool:
+    """True when no call may reach the upstream services."""
+    return _active is not None and _active.mode == "replay"
+
+
+@contextmanager
+def use_cassette(path: str, mode: str = "auto"):
+    """Route upstream calls through the cassette at `path` for the duration of the block."""
+    global _active
+    cassette = Cassette(path, mode)
+    with _active_lock:
+        previous, _active = _active, cassette
+        installed = _install_llm_cache()
+    try:
+        yield cassette
+    finally:
+        cassette.close()
+        with _active_lock:
+            _active = previous
+            if installed and previous is None:
+                set_llm_cache(None)
+
+
+def call(kind: str, request: Any, fn: Callable[[], Any],
+         encode: Callable[[Any], Any] = lambda value: value,
+         decode: Callable[[Any], Any] = lambda value: value) -> Any:
+    """
+    Run `fn` (the live upstream call for `request`) through the active cassette.
+    `encode`/`decode` convert the response to and from JSON-compatible data.
+    In auto mode errors are not recorded, so a transient outage is never
+    baked into a cassette.
+    """
+    cassette = _active
+    if cassette is None:
+        return fn()
+
+    key = request_key(kind, request)
+    if cassette.mode != "record":
+        entry = cassette.play(key)
+        if entry is not None:
+            if "error" in entry:
+                raise ReplayedError(entry["error"])
+            return decode(entry["response"])
+        if cassette.mode == "replay":
+            raise CassetteMiss(f"No recorded {kind} call for {json.dumps(request, default=str)[:200]} "
+                               f"in {cassette.path}")
+
+    started = time.perf_counter()
+    entry = {"kind": kind, "key": key, "request": request}
+    try:
+        result = fn()
+    except Exception as e:
+        if cassette.mode == "record":
+            entry.update(error=f"{type(e).__name__}: {e}", ms=round((time.perf_counter() - started) * 1000))
+            cassette.record(entry)
+        raise
+    entry.update(response=encode(result), ms=round((time.perf_counter() - started) * 1000))
+    cassette.record(entry)
+    return result
+
+
+def replayable(kind: str, encode: Callable[[Any], Any] = lambda value: value,
+               decode: Callable[[Any], Any] = lambda value: value):
+    """Decorator form of call(); the request is the function's bound arguments."""
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return call(kind, dict(bound.arguments), lambda: fn(*args, **kwargs), encode, decode)
+
+        return wrapper
+    return decorator
+
+
+# === Codecs ===
+
+def encode_frame(frame: pd.DataFrame) -> dict:
+    """A DataFrame with a (possibly tz-aware) DatetimeIndex as plain JSON."""
+    index = frame.index
+    tz = getattr(index, "tz", None)
+    return {
+        "index": [ts.isoformat() for ts in index],
+        "index_name": index.name,
+        "tz": str(tz) if tz is not None else None,
+        "columns": [str(c) for c in frame.columns],
+        "data": frame.astype(object).where(frame.notna(), None).values.tolist(),
+    }
+
+
+def decode_frame(payload: dict) -> pd.DataFrame:
+    if payload["tz"]:
+        index = pd.to_datetime(payload["index"], utc=True).tz_convert(payload["tz"])
+    else:
+        index = pd.to_datetime(payload["index"])
+    index.name = payload["index_name"]
+    frame = pd.DataFrame(payload["data"], index=index, columns=payload["columns"])
+    return frame.infer_objects()
+
+
+def encode_vectors(vectors: Sequence[Sequence[float]]) -> List[str]:
+    """Embedding vectors as base64 float32, about a quarter of their JSON size."""
+    return [base64.b64encode(np.asarray(v, dtype=np.float32).tobytes()).decode("ascii") for v in vectors]
+
+
+def decode_vectors(encoded: List[str]) -> List[List[float]]:
+    return [np.frombuffer(base64.b64decode(v), dtype=np.float32).tolist() for v in encoded]
+
+
+# === Embeddings ===
+
+class ReplayEmbeddings(Embeddings):
+    """Embeddings client whose calls go through the active cassette."""
+
+    def __init__(self, inner: Embeddings):
+        self.inner = inner
+        self.model = getattr(inner, "model", type(inner).__name__)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return call("embeddings.documents", {"model": self.model, "texts": list(texts)},
+                    lambda: self.inner.embed_documents(texts), encode_vectors, decode_vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        return call("embeddings.query", {"model": self.model, "text": text},
+                    lambda: [self.inner.embed_query(text)], encode_vectors, decode_vectors)[0]
+
+
+def wrap_embeddings(embeddings: Embeddings) -> Embeddings:
+    """Route an OpenAI embeddings client through the cassette; other embeddings are local and left as is."""
+    if isinstance(embeddings, OpenAIEmbeddings):
+        return ReplayEmbeddings(embeddings)
+    return embeddings
+
+
+# === Chat models ===
+
+class ReplayLLMCache(BaseCache):
+    """
+    LangChain's LLM cache hook, used to record and replay every chat model
+    call (ChatOpenAI and friends) without wrapping each model.
+    """
+
+    KIND = "chat"
+
+    def lookup(self, prompt: str, llm_string: str):
+        cassette = _active
+        if cassette is None or cassette.mode == "record":
+            return None
+        key = request_key(self.KIND, {"prompt": prompt, "llm": llm_string})
+        entry = cassette.play(key)
+        if entry is not None:
+            return [load(generation) for generation in entry["response"]]
+        if cassette.mode == "replay":
+            raise CassetteMiss(f"No recorded chat call for {prompt[:200]} in {cassette.path}")
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        cassette = _active
+        if cassette is None:
+            return
+        request = {"prompt": prompt, "llm": llm_string}
+        cassette.record({
+            "kind": self.KIND,
+            "key": request_key(self.KIND, request),
+            "request": request,
+            "response": [dumpd(generation) for generation in return_val],
+        })
+
+    def clear(self, **kwargs) -> None:
+        pass
+
+
+def _install_llm_cache() -> bool:
+    """
+    Route chat models through the cassette while one is active. LangChain's
+    global LLM cache is left alone when the app configured its own.
+    """
+    if get_llm_cache() is None:
+        set_llm_cache(ReplayLLMCache())
+        return True
+    return False
+
+
+_active = _session_cassette()
+if _active is not None:
+    _install_llm_cache()
@@ -2,7 +2,10 @@ from langchain.chat_models import ChatOpenAI
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
 
-llm = ChatOpenAI(temperature=0)
+from tools.rate_limiter import openai_limiter
+from tools.cache import cached
+
+llm = ChatOpenAI(temperature=0, callbacks=[openai_limiter], rate_limiter=openai_limiter)
 
 # Use a prompt like:
 prompt = PromptTemplate(
@@ -22,6 +25,7 @@ Company Name:"""
 
 resolve_chain = LLMChain(llm=llm, prompt=prompt)
 
+@cached("resolve", key=lambda input: input.strip().upper(), cacheable=bool)
 def resolve_company_name(input: str) -> str:
     result = resolve_chain.run({"input": input.strip()})
     return result.strip()
\ No newline at end of file
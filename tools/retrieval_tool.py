@@ -3,7 +3,14 @@ from typing import List, Dict, Tuple
 from langchain.embeddings import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain.schema import Document
+import os
+import numpy as np
 from tools.vector_store import load_vector_store
+from tools.dedupe import collapse_results
+from tools.replay import wrap_embeddings
+
+# Extra candidates fetched so near-duplicates can be collapsed without losing k
+DEDUPE_OVERFETCH = int(os.getenv("DEDUPE_OVERFETCH", "3"))
 
 def init_vector_store(docs: List[Dict]):
     """
@@ -13,7 +20,7 @@ def init_vector_store(docs: List[Dict]):
     - url (optional)
     - published_at (optional)
     """
-    embeddings = OpenAIEmbeddings()
+    embeddings = wrap_embeddings(OpenAIEmbeddings())
     # build Document objects with explicit metadata
     documents = [
         Document(
@@ -22,7 +29,8 @@ def init_vector_store(docs: List[Dict]):
                 "id": doc.get("id", doc["title"]),
                 "description": doc.get("description", ""),
                 "url": doc.get("url", ""),
-                "published_at": doc.get("published_at", "")
+                "published_at": doc.get("published_at", ""),
+                **({"cluster_id": doc["cluster_id"]} if doc.get("cluster_id") else {})
             }
         )
         for doc in docs
@@ -49,6 +57,39 @@ def retrieve(vector_store: FAISS, query: str, k: int = 5) -> List[Tuple[str, flo
     return vector_store.similarity_search_with_score(query, k=k)
 
 
+def retrieve_distinct(vector_store: FAISS, query: str, k: int = 5) -> List[Tuple[str, float]]:
+    """
+    Like `retrieve`, but syndicated copies of one story take a single slot:
+    fetches k * DEDUPE_OVERFETCH candidates and keeps the best of each cluster.
+    """
+    results = retrieve(vector_store, query, k=k * DEDUPE_OVERFETCH)
+    return collapse_results(results, k=k)
+
+
+def retrieve_with_vectors(vector_store: FAISS, query: str, k: int = 5) -> List[Tuple[Document, float, np.ndarray]]:
+    """
+    retrieve_distinct() that also returns each hit's stored embedding
+    (reconstructed from the index), so callers can score hits against another
+    text without re-embedding the headlines.
+    """
+    query_vector = np.array([vector_store._embed_query(query)], dtype=np.float32)
+    distances, positions = vector_store.index.search(query_vector, k * DEDUPE_OVERFETCH)
+
+    results = []
+    for distance, pos in zip(distances[0], positions[0]):
+        if pos == -1:
+            continue
+        doc = vector_store.docstore.search(vector_store.index_to_docstore_id[int(pos)])
+        if not isinstance(doc, Document):
+            continue
+        try:
+            vector = vector_store.index.reconstruct(int(pos))
+        except RuntimeError:
+            vector = None  # index type without reconstruction support
+        results.append((doc, float(distance), vector))
+    return collapse_results(results, k=k)
+
+
 def merge_vector_stores(store1: FAISS, store2: FAISS) -> FAISS:
     """
     Merges two FAISS vector stores in place.
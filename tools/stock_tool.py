@@ -1,10 +1,15 @@
 # Fetches live stock data (price, 30‑day history, key metrics) via yfinance.
-# Implements simple in‑memory caching to reduce redundant API calls.
+# Quotes are cached in the shared two-tier cache (tools.cache), so a hot ticker
+# costs one yfinance call per TTL across all replicas.
 # Returns raw Python dicts for downstream LLM consumption.
 
 import yfinance as yf
 from typing import Optional
 
+from tools.rate_limiter import acquire
+from tools.cache import cached
+from tools.replay import replayable, encode_frame, decode_frame
+
 def _human_format(num: Optional[float]) -> str:
     """Convert large numbers to human-friendly strings (e.g. 1.2B, 5.6M)."""
     if num is None:
@@ -16,6 +21,17 @@ def _human_format(num: Optional[float]) -> str:
         num /= 1000.0
     return f"{num:.1f}{units[magnitude]}"
 
+@replayable("yfinance.info")
+def _ticker_info(ticker: str) -> dict:
+    acquire("yfinance")
+    return yf.Ticker(ticker).info
+
+@replayable("yfinance.history", encode=encode_frame, decode=decode_frame)
+def _ticker_history(ticker: str, period: str):
+    acquire("yfinance")
+    return yf.Ticker(ticker).history(period=period)
+
+@cached("quote", key=lambda ticker: ticker.strip().upper(), cacheable=lambda data: "error" not in data)
 def fetch_stock_data(ticker: str) -> dict:
     """
     Fetch data from yfinance and compute:
@@ -34,14 +50,13 @@ def fetch_stock_data(ticker: str) -> dict:
     ticker = ticker.strip().upper()
 
     try:
-        tkr = yf.Ticker(ticker)
-        info = tkr.info
+        info = _ticker_info(ticker)
     except Exception as e:
         return {"error": f"Failed to fetch data for '{ticker}': {e}"}
 
     # Now fetch history
     try:
-        hist = tkr.history(period="31d")
+        hist = _ticker_history(ticker, "31d")
     except Exception as e:
         return {"error": f"Failed to fetch history for '{ticker}': {e}"}
 
@@ -80,22 +95,38 @@ def fetch_stock_data(ticker: str) -> dict:
     high            = info.get("dayHigh")
     day_range_str   = f"${low:.2f}–${high:.2f}"
 
-    # Market cap & P/E
-    mc              = info.get("marketCap", 0)
-    market_cap_str  = f"${_human_format(mc)}"
-    pe_ratio        = info.get("trailingPE") or info.get("forwardPE") or 0.0
-    pe_ratio_str    = f"{pe_ratio:.1f}×"
-
     return {
-        "ticker":       ticker.upper(),
-        "name":         info.get("longName") or info.get("shortName"),
+        **_info_fields(ticker, info),
         "current_price": f"{current_price:.2f}",
         "pct_change":    f"{pct_change:+.2f}%",
         "trend_30d":     f"{trend_30d_pct:+.2f}%",
         "volume":        vol_str,
         "bid_ask":       bid_ask_str,
         "day_range":     day_range_str,
-        "market_cap":    market_cap_str,
-        "pe_ratio":      pe_ratio_str,
         "history_30d":   history_30d,  # still available if you need raw for other uses
-    }
\ No newline at end of file
+    }
+
+def _info_fields(ticker: str, info: dict) -> dict:
+    """Name, market cap & P/E from a yfinance info dict."""
+    mc              = info.get("marketCap", 0)
+    pe_ratio        = info.get("trailingPE") or info.get("forwardPE") or 0.0
+    return {
+        "ticker":       ticker.upper(),
+        "name":         info.get("longName") or info.get("shortName"),
+        "market_cap":   f"${_human_format(mc)}",
+        "pe_ratio":     f"{pe_ratio:.1f}×",
+    }
+
+@cached("info", key=lambda ticker: ticker.strip().upper(), cacheable=lambda data: "error" not in data)
+def fetch_stock_info(ticker: str) -> dict:
+    """
+    Name, market cap and P/E only: one yfinance call, for callers that get
+    prices elsewhere (the comparison engine's batched download).
+    Returns {"error": "..."} on failure.
+    """
+    ticker = ticker.strip().upper()
+    try:
+        info = _ticker_info(ticker)
+    except Exception as e:
+        return {"ticker": ticker, "error": f"Failed to fetch data for '{ticker}': {e}"}
+    return _info_fields(ticker, info)
\ No newline at end of file
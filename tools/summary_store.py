@@ -0,0 +1,126 @@
+"""
+Precomputed watchlist summaries and per-namespace headline change signals.
+
+Summaries live in Redis (shared by all replicas) with an in-process fallback.
+ingest_headlines_for_ticker() bumps a namespace's headline version whenever it
+indexes new articles; a stored summary is only served while the version it was
+built from is still current, the refresher has confirmed it within the last few
+refresh intervals, and the live price hasn't moved past the refresh threshold.
+"""
+import json
+import os
+import time
+from typing import Dict, Optional
+
+import redis
+from dotenv import load_dotenv
+
+from tools.redis_client import get_redis
+
+load_dotenv()
+
+SUMMARY_KEY = "watchlist:summary:{ticker}"
+VERSION_KEY = "headlines:version:{namespace}"
+REFRESH_SECONDS = int(os.getenv("WATCHLIST_REFRESH_SECONDS", "300"))
+PRICE_THRESHOLD_PCT = float(os.getenv("WATCHLIST_PRICE_THRESHOLD_PCT", "1.0"))
+# A summary the refresher hasn't confirmed for this many intervals is stale (refresher stopped or behind)
+MAX_SUMMARY_AGE = int(os.getenv("WATCHLIST_MAX_AGE_REFRESHES", "3")) * REFRESH_SECONDS
+
+# In-process fallback when Redis is unavailable
+_local_summaries: Dict[str, dict] = {}
+_local_versions: Dict[str, int] = {}
+
+
+def bump_headline_version(namespace: str, new_headlines: int) -> int:
+    """Signal that `new_headlines` articles landed in a namespace. Returns the new version."""
+    namespace = namespace.upper()
+    if new_headlines <= 0:
+        return get_headline_version(namespace)
+
+    client = get_redis()
+    if client is not None:
+        try:
+            return int(client.incr(VERSION_KEY.format(namespace=namespace)))
+        except redis.RedisError as e:
+            print(f"[SummaryStore] Version bump failed for {namespace}: {e}")
+
+    _local_versions[namespace] = _local_versions.get(namespace, 0) + 1
+    return _local_versions[namespace]
+
+
+def get_headline_version(namespace: str) -> int:
+    namespace = namespace.upper()
+    client = get_redis()
+    if client is not None:
+        try:
+            return int(client.get(VERSION_KEY.format(namespace=namespace)) or 0)
+        except redis.RedisError:
+            pass
+    return _local_versions.get(namespace, 0)
+
+
+def price_moved(old_price: Optional[float], price: float, threshold_pct: float = PRICE_THRESHOLD_PCT) -> bool:
+    return bool(old_price) and abs(price - old_price) / old_price * 100 >= threshold_pct
+
+
+def save_summary(ticker: str, summary: str, price: float, headline_version: int) -> dict:
+    now = time.time()
+    return _store_record({
+        "ticker": ticker.upper(),
+        "summary": summary,
+        "price": price,
+        "headline_version": headline_version,
+        "generated_at": now,
+        "checked_at": now,
+    })
+
+
+def touch_summary(record: dict) -> dict:
+    """Mark a stored summary as confirmed current by the refresher."""
+    return _store_record({**record, "checked_at": time.time()})
+
+
+def _store_record(record: dict) -> dict:
+    ticker = record["ticker"]
+    client = get_redis()
+    if client is not None:
+        try:
+            client.set(SUMMARY_KEY.format(ticker=ticker), json.dumps(record), ex=MAX_SUMMARY_AGE)
+            return record
+        except redis.RedisError as e:
+            print(f"[SummaryStore] Save failed for {ticker}: {e}")
+    _local_summaries[ticker] = record
+    return record
+
+
+def load_summary_record(ticker: str) -> Optional[dict]:
+    ticker = ticker.upper()
+    client = get_redis()
+    if client is not None:
+        try:
+            raw = client.get(SUMMARY_KEY.format(ticker=ticker))
+            return json.loads(raw) if raw else None
+        except redis.RedisError:
+            pass
+    return _local_summaries.get(ticker)
+
+
+def get_precomputed_summary(ticker: str, current_price: Optional[float] = None) -> Optional[str]:
+    """
+    Return the stored summary for a ticker if it is still valid: built from
+    the current headline version, confirmed by the refresher within
+    MAX_SUMMARY_AGE, and (when `current_price` is given) with a price that
+    hasn't moved past PRICE_THRESHOLD_PCT since.
+    """
+    record = load_summary_record(ticker)
+    if not record:
+        return None
+    if time.time() - record.get("checked_at", record["generated_at"]) > MAX_SUMMARY_AGE:
+        print(f"[SummaryStore] {ticker.upper()}: stored summary not refreshed within {MAX_SUMMARY_AGE}s")
+        return None
+    if record["headline_version"] != get_headline_version(ticker):
+        return None
+    if current_price is not None and price_moved(record.get("price"), current_price):
+        print(f"[SummaryStore] {ticker.upper()}: price moved since the stored summary")
+        return None
+    return record["summary"]
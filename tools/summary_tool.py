@@ -1,15 +1,25 @@
 # tools/summary_tool.py
+import contextvars
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from datetime import datetime
 from typing import Dict, List
 
 from openai import OpenAI, RateLimitError
-from tools.vector_store import load_vector_store
+from openai.types.chat import ChatCompletion
+from tools.vector_store import get_vector_store
 from tools.resolve_tool import resolve_company_name
-from tools.retrieval_tool import retrieve
+from tools.retrieval_tool import retrieve_distinct
 from prompts.templates import PROMPTS
+from prompts.packing import pack_headlines, pack_sections, HEADLINE_TOKEN_BUDGET, COMPARISON_TOKEN_BUDGET, NO_HEADLINES
+from prompts.comparison_template import COMPARISON_TEMPLATE
+from tools.comparison_tool import compare_closes, correlation_table, load_closes, metrics_table, snapshot_from_closes
 from tools.news_tool import extract_keywords_from_query, contains_all_keywords
+from tools.stock_tool import fetch_stock_info
+from tools.rate_limiter import RateLimitTimeout, acquire, penalize, retry_after_seconds
+from tools.replay import call as replay_call
+from prompts.packing import count_tokens
 
 # Load environment variables
 load_dotenv()
@@ -19,12 +29,54 @@ client = OpenAI(
     base_url=os.getenv("OPENAI_API_BASE")
 )
 
+# Retries after a 429 before the error reaches the caller
+MAX_RATE_LIMIT_RETRIES = int(os.getenv("OPENAI_RATE_LIMIT_RETRIES", "3"))
+
 DEFAULT_TODAY = datetime.today().strftime("%B %d, %Y")
 
-def get_relevant_headlines(ticker: str, query: str = "", k: int = 5) -> List[str]:
-    store = load_vector_store(ticker)
+# Candidates retrieved per ticker before packing into the headline budget
+HEADLINE_CANDIDATES = int(os.getenv("SUMMARY_HEADLINE_CANDIDATES", "10"))
+
+# Headlines per ticker added to the comparison prompt
+COMPARISON_HEADLINES_PER_TICKER = int(os.getenv("COMPARISON_HEADLINES_PER_TICKER", "2"))
+
+# Per-ticker info and headline lookups for a comparison run on a bounded pool
+_comparison_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("COMPARISON_WORKERS", "8")), thread_name_prefix="comparison"
+)
+
+def _create_completion(**kwargs):
+    """
+    chat.completions.create() queued on the shared OpenAI rate limiter.
+    A 429 pauses every caller for the upstream's Retry-After, then retries.
+    Goes through the replay cassette when one is active.
+    """
+    return replay_call(
+        "openai.chat_completion", kwargs, lambda: _create_completion_live(**kwargs),
+        encode=lambda response: response.model_dump(mode="json"),
+        decode=ChatCompletion.model_validate,
+    )
+
+def _create_completion_live(**kwargs):
+    prompt_tokens = sum(count_tokens(m["content"]) for m in kwargs["messages"])
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        acquire("openai", tokens=prompt_tokens + kwargs.get("max_tokens", 0))
+        try:
+            return client.chat.completions.create(**kwargs)
+        except RateLimitError as e:
+            if attempt == MAX_RATE_LIMIT_RETRIES:
+                raise
+            penalize("openai", retry_after_seconds(e))
+
+def get_relevant_headline_items(ticker: str, query: str = "", k: int = 5) -> List[Dict]:
+    """
+    Retrieve up to k headlines matching the query's primary keywords.
+    Each item carries title, description, url, published_at and its retrieval score.
+    """
+    store = get_vector_store(ticker)
     if not store:
-        return ["(No vector index found — please run ingestion first.)"]
+        print(f"[Headlines] No vector index found for {ticker} — please run ingestion first.")
+        return []
 
     # ✅ Always resolve company name
     resolved = resolve_company_name(ticker)
@@ -41,25 +93,40 @@ def get_relevant_headlines(ticker: str, query: str = "", k: int = 5) -> List[str
     secondary_query = " ".join(keyword_info.get("secondary_keywords", [])) or query
 
     # ✅ Search vector store
-    results = retrieve(store, query=secondary_query, k=k * 2)
-    headlines = []
+    results = retrieve_distinct(store, query=secondary_query, k=k * 2)
+    items = []
 
     for doc, score in results:
         title = doc.page_content
-        url = doc.metadata.get("url", "")
-        published = doc.metadata.get("published_at", "")
         description = doc.metadata.get("description", "")
         combined_text = f"{title} {description}"
 
         if not contains_all_keywords(combined_text, primary_keywords):
             continue
 
-        line = f"{title} ({published})\n{url}" if url else title
-        headlines.append(line)
+        items.append({
+            "title": title,
+            "description": description,
+            "url": doc.metadata.get("url", ""),
+            "published_at": doc.metadata.get("published_at", ""),
+            "score": float(score),
+        })
 
-        if len(headlines) >= k:
+        if len(items) >= k:
             break
 
+    return items
+
+
+def get_relevant_headlines(ticker: str, query: str = "", k: int = 5) -> List[str]:
+    if not get_vector_store(ticker):
+        return ["(No vector index found — please run ingestion first.)"]
+
+    headlines = []
+    for item in get_relevant_headline_items(ticker, query, k=k):
+        title, url = item["title"], item["url"]
+        headlines.append(f"{title} ({item['published_at']})\n{url}" if url else title)
+
     return headlines if headlines else ["(No relevant headlines found.)"]
 
 
@@ -67,18 +134,21 @@ def summarize_stock(
     data: dict,
     query: str = "",
     today: str = DEFAULT_TODAY,
-    model: str = "gpt-4.1-nano"
+    model: str = "gpt-4.1-nano",
+    headline_budget: int = HEADLINE_TOKEN_BUDGET
 ) -> str:
     """
     Summarize the stock data and retrieve headlines using FAISS based on filter_type.
+    Headlines are packed best-first into `headline_budget` tokens.
     """
-    headlines = get_relevant_headlines(data["ticker"], query)
+    items = get_relevant_headline_items(data["ticker"], query, k=HEADLINE_CANDIDATES)
 
-    # 1. Load prompt
+    # 1. Load prompt (static, so provider-side prompt caching can reuse it)
     system_prompt = PROMPTS["summary_template"]["prompt"].template
 
     # 2. Format input
-    headlines_text = "\n".join(f"- {h}" for h in headlines)
+    packed = pack_headlines(items, budget=headline_budget)
+    print(packed.report(f"{data.get('ticker')} headlines"))
     user_prompt = (
         f"ticker: {data.get('ticker')} ({data.get('name')})\n"
         f"date: {today}\n"
@@ -90,12 +160,12 @@ def summarize_stock(
         f"day_range: {data.get('day_range')}\n"
         f"market_cap: {data.get('market_cap')}\n"
         f"pe_ratio: {data.get('pe_ratio')}\n"
-        f"headlines:\n{headlines_text}\n"
+        f"headlines:\n{packed.text}\n"
     )
 
     # 3. LLM call
     try:
-        response = client.chat.completions.create(
+        response = _create_completion(
             model=model,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -106,37 +176,103 @@ def summarize_stock(
         )
         return response.choices[0].message.content.strip()
 
-    except RateLimitError:
+    except (RateLimitError, RateLimitTimeout):
         return "⚠️ OpenAI rate limit or API error."
 
+def _snapshot_table(tickers: List[str], snapshot: Dict[str, dict], info: Dict[str, dict]) -> str:
+    """Latest price and changes (from the batched closes) plus P/E and market cap per ticker."""
+    lines = ["ticker | price | day | 30d | P/E | mkt cap", "---|---|---|---|---|---"]
+    for ticker in tickers:
+        quote, fields = snapshot.get(ticker, {}), info.get(ticker, {})
+        price = quote.get("current_price")
+        lines.append(
+            f"{ticker} | {'$' + price if price else 'n/a'} | {quote.get('pct_change', 'n/a')} | "
+            f"{quote.get('trend_30d', 'n/a')} | {fields.get('pe_ratio', 'n/a')} | {fields.get('market_cap', 'n/a')}"
+        )
+    return "\n".join(lines)
+
+def _submit(fn, *args, **kwargs):
+    return _comparison_pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+def _result_or(future, default, label: str):
+    try:
+        return future.result()
+    except Exception as e:
+        print(f"[Comparison] {label} failed: {e}")
+        return default
+
 def summarize_stock_multiple(
-    data_items: List[Dict],
-    query: str = ""
+    tickers: List[str],
+    query: str = "",
+    comparison_budget: int = COMPARISON_TOKEN_BUDGET
 ) -> str:
     """
-    Summarizes multiple stocks by retrieving FAISS-based headlines for each and comparing.
+    Compare several stocks in a single LLM call.
+    Prices, returns, volatility, beta and correlations all come from one
+    batched price download. P/E, market cap and headlines are looked up per
+    ticker concurrently, and a couple of headlines per ticker share
+    `comparison_budget` tokens.
     """
-    individual_summaries = []
-    for d in data_items:
-        headlines = get_relevant_headlines(d["ticker"], query)
-        summary = summarize_stock(d, query=query)
-        individual_summaries.append(f"• {d['ticker']}: {summary}")
-
-    # Comparison prompt
-    prompt = (
-        "You are a financial analyst. Here are individual summaries:\n"
-        + "\n".join(individual_summaries)
-        + "\n\nNow compare and contrast their performance, trends, and key drivers "
-          "in a concise (≤150 words) analysis."
-    )
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    info_futures = {t: _submit(fetch_stock_info, t) for t in tickers}
+    headline_futures = {
+        t: _submit(get_relevant_headline_items, t, query, k=COMPARISON_HEADLINES_PER_TICKER) for t in tickers
+    }
 
-    resp = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2,
-        max_tokens=640,
+    closes = load_closes(tickers)
+    snapshot = snapshot_from_closes(closes, tickers) if closes is not None else {}
+    result = compare_closes(closes) if closes is not None else None
+    if not snapshot:
+        for future in (*info_futures.values(), *headline_futures.values()):
+            future.cancel()
+        return f"No price data found for {', '.join(tickers)}."
+
+    info = {}
+    for ticker, future in info_futures.items():
+        fields = _result_or(future, {}, f"{ticker} info")
+        if "error" not in fields:
+            info[ticker] = fields
+
+    headline_sections = {}
+    for ticker, future in headline_futures.items():
+        items = _result_or(future, [], f"{ticker} headlines")
+        if items:
+            headline_sections[ticker] = "; ".join(item["title"] for item in items)
+    packed = pack_sections(headline_sections, budget=comparison_budget)
+    print(packed.report("comparison headlines"))
+
+    if result is not None:
+        window = f"{result.start} to {result.end} ({result.observations} trading days), benchmark {result.benchmark or 'none'}"
+        metrics = metrics_table(result)
+        correlations = correlation_table(result)
+        if result.dropped:
+            metrics += f"\n(insufficient history: {', '.join(result.dropped)})"
+    missing = [t for t in tickers if t not in snapshot]
+    if missing:
+        print(f"[Comparison] No price data for {', '.join(missing)}")
+    else:
+        window = "unavailable"
+        metrics = correlations = "(price history unavailable)"
+
+    prompt = COMPARISON_TEMPLATE.format(
+        focus=query.strip() or "overall performance and risk",
+        window=window,
+        snapshot_table=_snapshot_table(tickers, snapshot, info),
+        metrics_table=metrics,
+        correlation_table=correlations,
+        headlines=packed.text or NO_HEADLINES,
     )
-    return resp.choices[0].message.content.strip()
+
+    try:
+        resp = _create_completion(
+            model="gpt-4o",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.2,
+            max_tokens=640,
+        )
+        return resp.choices[0].message.content.strip()
+    except (RateLimitError, RateLimitTimeout):
+        return "⚠️ OpenAI rate limit or API error."
 
 # Test
 # if __name__ == "__main__":
@@ -2,10 +2,57 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl  # cross-process writer lock (POSIX)
+except ImportError:  # pragma: no cover - Windows dev machines: in-process lock only
+    fcntl = None
+
+import faiss
 from langchain.embeddings import OpenAIEmbeddings
 from langchain.vectorstores import FAISS
 
+from tools.metadata_store import META_FILE, open_metadata, write_metadata
+from tools.replay import wrap_embeddings
+
 BASE_DIR = "vector_index"  # Can contain subfolders per ticker or category
+INDEX_FILE = "index.faiss"
+LEGACY_PICKLE_FILE = "index.pkl"
+
+# Versioned layout: vector_index/<namespace>/versions/<version>/{index.faiss, meta.sqlite}
+# with vector_index/<namespace>/CURRENT naming the live version. Writers build a
+# new version directory and swap CURRENT atomically; readers resolve CURRENT once
+# and only ever read that directory.
+VERSIONS_DIR = "versions"
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = ".writer.lock"
+KEEP_VERSIONS = int(os.getenv("VECTOR_INDEX_KEEP_VERSIONS", "3"))
+# Superseded versions younger than this are kept for readers that resolved them just before a swap
+GC_GRACE_SECONDS = float(os.getenv("VECTOR_INDEX_GC_GRACE_SECONDS", "300"))
+
+# Shared read-only stores map index.faiss instead of copying it, so every worker
+# process on a host reads the same page-cache pages. Version directories are
+# never rewritten in place, which is what makes mapping them safe.
+INDEX_MMAP = os.getenv("VECTOR_INDEX_MMAP", "1") == "1"
+# IO_FLAG_MMAP_IFC maps flat codes (faiss >= 1.10); older builds only map IVF lists
+_MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+# Pickled docstores can execute code when loaded; only read them when opted in
+ALLOW_LEGACY_PICKLE = os.getenv("ALLOW_LEGACY_PICKLE_INDEX", "0") == "1"
+
+# Process-level cache of loaded stores: namespace → (version, store)
+_store_cache: Dict[str, Tuple[str, FAISS]] = {}
+_store_cache_lock = threading.Lock()
+
+# Per-namespace writer locks; re-entrant within a thread
+_writer_locks: Dict[str, threading.RLock] = {}
+_writer_locks_guard = threading.Lock()
+_held = threading.local()
 
 def get_store_path(namespace: str) -> str:
     """
@@ -13,25 +60,187 @@ def get_store_path(namespace: str) -> str:
     """
     return os.path.join(BASE_DIR, namespace)
 
-def load_vector_store(namespace: str) -> FAISS | None:
+def current_version(namespace: str) -> Optional[str]:
+    """The live version name from CURRENT, or None for unversioned (legacy) namespaces."""
+    try:
+        with open(os.path.join(get_store_path(namespace), CURRENT_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def _version_path(namespace: str, version: str) -> str:
+    return os.path.join(get_store_path(namespace), VERSIONS_DIR, version)
+
+def _list_versions(namespace: str) -> List[str]:
+    try:
+        names = os.listdir(os.path.join(get_store_path(namespace), VERSIONS_DIR))
+    except FileNotFoundError:
+        return []
+    return sorted(name for name in names if name.isdigit())
+
+@contextmanager
+def namespace_writer(namespace: str):
+    """
+    Exclusive writer lock for a namespace, across threads and (on POSIX)
+    processes. Hold it across load → modify → save so concurrent ingests of the
+    same namespace serialize instead of overwriting each other. Readers never block.
+    """
+    with _writer_locks_guard:
+        lock = _writer_locks.setdefault(namespace, threading.RLock())
+    held = getattr(_held, "namespaces", None)
+    if held is None:
+        held = _held.namespaces = {}
+
+    with lock:
+        depth = held.get(namespace, 0)
+        handle = None
+        if depth == 0 and fcntl is not None:
+            path = get_store_path(namespace)
+            os.makedirs(path, exist_ok=True)
+            handle = open(os.path.join(path, LOCK_FILE), "a")
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        held[namespace] = depth + 1
+        try:
+            yield
+        finally:
+            held[namespace] = depth
+            if handle is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+                handle.close()
+
+def _read_index(path: str, mmap: bool) -> faiss.Index:
+    if mmap:
+        try:
+            return faiss.read_index(path, _MMAP_FLAGS)
+        except RuntimeError as e:
+            print(f"[vector_store] Cannot memory-map {path}, loading a private copy: {e}")
+    return faiss.read_index(path)
+
+def _load_from(path: str, namespace: str, mmap: bool = False) -> FAISS | None:
+    embeddings = wrap_embeddings(OpenAIEmbeddings())
+    if os.path.exists(os.path.join(path, META_FILE)):
+        index = _read_index(os.path.join(path, INDEX_FILE), mmap)
+        docstore, index_to_docstore_id = open_metadata(path)
+        return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+    if os.path.exists(os.path.join(path, LEGACY_PICKLE_FILE)):
+        if not ALLOW_LEGACY_PICKLE:
+            print(f"[vector_store] '{namespace}' only has a legacy index.pkl — run "
+                  f"Scripts/migrate_metadata.py or set ALLOW_LEGACY_PICKLE_INDEX=1")
+            return None
+        print(f"[vector_store] Loading legacy pickled docstore for '{namespace}'")
+        return FAISS.load_local(
+            path,
+            embeddings,
+            allow_dangerous_deserialization=True
+        )
+
+    return None
+
+def load_vector_store(namespace: str, version: Optional[str] = None, mmap: bool = False) -> FAISS | None:
     """
     Load a persisted FAISS index for a specific namespace (e.g., ticker).
-    Returns None if not found.
+    Reads the version named by CURRENT (or `version`), falling back to the
+    flat pre-versioning layout. Metadata is opened from meta.sqlite and read
+    lazily per search hit. Returns None if not found.
+    The returned store is private to the caller, so it is safe to modify,
+    unless mmap=True: a mapped index is read-only and FAISS aborts the
+    process on add, so mapped stores are for searching only.
     """
     path = get_store_path(namespace)
     if not os.path.isdir(path):
         return None
 
-    embeddings = OpenAIEmbeddings()
-    return FAISS.load_local(
-        path,
-        embeddings,
-        allow_dangerous_deserialization=True
-    )
+    version = version or current_version(namespace)
+    if version is not None:
+        return _load_from(_version_path(namespace, version), namespace, mmap)
+    return _load_from(path, namespace, mmap)
+
+def get_vector_store(namespace: str) -> FAISS | None:
+    """
+    Read-only access to a namespace's store, shared across sessions and requests.
+    Each caller gets one consistent version; the store is reloaded only when
+    CURRENT moves to a new version (or, for legacy namespaces, when the index
+    file changes). The index is memory-mapped when VECTOR_INDEX_MMAP is on.
+    Callers that mutate the store (e.g. ingestion) must use load_vector_store().
+    """
+    version = current_version(namespace)
+    if version is None:
+        try:
+            version = f"legacy-{os.path.getmtime(os.path.join(get_store_path(namespace), INDEX_FILE))}"
+        except OSError:
+            return None
+
+    with _store_cache_lock:
+        cached = _store_cache.get(namespace)
+        if cached and cached[0] == version:
+            return cached[1]
+
+    store = load_vector_store(namespace, None if version.startswith("legacy-") else version, mmap=INDEX_MMAP)
+    if store is not None:
+        with _store_cache_lock:
+            _store_cache[namespace] = (version, store)
+    return store
 
-def save_vector_store(store: FAISS, namespace: str) -> None:
+def save_vector_store(store: FAISS, namespace: str) -> str:
     """
-    Persist a FAISS store to disk under a specific namespace.
+    Persist a FAISS store as a new version of a namespace and make it current.
+    The version is written to a temporary directory, renamed into versions/,
+    and then published by atomically replacing CURRENT. Readers see either the
+    old version or the new one, never a mix. No pickle is written.
+    Returns the new version name.
     """
+    with namespace_writer(namespace):
+        path = get_store_path(namespace)
+        versions = _list_versions(namespace)
+        version = f"{int(versions[-1]) + 1 if versions else 1:08d}"
+
+        final_dir = _version_path(namespace, version)
+        tmp_dir = f"{final_dir}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        write_metadata(tmp_dir, store.docstore, store.index_to_docstore_id)
+        faiss.write_index(store.index, os.path.join(tmp_dir, INDEX_FILE))
+        os.rename(tmp_dir, final_dir)
+
+        pointer_tmp = os.path.join(path, f"{CURRENT_FILE}.tmp-{os.getpid()}")
+        with open(pointer_tmp, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(pointer_tmp, os.path.join(path, CURRENT_FILE))
+
+        _collect_garbage(namespace, version)
+        return version
+
+def _collect_garbage(namespace: str, current: str) -> None:
+    """
+    Remove superseded versions beyond the newest KEEP_VERSIONS once they are
+    older than the grace period, plus pre-versioning files in the namespace root.
+    Loaded stores keep working after their files are unlinked.
+    """
+    now = time.time()
     path = get_store_path(namespace)
-    store.save_local(path)
\ No newline at end of file
+    versions = _list_versions(namespace)
+    superseded = list(zip(versions, versions[1:]))[:max(0, len(versions) - KEEP_VERSIONS)]
+    for version, successor in superseded:
+        if version == current:
+            continue
+        version_dir = _version_path(namespace, version)
+        try:
+            # A version was superseded when its successor was written
+            if now - os.path.getmtime(_version_path(namespace, successor)) < GC_GRACE_SECONDS:
+                continue
+            shutil.rmtree(version_dir)
+        except OSError as e:
+            print(f"[vector_store] Could not remove {version_dir}: {e}")
+
+    # Directories left behind by writers that died mid-save
+    versions_root = os.path.join(path, VERSIONS_DIR)
+    for name in os.listdir(versions_root):
+        tmp_dir = os.path.join(versions_root, name)
+        if ".tmp-" in name and now - os.path.getmtime(tmp_dir) > GC_GRACE_SECONDS:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    for name in (INDEX_FILE, META_FILE, LEGACY_PICKLE_FILE):
+        legacy = os.path.join(path, name)
+        if os.path.exists(legacy):
+            os.remove(legacy)
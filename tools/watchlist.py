@@ -0,0 +1,142 @@
+"""
+Background precompute of watchlist summaries.
+
+For every ticker on the watchlist the refresher ingests new headlines and
+re-runs summarize_stock only when something meaningful changed: the price
+moved past WATCHLIST_PRICE_THRESHOLD_PCT since the stored summary, or new
+headlines landed in the ticker's namespace. The summarize tool reads the
+store first, so watchlist summaries become a lookup.
+
+Run standalone with:
+    python -m tools.watchlist AAPL MSFT NVDA
+"""
+import os
+import threading
+import time
+from typing import List, Optional
+
+import redis
+from dotenv import load_dotenv
+
+from tools.ingest_tool import ingest_headlines_for_ticker
+from tools.rate_limiter import BATCH, priority
+from tools.redis_client import get_redis
+from tools.stock_tool import fetch_stock_data
+from tools.summary_store import (
+    PRICE_THRESHOLD_PCT, REFRESH_SECONDS, get_headline_version, load_summary_record, price_moved,
+    save_summary, touch_summary
+)
+from tools.summary_tool import summarize_stock
+
+load_dotenv()
+
+WATCHLIST = [t.strip().upper() for t in os.getenv("WATCHLIST", "").split(",") if t.strip()]
+LOCK_KEY = "watchlist:lock:{ticker}"
+
+_refresher: Optional[threading.Thread] = None
+_refresher_lock = threading.Lock()
+
+
+def refresh_reason(record: Optional[dict], price: float, headline_version: int,
+                   threshold_pct: float = PRICE_THRESHOLD_PCT) -> Optional[str]:
+    """Why a stored summary must be rebuilt, or None if it is still good."""
+    if record is None:
+        return "no summary"
+    if record["headline_version"] != headline_version:
+        return "new headlines"
+    old_price = record.get("price") or 0.0
+    if price_moved(old_price, price, threshold_pct):
+        return f"price moved {old_price:.2f} → {price:.2f}"
+    return None
+
+
+def _claim(ticker: str, ttl: int) -> bool:
+    # Only one replica refreshes a ticker per interval
+    client = get_redis()
+    if client is None:
+        return True
+    try:
+        return bool(client.set(LOCK_KEY.format(ticker=ticker), "1", nx=True, ex=ttl))
+    except redis.RedisError:
+        return True
+
+
+def refresh_ticker(ticker: str, ingest: bool = True, force: bool = False) -> bool:
+    """
+    Bring one ticker's stored summary up to date. Returns True if it was rebuilt.
+    """
+    ticker = ticker.upper()
+    if ingest:
+        ingest_headlines_for_ticker(ticker)
+
+    data = fetch_stock_data(ticker)
+    if "error" in data:
+        print(f"[Watchlist] {ticker}: {data['error']}")
+        return False
+
+    price = float(data["current_price"])
+    version = get_headline_version(ticker)
+    record = load_summary_record(ticker)
+    reason = "forced" if force else refresh_reason(record, price, version)
+    if reason is None:
+        touch_summary(record)
+        print(f"[Watchlist] {ticker}: up to date")
+        return False
+
+    print(f"[Watchlist] {ticker}: regenerating ({reason})")
+    summary = summarize_stock(data)
+    if summary.startswith("⚠️"):
+        return False
+    save_summary(ticker, summary, price=price, headline_version=version)
+    return True
+
+
+def refresh_watchlist(tickers: List[str], interval: int = REFRESH_SECONDS) -> int:
+    rebuilt = 0
+    for ticker in tickers:
+        if not _claim(ticker, ttl=max(1, interval - 1)):
+            continue
+        try:
+            rebuilt += refresh_ticker(ticker)
+        except Exception as e:
+            print(f"[Watchlist] {ticker}: refresh failed: {e}")
+    return rebuilt
+
+
+def run_forever(tickers: List[str], interval: int = REFRESH_SECONDS,
+                stop: Optional[threading.Event] = None) -> None:
+    stop = stop or threading.Event()
+    print(f"[Watchlist] Refreshing {', '.join(tickers)} every {interval}s")
+    while not stop.is_set():
+        started = time.monotonic()
+        # Background work yields upstream capacity to interactive requests
+        with priority(BATCH):
+            rebuilt = refresh_watchlist(tickers, interval)
+        print(f"[Watchlist] Pass done: {rebuilt} rebuilt in {time.monotonic() - started:.1f}s")
+        stop.wait(max(0.0, interval - (time.monotonic() - started)))
+
+
+def start_background_refresher(tickers: Optional[List[str]] = None,
+                               interval: int = REFRESH_SECONDS) -> Optional[threading.Thread]:
+    """
+    Start the refresher in a daemon thread (once per process).
+    Does nothing when the watchlist is empty.
+    """
+    global _refresher
+    tickers = tickers if tickers is not None else WATCHLIST
+    if not tickers:
+        return None
+
+    with _refresher_lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = threading.Thread(
+                target=run_forever, args=(tickers, interval), name="watchlist-refresher", daemon=True
+            )
+            _refresher.start()
+    return _refresher
+
+
+if __name__ == "__main__":
+    from sys import argv
+
+    run_forever([t.upper() for t in argv[1:]] or WATCHLIST)
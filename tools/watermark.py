@@ -0,0 +1,112 @@
+"""
+Per-namespace ingestion high-water mark.
+
+vector_index/<namespace>/watermark.json records the newest `publishedAt`
+already ingested and the IDs (URL, or title when there is no URL) of recently
+ingested articles. Ingestion asks NewsAPI only for articles from the mark
+onward and skips IDs it has seen, so each run costs roughly the new news.
+It also keeps the canonical headlines of recent near-duplicate clusters
+(see tools.dedupe), so syndicated copies join the story they repeat.
+
+A run can stop before reaching the mark, at INGEST_MAX_RESULTS or on an error.
+The mark then stays put. `resume_before` records the oldest article fetched,
+and the next run pages the gap [mark, resume_before] with NewsAPI's `to`.
+`pending_latest` holds the newest article seen in the meantime. Once the gap
+is filled, the mark moves up to it.
+"""
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+from tools.vector_store import get_store_path
+
+WATERMARK_FILE = "watermark.json"
+MAX_SEEN_IDS = int(os.getenv("INGEST_MAX_SEEN_IDS", "5000"))
+
+
+def article_id(article: Dict) -> str:
+    return (article.get("url") or "").strip() or (article.get("title") or "").strip()
+
+
+def article_published_at(article: Dict) -> str:
+    # NewsAPI uses camelCase; documents we build use snake_case
+    return (article.get("publishedAt") or article.get("published_at") or "").strip()
+
+
+def _watermark_path(namespace: str) -> str:
+    return os.path.join(get_store_path(namespace), WATERMARK_FILE)
+
+
+def load_watermark(namespace: str) -> Optional[Dict]:
+    """
+    {"latest_published_at", "resume_before", "pending_latest": str | None,
+     "seen_ids": [...], "canonicals": [...]}, or None if never ingested.
+    """
+    try:
+        with open(_watermark_path(namespace), encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[watermark] Ignoring unreadable watermark for {namespace}: {e}")
+        return None
+    return {
+        "latest_published_at": data.get("latest_published_at"),
+        "resume_before": data.get("resume_before"),
+        "pending_latest": data.get("pending_latest"),
+        "seen_ids": list(data.get("seen_ids", [])),
+        "canonicals": list(data.get("canonicals", [])),
+    }
+
+
+def save_watermark(namespace: str, watermark: Dict) -> None:
+    """Write the watermark atomically (temp file + rename)."""
+    path = _watermark_path(namespace)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(watermark, f)
+    os.replace(tmp_path, path)
+
+
+def advance_watermark(watermark: Optional[Dict], articles: Iterable[Dict],
+                      canonicals: Optional[List[List[str]]] = None, complete: bool = True) -> Dict:
+    """
+    Return a new watermark that also covers `articles` (and replaces `canonicals` if given).
+    `complete` says whether the fetch reached the current mark. If it did not,
+    the mark stays put and the oldest fetched article becomes the resume point.
+    """
+    watermark = watermark or {}
+    latest = watermark.get("latest_published_at")
+    pending = watermark.get("pending_latest")
+    resume_before = watermark.get("resume_before")
+    seen: List[str] = list(watermark.get("seen_ids", []))
+    seen_set = set(seen)
+
+    published = sorted(p for p in map(article_published_at, articles) if p)
+    if published:
+        pending = max(pending or published[-1], published[-1])
+    if complete:
+        if pending and (latest is None or pending > latest):
+            latest = pending
+        pending = resume_before = None
+    elif published:
+        resume_before = published[0]
+
+    for article in articles:
+        aid = article_id(article)
+        if aid and aid not in seen_set:
+            seen.append(aid)
+            seen_set.add(aid)
+
+    if canonicals is None:
+        canonicals = list((watermark or {}).get("canonicals", []))
+
+    # Oldest IDs fall off first; anything older than the mark isn't refetched anyway
+    return {
+        "latest_published_at": latest,
+        "resume_before": resume_before,
+        "pending_latest": pending,
+        "seen_ids": seen[-MAX_SEEN_IDS:],
+        "canonicals": canonicals[-MAX_SEEN_IDS:],
+    }